@@ -1,5 +1,7 @@
+import asyncio
 import time
 import numpy as np
+from itertools import zip_longest
 from typing import Any
 
 from pressure_sensor import PressureSensor
@@ -7,6 +9,11 @@ from gps_sensor import GPSSensor
 from sensor_model import PressureSensorModels, GPSSensorModels
 from filters import Filters
 from data_logger import DataLogger
+from bias_estimator import createBiasEstimator, rollingMean
+from ring_buffer import RingBuffer
+from metrics import AltimeterMetrics
+from output_sink import OutputSink, ListSink
+from pipeline import Pipeline, SourceStage, ModelStage, FilterStage, FuserStage, SinkStage
 
 
 class Altimeter:
@@ -21,7 +28,8 @@ class Altimeter:
                  pressure_sensor_filter: Filters, gps_sensor_filter: Filters,
                  pressure_data_buffer_size: int, data_logger: DataLogger,
                  gps_data_size_factor = 0.5,
-                 max_idle_time=5.0):
+                 max_idle_time=5.0, batch_size=64, collect_metrics=False, metrics_dump_interval=None,
+                 bias_estimator_name='meanDifference', bias_estimator_parameters=None, output_sink: OutputSink = None):
         """
 
         :param pressure_sensor: Object to query pressure sensor data.
@@ -34,6 +42,17 @@ class Altimeter:
         :param data_logger: DataLogger object to log data for future simulation
         :param gps_data_size_factor: ratio of gps data buffer size to pressure data buffer size.
         :param max_idle_time: maximum idle time in seconds while waiting for sensor inputs
+        :param batch_size: maximum number of readings drained from each sensor in one step
+        :param collect_metrics: collects counters and per stage timings of the processing, see metrics()
+        :param metrics_dump_interval: interval in seconds between dumps of the metrics to the 'altimeter' logger,
+        None to never dump. Only used if collect_metrics is True.
+        :param bias_estimator_name: 'meanDifference' to estimate the bias as the difference of the buffer means,
+        'timeAligned' to compare every gps elevation with the pressure elevation at its time stamp or 'kalman' to
+        fuse the elevations with a Kalman filter (see bias_estimator)
+        :param bias_estimator_parameters: parameters of the kalman bias estimator, the gps variance defaults to
+        the variance parameter of the gps sensor model
+        :param output_sink: sink receiving the corrected elevations as they are produced (see output_sink), a
+        ListSink holding every output if None
         """
         self.pressure_sensor = pressure_sensor
         self.gps_sensor = gps_sensor
@@ -45,108 +64,373 @@ class Altimeter:
         self.data_logger = data_logger
         self.gps_data_size_factor = gps_data_size_factor
         self.max_idle_time = max_idle_time  # in seconds
+        self.batch_size = batch_size
+        self.bias_estimator_name = bias_estimator_name
+        self.bias_estimator_parameters = dict(bias_estimator_parameters or {})
+        if bias_estimator_name == 'kalman' and 'gps_variance' not in self.bias_estimator_parameters:
+            assert 'variance' in gps_sensor_model.sensor_model_parameters, "gps sensor model variance missing"
+            self.bias_estimator_parameters['gps_variance'] = gps_sensor_model.sensor_model_parameters['variance']
         self.state = 0.0
-        self.output_data = []
+        self.output_sink = ListSink() if output_sink is None else output_sink
+        self.metrics_recorder = AltimeterMetrics(metrics_dump_interval) if collect_metrics else None
+
+    def metrics(self):
+        """
+        :return: snapshot of the counters, the per stage timings and the fill of the internal buffers as a
+        dictionary, None if the metrics are not collected
+        """
+        if self.metrics_recorder is None:
+            return None
+        snapshot = self.metrics_recorder.snapshot()
+        # every processed sample passes the filter stage once
+        stages = snapshot['stages']
+        snapshot['counters']['pressure_samples'] = stages['pressure_filter']['count'] if 'pressure_filter' in stages else 0
+        snapshot['counters']['gps_fixes'] = stages['gps_filter']['count'] if 'gps_filter' in stages else 0
+        if hasattr(self, 'raw_sensor_data'):
+            snapshot['buffer_fill'] = {sensor_name: len(buffer) / buffer.capacity if buffer.capacity else 0.0
+                                       for sensor_name, buffer in self.raw_sensor_data.items()}
+        snapshot['bias'] = self.bias_estimator.bias if hasattr(self, 'bias_estimator') else 0.0
+        snapshot['state'] = self.state
+        return snapshot
+
+    def logData(self, pressure_batch, gps_batch):
+        """
+        logs the batches of sensor data for future simulation.
+        :param pressure_batch: list of pressure sensor readings, None for steps without pressure data
+        :param gps_batch: list of gps sensor readings, None for steps without gps data
+        :return: True if any of the batches has sensor data
+        """
+        received_data = False
+        # the readings are logged step by step so the log keeps the order in which they are processed
+        for pressure_data, gps_data in zip_longest(pressure_batch, gps_batch):
+            if pressure_data:
+                received_data = True
+                self.data_logger.log(pressure_data[0], 'pressure_sensor', pressure_data[1])
+            if gps_data:
+                received_data = True
+                self.data_logger.log(gps_data[0], 'gps_sensor', (gps_data[1], gps_data[2], gps_data[3]))
+        return received_data
 
     def readData(self):
         """
-        Reads the pressure sensor and GPS sensor using the respective sensor object and
-        logs the data for future simulation.
+        Reads a batch of up to batch_size readings from the pressure sensor and GPS sensor using the respective
+        sensor object and logs the data for future simulation.
         If no data is received from either of the sensors within the maximum idle time, then
         break_status to false and returned to end the data processing
-        :return: pressure data, gps data, break_status
+        :return: pressure data batch, gps data batch, break_status
         """
         break_status = False
-        pressure_data, gps_data = self.pressure_sensor.publish(), self.gps_sensor.publish()
-        if pressure_data or gps_data:
+        pressure_batch = self.pressure_sensor.publishMany(self.batch_size)
+        gps_batch = self.gps_sensor.publishMany(self.batch_size)
+        if self.logData(pressure_batch, gps_batch):
             self.last_activity_time = time.time()
-            if pressure_data:
-                self.data_logger.log(pressure_data[0], 'pressure_sensor', pressure_data[1])
-            if gps_data:
-                self.data_logger.log(gps_data[0], 'gps_sensor', (gps_data[1], gps_data[2], gps_data[3]))
         else:
             # break the loop if both data is absent for a long time
             if time.time() - self.last_activity_time > self.max_idle_time:
                 break_status = True
-        return pressure_data, gps_data, break_status
+            elif self.metrics_recorder is not None:
+                self.metrics_recorder.count('idle_waits')
+        return pressure_batch, gps_batch, break_status
 
-    def filterAndUpdateDataBuffer(self, raw_sensor_data:dict[Any], filtered_sensor_data: dict[Any], data: Any,
-                                  sensor_name: str, buffer_size_limit: int):
+    def filterAndUpdateDataBuffer(self, raw_sensor_data: RingBuffer, filtered_sensor_data: RingBuffer, data: Any,
+                                  sensor_filter: Filters = None):
         """
-        takes the raw sensor data and filters it and updates the internal buffer. The internal buffer is also monitored
-        to avoid buffer overflow.
+        takes the raw sensor data and filters it and updates the internal buffer. The internal buffers are circular
+        buffers, so the oldest data is evicted once the buffer is full.
         :param raw_sensor_data: internal buffer for raw sensor data
         :param filtered_sensor_data: internal buffer for filtered sensor data
-        :param data: sensor data as float or List[float]
-        :param sensor_name: name of the sensor
-        :param buffer_size_limit: maximum buffer size
+        :param data: sensor data as sequence of time and value
+        :param sensor_filter: filter of the sensor, the pressure sensor filter if None
+        :return: filtered data point
         """
-        if len(filtered_sensor_data[sensor_name]['data']) == buffer_size_limit:
-            filtered_sensor_data[sensor_name]['data'].pop(0)
-            filtered_sensor_data[sensor_name]['time'].pop(0)
-            raw_sensor_data[sensor_name]['time'].pop(0)
-            raw_sensor_data[sensor_name]['data'].pop(0)
-        raw_sensor_data[sensor_name]['time'].append(data[0])
-        raw_sensor_data[sensor_name]['data'].append(data[1])
-        filtered_pressure_data = self.pressure_sensor_filter.apply(raw_sensor_data[sensor_name]['data'],
-                                                                   filtered_sensor_data[sensor_name]['data'])
-        filtered_sensor_data[sensor_name]['time'].append(data[0])
-        filtered_sensor_data[sensor_name]['data'].append(filtered_pressure_data)
+        sensor_filter = self.pressure_sensor_filter if sensor_filter is None else sensor_filter
+        raw_sensor_data.push(data[0], data[1])
+        filtered_data = float(sensor_filter.apply(raw_sensor_data, filtered_sensor_data))
+        filtered_sensor_data.push(data[0], filtered_data)
+        return filtered_data
 
 
+    def resetState(self):
+        """
+        Creates the internal buffers and the bias estimator used to process the sensor data.
+        """
+        gps_data_buffer_size = int(self.gps_data_size_factor * self.pressure_data_buffer_size)
+        self.filtered_sensor_data, self.raw_sensor_data = (
+            {'pressure_sensor': RingBuffer(self.pressure_data_buffer_size),
+             'gps_sensor': RingBuffer(gps_data_buffer_size)},
+            {'pressure_sensor': RingBuffer(self.pressure_data_buffer_size),
+             'gps_sensor': RingBuffer(gps_data_buffer_size)})
+        self.bias_estimator = createBiasEstimator(self.bias_estimator_name, self.pressure_data_buffer_size,
+                                                  gps_data_buffer_size, self.bias_estimator_parameters)
+        self.estimated_elevation = 0.0
+
+    def processBatch(self, pressure_batch, gps_batch):
+        """
+        Processes a batch of pressure sensor and gps sensor readings in one step. The i-th readings of the two
+        batches are processed together, the pressure data first, and produce one corrected elevation. The
+        outputs of the batch are written to the output sink.
+        :param pressure_batch: list of pressure sensor readings, None for steps without pressure data
+        :param gps_batch: list of gps sensor readings, None for steps without gps data
+        :return: list of the corrected elevations of the batch
+        """
+        raw_pressure_buffer, filtered_pressure_buffer = (self.raw_sensor_data['pressure_sensor'],
+                                                       self.filtered_sensor_data['pressure_sensor'])
+        raw_gps_buffer, filtered_gps_buffer = self.raw_sensor_data['gps_sensor'], self.filtered_sensor_data['gps_sensor']
+        bias_estimator = self.bias_estimator
+        estimated_elevation = self.estimated_elevation
+        pressure_filter, gps_filter = self.pressure_sensor_filter, self.gps_sensor_filter
+        filter_pressure = filter_gps = self.filterAndUpdateDataBuffer
+        pressure_model, gps_model = self.pressure_sensor_model.model, self.gps_sensor_model.model
+        update_pressure, update_gps = bias_estimator.updatePressure, bias_estimator.updateGps
+        metrics = self.metrics_recorder
+        if metrics is not None:
+            # the stages are swapped for timed versions once per batch, so the loop is the same either way
+            filter_pressure = metrics.timed('pressure_filter', filter_pressure)
+            filter_gps = metrics.timed('gps_filter', filter_gps)
+            pressure_model = metrics.timed('pressure_model', pressure_model)
+            gps_model = metrics.timed('gps_model', gps_model)
+            update_pressure = metrics.timed('pressure_bias', update_pressure)
+            update_gps = metrics.timed('gps_bias', update_gps)
+            batch_start = time.perf_counter_ns()
+        output_times, outputs = [], []
+        for pressure_data, gps_data in zip_longest(pressure_batch, gps_batch):
+            if pressure_data:
+                # processing pressure data, only the newest filtered sample needs to be converted to elevation
+                filtered_pressure_data = filter_pressure(raw_pressure_buffer, filtered_pressure_buffer, pressure_data,
+                                                         pressure_filter)
+                estimated_elevation = pressure_model(filtered_pressure_data)
+                update_pressure(estimated_elevation, pressure_data[0])
+
+            if gps_data:
+                # processing gps data
+                elevation_gps = gps_model(gps_data[1:])
+                filtered_elevation_gps = filter_gps(raw_gps_buffer, filtered_gps_buffer, (gps_data[0], elevation_gps),
+                                                    gps_filter)
+                # compute bias for the estimate
+                update_gps(filtered_elevation_gps, gps_data[0])
+            if pressure_data or gps_data:
+                output_times.append(pressure_data[0] if pressure_data else gps_data[0])
+                outputs.append(estimated_elevation + bias_estimator.bias)
+        if outputs:
+            self.state = outputs[-1]
+            self.output_sink.write(output_times, outputs)
+        if metrics is not None:
+            metrics.record('batch', time.perf_counter_ns() - batch_start)
+            metrics.count('batches')
+            metrics.count('outputs', len(outputs))
+            metrics.dumpIfDue(self.metrics)
+        self.estimated_elevation = estimated_elevation
+        return outputs
+
     def processSensorData(self):
         """
         The primarily routine responsible for estimating the elevation using pressure sensor and gps sensor data.
-        The function reads the sensor data, compute the mean of the filtered sensor data in the internal buffers,
-        computes the bias as the difference between the mean of pressure and gps buffer data. The bias is used to
-        correct the dift error in elevation estimate based on the pressure sensor data. The output is store in the list
-        output_data
+        The function reads the sensor data in batches, updates the running mean of the filtered sensor elevations
+        in the internal buffers, computes the bias as the difference between the mean of pressure and gps buffer
+        data. The bias is used to correct the dift error in elevation estimate based on the pressure sensor data.
+        The output is written to the output sink
         :return:
         """
+        for _ in self.iterSensorData():
+            pass
+
+    def iterSensorData(self):
+        """
+        Generator version of processSensorData, which yields the corrected elevations of every batch after they
+        are written to the output sink.
+        :return: generator of lists of corrected elevations
+        """
         self.last_activity_time = time.time()
-        filtered_sensor_data, raw_sensor_data = ({'pressure_sensor': {'data': [], 'time':[]},
-                                                    'gps_sensor': {'data': [], 'time':[]}},
-                                                   {'pressure_sensor': {'data': [], 'time':[]},
-                                                    'gps_sensor': {'data': [], 'time':[]}})
-        bias = 0.0
-        sample_mean_filtered_pressure_elevations = 0.0
-        estimated_elevation = 0.0
+        self.resetState()
         self.data_logger.start()
         while True:
             # read data from sensors
-            pressure_data, gps_data, break_status = self.readData()
+            pressure_batch, gps_batch, break_status = self.readData()
             if break_status:
                 # break if data is not available for a long time
                 break
-            if pressure_data:
-                # processing pressure data
-                self.filterAndUpdateDataBuffer(raw_sensor_data, filtered_sensor_data, pressure_data, sensor_name='pressure_sensor',
-                                               buffer_size_limit=self.pressure_data_buffer_size)
-                estimated_elevations = [self.pressure_sensor_model.model(data) for data in filtered_sensor_data['pressure_sensor']['data']]
-                sample_mean_filtered_pressure_elevations = sum(estimated_elevations) / len(estimated_elevations)
-                estimated_elevation = estimated_elevations[-1]
+            yield self.processBatch(pressure_batch, gps_batch)
 
-            if gps_data:
-                # processing gps data
-                elevation_gps = self.gps_sensor_model.model([gps_data[1], gps_data[2], gps_data[3]])
-                self.filterAndUpdateDataBuffer(raw_sensor_data, filtered_sensor_data, [gps_data[0], elevation_gps],
-                                               sensor_name='gps_sensor',
-                                               buffer_size_limit=int(self.gps_data_size_factor * self.pressure_data_buffer_size))
-                sample_mean_filtered_gps = (sum(filtered_sensor_data['gps_sensor']['data']) /
-                                            len(filtered_sensor_data['gps_sensor']['data']))
-                # compute bias for the estimate
-                bias = sample_mean_filtered_gps - sample_mean_filtered_pressure_elevations
-            if pressure_data or gps_data:
-                corrected_elevation = estimated_elevation + bias
-                self.state = corrected_elevation
-                self.output_data.append(corrected_elevation)
+    async def processSensorDataAsync(self):
+        """
+        Event driven version of processSensorData to run on an asyncio event loop. Instead of polling the sensors,
+        the routine sleeps until either of the sensors receives new data and ends when no data is received
+        within the maximum idle time. Control is returned to the event loop after every batch, so many altimeters
+        can share one event loop.
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        data_event = asyncio.Event()
+
+        def listener():
+            if not data_event.is_set():
+                loop.call_soon_threadsafe(data_event.set)
+
+        self.pressure_sensor.addListener(listener)
+        self.gps_sensor.addListener(listener)
+        self.resetState()
+        try:
+            while True:
+                data_event.clear()
+                pressure_batch = self.pressure_sensor.publishMany(self.batch_size)
+                gps_batch = self.gps_sensor.publishMany(self.batch_size)
+                if not pressure_batch and not gps_batch:
+                    if self.metrics_recorder is not None:
+                        self.metrics_recorder.count('idle_waits')
+                    try:
+                        await asyncio.wait_for(data_event.wait(), self.max_idle_time)
+                    except asyncio.TimeoutError:
+                        # break if data is not available for a long time
+                        break
+                    continue
+                self.logData(pressure_batch, gps_batch)
+                self.processBatch(pressure_batch, gps_batch)
+                await asyncio.sleep(0)
+        finally:
+            self.pressure_sensor.removeListener(listener)
+            self.gps_sensor.removeListener(listener)
+
+    def filterBatch(self, raw_data, buffer_size_limit: int, sensor_filter: Filters = None):
+        """
+        filters a whole series of sensor data at once, the output is the same as pushing the series through
+        filterAndUpdateDataBuffer with a buffer of the given size.
+        :param raw_data: numpy array of raw sensor data ordered from the oldest to the newest
+        :param buffer_size_limit: maximum buffer size
+        :param sensor_filter: filter of the sensor, the pressure sensor filter if None
+        :return: numpy array of filtered data
+        """
+        sensor_filter = self.pressure_sensor_filter if sensor_filter is None else sensor_filter
+        filter_parameters = sensor_filter.filter_parameters
+        if buffer_size_limit < max(filter_parameters["raw_data_window_size"],
+                                   filter_parameters["filtered_data_window_size"]):
+            # the filter windows never fill up, so the raw data is passed through
+            return np.array(raw_data, dtype=np.float64)
+        return sensor_filter.applyBatch(raw_data)
+
+    def runBatch(self, times, pressures, gps=None):
+        """
+        Computes the corrected elevation for a whole log at once using vectorized sensor models, filters and rolling
+        window means. The rows of the input are processed in the same way the streaming altimeter processes one
+        reading from each sensor per step, so the output matches the output of run() on the same data.
+        :param times: numpy array of time stamps of the rows in increasing order
+        :param pressures: numpy array of pressure data per row, nan for rows without pressure data
+        :param gps: numpy array of shape (rows, 3) with latitude, longitude & elevation per row, nan for rows
+        without gps data. None if no gps data is available
+        :return: corrected elevation for every row with pressure or gps data as numpy array
+        """
+        times = np.asarray(times, dtype=np.float64)
+        pressures = np.asarray(pressures, dtype=np.float64)
+        assert pressures.shape == times.shape, "pressure data must have one value per time stamp"
+        assert np.all(np.diff(times) >= 0), "time stamps must be in increasing order"
+        if self.bias_estimator_name != 'meanDifference':
+            # the other bias estimators are recursive, so the rows are run through the streaming altimeter
+            return self.runRows(times, pressures, gps)
+        gps_data_buffer_size = int(self.gps_data_size_factor * self.pressure_data_buffer_size)
+
+        # elevation estimate and its running mean from the pressure data
+        pressure_mask = ~np.isnan(pressures)
+        filtered_pressures = self.filterBatch(pressures[pressure_mask], self.pressure_data_buffer_size)
+        estimated_elevations = self.pressure_sensor_model.model(filtered_pressures)
+        mean_pressure_elevations = rollingMean(estimated_elevations, self.pressure_data_buffer_size)
+        # index of the latest pressure sample seen at every row, 0 is used for rows before the first sample
+        pressure_index = np.cumsum(pressure_mask)
+
+        # bias from the gps data, it only changes on rows with gps data
+        bias = np.zeros(len(times))
+        gps_mask = np.zeros(len(times), dtype=bool)
+        if gps is not None:
+            gps = np.asarray(gps, dtype=np.float64)
+            assert gps.shape == (len(times), 3), "gps data must have latitude, longitude & elevation per time stamp"
+            gps_mask = ~np.isnan(gps).any(axis=1)
+            if gps_mask.any():
+                elevations_gps = self.gps_sensor_model.model(gps[gps_mask])
+                filtered_elevations_gps = self.filterBatch(elevations_gps, gps_data_buffer_size,
+                                                           self.gps_sensor_filter)
+                mean_gps_elevations = rollingMean(filtered_elevations_gps, gps_data_buffer_size)
+                gps_bias = (mean_gps_elevations -
+                            np.concatenate(([0.0], mean_pressure_elevations))[pressure_index[gps_mask]])
+                # hold the latest bias until the next gps sample
+                bias = np.concatenate(([0.0], gps_bias))[np.cumsum(gps_mask)]
+
+        estimated_elevation = np.concatenate(([0.0], estimated_elevations))[pressure_index]
+        return (estimated_elevation + bias)[pressure_mask | gps_mask]
+
+    def runRows(self, times, pressures, gps=None):
+        """
+        Computes the corrected elevation for a whole log by processing its rows in one batch of the streaming
+        altimeter. Takes the same input and returns the same output as runBatch.
+        """
+        pressure_batch = [None if np.isnan(pressure) else (time_stamp, pressure)
+                          for time_stamp, pressure in zip(times.tolist(), pressures.tolist())]
+        gps_batch = []
+        if gps is not None:
+            gps = np.asarray(gps, dtype=np.float64)
+            assert gps.shape == (len(times), 3), "gps data must have latitude, longitude & elevation per time stamp"
+            gps_batch = [None if np.isnan(data).any() else (time_stamp, *data)
+                         for time_stamp, data in zip(times.tolist(), gps.tolist())]
+        output_sink, self.output_sink = self.output_sink, ListSink()
+        try:
+            self.resetState()
+            return np.array(self.processBatch(pressure_batch, gps_batch), dtype=np.float64)
+        finally:
+            self.output_sink = output_sink
+
+    def buildPipeline(self, modes=None, queue_size=8, callback=None):
+        """
+        Builds a pipeline of the stages of the altimeter, see pipeline. The stages are the source reading the
+        sensors, the gps sensor model, the pressure and gps filters, the pressure sensor model, the bias fuser
+        and a sink, and produce the same output as run().
+        :param modes: list of the execution modes of the 7 stages, all 'inline' if None
+        :param queue_size: maximum number of batches waiting in a queue between two workers
+        :param callback: function called with every list of corrected elevations, None to collect them in the
+        output_data of the sink, the last stage of the pipeline
+        :return: Pipeline object
+        """
+        gps_data_buffer_size = int(self.gps_data_size_factor * self.pressure_data_buffer_size)
+        bias_estimator = createBiasEstimator(self.bias_estimator_name, self.pressure_data_buffer_size,
+                                             gps_data_buffer_size, self.bias_estimator_parameters)
+        stages = [SourceStage(self.pressure_sensor, self.gps_sensor, self.batch_size, self.max_idle_time,
+                              self.data_logger),
+                  ModelStage('gps_sensor', self.gps_sensor_model),
+                  FilterStage('pressure_sensor', self.pressure_sensor_filter, self.pressure_data_buffer_size),
+                  FilterStage('gps_sensor', self.gps_sensor_filter, gps_data_buffer_size),
+                  ModelStage('pressure_sensor', self.pressure_sensor_model),
+                  FuserStage(bias_estimator),
+                  SinkStage(callback)]
+        return Pipeline(stages, modes, queue_size)
 
     def run(self):
         """
         The routine responsible for running the elevation estimation algorithm.
-        :return: output data as list[float]
+        :return: outputs held by the output sink, the list of every output for the default sink
         """
         self.data_logger.start()
         self.processSensorData()
         self.data_logger.stop()
-        return self.output_data
+        self.output_sink.close()
+        return self.output_sink.result()
+
+    def runIter(self):
+        """
+        Generator version of run(), which yields the corrected elevations as they are produced. The outputs are
+        also written to the output sink.
+        :return: generator of corrected elevations
+        """
+        self.data_logger.start()
+        try:
+            for outputs in self.iterSensorData():
+                yield from outputs
+        finally:
+            self.data_logger.stop()
+            self.output_sink.close()
+
+    async def runAsync(self):
+        """
+        The coroutine responsible for running the elevation estimation algorithm on an asyncio event loop.
+        :return: outputs held by the output sink, the list of every output for the default sink
+        """
+        self.data_logger.start()
+        await self.processSensorDataAsync()
+        self.data_logger.stop()
+        self.output_sink.close()
+        return self.output_sink.result()
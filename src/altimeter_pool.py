@@ -0,0 +1,201 @@
+"""
+package with an altimeter which tracks the elevation of many vehicles in one process
+"""
+import numpy as np
+
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import MovingAverage1D
+
+
+class WindowArray:
+    """
+    Struct of arrays holding a fixed size window of samples per vehicle. Row i of the arrays belongs to vehicle i.
+    The running sum of every window is updated when a sample is pushed and when the oldest sample is evicted.
+    """
+    def __init__(self, n_vehicles: int, window_size: int):
+        """
+        :param n_vehicles: number of vehicles
+        :param window_size: maximum number of samples held per vehicle
+        """
+        assert window_size > 0, "window size must be positive"
+        self.window_size = window_size
+        self.values = np.zeros((n_vehicles, window_size))
+        self.sums = np.zeros(n_vehicles)
+        self.counts = np.zeros(n_vehicles, dtype=np.int64)
+        self.pushes = np.zeros(n_vehicles, dtype=np.int64)
+
+    def push(self, vehicles, values):
+        """
+        adds one sample to the window of each of the given vehicles, evicting the oldest sample if the window
+        is full.
+        :param vehicles: numpy array of distinct vehicle indices
+        :param values: numpy array of samples, one per vehicle
+        """
+        slots = self.pushes[vehicles] % self.window_size
+        full = self.counts[vehicles] == self.window_size
+        self.sums[vehicles] += values - np.where(full, self.values[vehicles, slots], 0.0)
+        self.values[vehicles, slots] = values
+        self.counts[vehicles] += ~full
+        self.pushes[vehicles] += 1
+        # recompute the sums once per window to stop round off errors from accumulating
+        resync = vehicles[full & (slots == self.window_size - 1)]
+        self.sums[resync] = self.values[resync].sum(axis=1)
+
+    def means(self, vehicles):
+        """
+        :param vehicles: numpy array of vehicle indices
+        :return: mean of the window of each vehicle, 0.0 for empty windows
+        """
+        counts = self.counts[vehicles]
+        return np.where(counts > 0, self.sums[vehicles] / np.maximum(counts, 1), 0.0)
+
+    def recent(self, vehicles, n: int):
+        """
+        :param vehicles: numpy array of vehicle indices
+        :param n: number of samples, must not exceed the window size
+        :return: array of shape (vehicles, n) with the n most recent samples of each vehicle, newest first
+        """
+        slots = (self.pushes[vehicles, None] - 1 - np.arange(n)[None, :]) % self.window_size
+        return self.values[vehicles[:, None], slots]
+
+
+class AltimeterPool:
+    """
+    The class runs the altimeter algorithm of Altimeter for many vehicles at once. The state of all the vehicles
+    is held in numpy arrays with one row per vehicle, so samples of different vehicles are filtered, converted to
+    elevation and used to update the bias in vectorized steps instead of one Python object and loop per vehicle.
+    """
+    def __init__(self, n_vehicles: int,
+                 pressure_sensor_model: PressureSensorModels, gps_sensor_model: GPSSensorModels,
+                 pressure_sensor_filter: MovingAverage1D, gps_sensor_filter: MovingAverage1D,
+                 pressure_data_buffer_size: int, gps_data_size_factor=0.5):
+        """
+        :param n_vehicles: number of vehicles, vehicles are identified by an integer id in [0, n_vehicles)
+        :param pressure_sensor_model: sensor model to convert the pressure sensor data to elevation.
+        :param gps_sensor_model: sensor model to convert the GPS sensor data to elevation.
+        :param pressure_sensor_filter: moving average filter for the pressure sensor data.
+        :param gps_sensor_filter: moving average filter for the GPS sensor data.
+        :param pressure_data_buffer_size: maximum of the internal buffer to hold past pressure sensor data.
+        :param gps_data_size_factor: ratio of gps data buffer size to pressure data buffer size.
+        """
+        assert isinstance(pressure_sensor_filter, MovingAverage1D) and isinstance(gps_sensor_filter, MovingAverage1D), \
+            "only moving average filters can be vectorized across vehicles"
+        self.n_vehicles = n_vehicles
+        self.pressure_sensor_model = pressure_sensor_model
+        self.gps_sensor_model = gps_sensor_model
+        self.pressure_sensor_filter = pressure_sensor_filter
+        self.gps_sensor_filter = gps_sensor_filter
+        self.pressure_data_buffer_size = pressure_data_buffer_size
+        self.gps_data_buffer_size = int(gps_data_size_factor * pressure_data_buffer_size)
+        self.reset()
+
+    def reset(self):
+        """
+        clears the state of all the vehicles
+        """
+        n = self.n_vehicles
+        self.raw_pressure_data = WindowArray(n, len(self.pressure_sensor_filter.weights))
+        self.raw_gps_data = WindowArray(n, len(self.gps_sensor_filter.weights))
+        self.pressure_elevations = WindowArray(n, self.pressure_data_buffer_size)
+        self.gps_elevations = WindowArray(n, self.gps_data_buffer_size)
+        self.estimated_elevation = np.zeros(n)
+        self.bias = np.zeros(n)
+        # time stamp of the last row of every vehicle, to check the rows of a vehicle are in time order
+        self.last_time = np.full(n, -np.inf)
+
+    @property
+    def state(self):
+        """
+        :return: corrected elevation of every vehicle
+        """
+        return self.estimated_elevation + self.bias
+
+    @staticmethod
+    def filterStep(sensor_filter: MovingAverage1D, raw_data: WindowArray, buffer_size_limit: int, vehicles, values):
+        """
+        pushes one raw sample per vehicle and filters it in the same way Altimeter.filterAndUpdateDataBuffer does
+        with a buffer of the given size.
+        :return: numpy array of filtered samples
+        """
+        raw_data.push(vehicles, values)
+        window_size = len(sensor_filter.weights)
+        if buffer_size_limit < window_size:
+            # the filter window never fills up, so the raw data is passed through
+            return values
+        filtered = raw_data.recent(vehicles, window_size) @ np.asarray(sensor_filter.weights)
+        return np.where(raw_data.counts[vehicles] == window_size, filtered, values)
+
+    def processStep(self, vehicles, pressures, gps):
+        """
+        processes one step of each of the given distinct vehicles in a vectorized way.
+        :param vehicles: numpy array of distinct vehicle indices
+        :param pressures: numpy array of pressure data, nan for vehicles without pressure data in the step
+        :param gps: numpy array of shape (vehicles, 3) of gps data, nan for vehicles without gps data in the step
+        :return: numpy array of corrected elevations
+        """
+        pressure_mask = ~np.isnan(pressures)
+        if pressure_mask.any():
+            pressure_vehicles = vehicles[pressure_mask]
+            filtered_pressures = self.filterStep(self.pressure_sensor_filter, self.raw_pressure_data,
+                                                 self.pressure_data_buffer_size, pressure_vehicles,
+                                                 pressures[pressure_mask])
+            elevations = self.pressure_sensor_model.model(filtered_pressures)
+            self.pressure_elevations.push(pressure_vehicles, elevations)
+            self.estimated_elevation[pressure_vehicles] = elevations
+
+        gps_mask = ~np.isnan(gps).any(axis=1)
+        if gps_mask.any():
+            gps_vehicles = vehicles[gps_mask]
+            elevations_gps = self.gps_sensor_model.model(gps[gps_mask])
+            filtered_elevations_gps = self.filterStep(self.gps_sensor_filter, self.raw_gps_data,
+                                                      self.gps_data_buffer_size, gps_vehicles, elevations_gps)
+            self.gps_elevations.push(gps_vehicles, filtered_elevations_gps)
+            # compute bias for the estimate
+            self.bias[gps_vehicles] = (self.gps_elevations.means(gps_vehicles) -
+                                       self.pressure_elevations.means(gps_vehicles))
+
+        return np.where(pressure_mask | gps_mask, self.estimated_elevation[vehicles] + self.bias[vehicles], np.nan)
+
+    def processSamples(self, vehicle_ids, times, pressures, gps=None):
+        """
+        processes a batch of interleaved samples of many vehicles. Each row is one step of a vehicle, as one
+        reading of each sensor is in the Altimeter, and the rows of a vehicle are processed in order. The rows
+        are grouped so that every vectorized step updates each vehicle at most once.
+        :param vehicle_ids: numpy array of integer vehicle ids per row
+        :param times: numpy array of time stamps per row, increasing over the rows of a vehicle and across batches
+        :param pressures: numpy array of pressure data per row, nan for rows without pressure data
+        :param gps: numpy array of shape (rows, 3) of gps data per row, nan for rows without gps data. None if the
+        batch has no gps data
+        :return: numpy array of corrected elevations per row, nan for rows without any sensor data
+        """
+        vehicle_ids = np.asarray(vehicle_ids, dtype=np.int64)
+        times = np.asarray(times, dtype=np.float64)
+        pressures = np.asarray(pressures, dtype=np.float64)
+        if gps is None:
+            gps = np.full((len(vehicle_ids), 3), np.nan)
+        gps = np.asarray(gps, dtype=np.float64)
+        assert len(times) == len(vehicle_ids) and len(pressures) == len(vehicle_ids), "rows must have the same length"
+        assert gps.shape == (len(vehicle_ids), 3), "gps data must have latitude, longitude & elevation per row"
+        assert np.all((vehicle_ids >= 0) & (vehicle_ids < self.n_vehicles)), "invalid vehicle id"
+
+        # rank of every row among the rows of its vehicle, rows with the same rank form one step
+        order = np.argsort(vehicle_ids, kind='stable')
+        sorted_ids = vehicle_ids[order]
+        group_start = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        group_size = np.diff(np.r_[group_start, len(sorted_ids)])
+        rank = np.empty(len(vehicle_ids), dtype=np.int64)
+        rank[order] = np.arange(len(sorted_ids)) - np.repeat(group_start, group_size)
+        if len(sorted_ids):
+            sorted_times, group_end = times[order], group_start + group_size - 1
+            assert np.all((np.diff(sorted_times) >= 0) | (sorted_ids[1:] != sorted_ids[:-1])) and \
+                np.all(sorted_times[group_start] >= self.last_time[sorted_ids[group_start]]), \
+                "time stamps of a vehicle must be in increasing order"
+            self.last_time[sorted_ids[group_end]] = sorted_times[group_end]
+
+        output = np.full(len(vehicle_ids), np.nan)
+        step_order = np.argsort(rank, kind='stable')
+        step_bounds = np.searchsorted(rank[step_order], np.arange(rank.max() + 2)) if len(rank) else [0]
+        for start, end in zip(step_bounds[:-1], step_bounds[1:]):
+            rows = step_order[start:end]
+            output[rows] = self.processStep(vehicle_ids[rows], pressures[rows], gps[rows])
+        return output
@@ -0,0 +1,268 @@
+"""
+The script to benchmark the hot path of the altimeter. The per sample latency (p50/p99) and the throughput of
+the altimeter loop, the moving average filter, the standard atmospheric model, the sensor queue and the data
+logger are measured over a sweep of buffer sizes and gps fix rates using synthetic sensor streams. The gps fix
+rate, the fraction of the pressure samples with a gps fix, stands in for the sample rates of the sensors: the
+readings are queued before they are processed, so the cost per sample does not depend on the time between the
+samples, only on the mix of the sensors (the altimeter at the real sample rates is run by paced_replay). The results
+are written as json and can be compared against a stored baseline to catch performance regressions. Every
+benchmark is repeated and the medians of the repeats are reported together with their spread, so a comparison
+only flags slowdowns larger than the run to run noise.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from altimeter import Altimeter
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import MovingAverage1D, ExponentialMovingAverage1D
+from data_logger import DataLogger
+from ring_buffer import RingBuffer
+from data_generator import A, B, C, generateSensorData
+
+# the default output path is relative to the repository, so the script runs from any working directory
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+
+
+def summarize(latencies_ns, n_samples=None, total_time_s=None):
+    """
+    summarizes per call latencies
+    :param latencies_ns: list of per sample latencies in nanoseconds
+    :param n_samples: number of samples processed, the number of latencies if None
+    :param total_time_s: total time in seconds to process the samples, the sum of the latencies if None
+    :return: dictionary with the p50, p99 and mean latency in microseconds and the throughput in samples per second
+    """
+    latencies_us = np.asarray(latencies_ns, dtype=np.float64) / 1e3
+    n_samples = len(latencies_us) if n_samples is None else n_samples
+    total_time_s = latencies_us.sum() / 1e6 if total_time_s is None else total_time_s
+    return {'p50_us': float(np.percentile(latencies_us, 50)), 'p99_us': float(np.percentile(latencies_us, 99)),
+            'mean_us': float(latencies_us.mean()), 'throughput_per_s': n_samples / total_time_s}
+
+
+def timeCalls(function, arguments):
+    """
+    :param function: function to time
+    :param arguments: list of arguments, the function is called once per argument
+    :return: list of latencies of the calls in nanoseconds
+    """
+    clock = time.perf_counter_ns
+    latencies_ns = []
+    for argument in arguments:
+        start = clock()
+        function(argument)
+        latencies_ns.append(clock() - start)
+    return latencies_ns
+
+
+def syntheticStream(n_samples: int, gps_fix_rate: float):
+    """
+    :param n_samples: number of time steps
+    :param gps_fix_rate: probability of a gps fix at a time step
+    :return: pressure readings and gps readings with None for time steps without a fix
+    """
+    height = np.linspace(1, 100, n_samples)
+    pressure_data, gps_data, gps_fix = generateSensorData(height, np.linspace(0, 500, n_samples), gps_fix_rate)
+    times = np.arange(n_samples, dtype=np.float64).tolist()
+    pressure_readings = list(zip(times, pressure_data.tolist()))
+    gps_readings = [(t, g, g, g) if fix else None for t, g, fix in zip(times, gps_data.tolist(), gps_fix.tolist())]
+    return pressure_readings, gps_readings
+
+
+def buildAltimeter(pressure_data_buffer_size: int, log_file: str):
+    pressure_sensor_model = PressureSensorModels('standardAtmosModel', {'a': A, 'b': B, 'c': C})
+    gps_sensor_model = GPSSensorModels('standardGpsModel', {'variance': 0.01})
+    sensor_filter = MovingAverage1D({'raw_data_window_size': 3, 'filtered_data_window_size': 0,
+                                     'weights': [1.0, 1.0, 1.0]})
+    return Altimeter(PressureSensor(1, "PressureSensor", 'Pa'), GPSSensor(2, "GpsSensor", 'm'),
+                     pressure_sensor_model, gps_sensor_model, sensor_filter, sensor_filter,
+                     pressure_data_buffer_size, DataLogger(log_file, 'w'), max_idle_time=0.0)
+
+
+def benchmarkAltimeter(n_samples: int, pressure_data_buffer_sizes, gps_fix_rates, log_file: str):
+    results = {}
+    for pressure_data_buffer_size in pressure_data_buffer_sizes:
+        for gps_fix_rate in gps_fix_rates:
+            pressure_readings, gps_readings = syntheticStream(n_samples, gps_fix_rate)
+            # latency and throughput of a single step of the altimeter
+            altimeter = buildAltimeter(pressure_data_buffer_size, log_file)
+            altimeter.resetState()
+            steps = [([p], [g]) for p, g in zip(pressure_readings, gps_readings)]
+            key = f"Altimeter.processBatch[buffer={pressure_data_buffer_size},gps_rate={gps_fix_rate}]"
+            results[key] = summarize(timeCalls(lambda step: altimeter.processBatch(*step), steps))
+            # throughput of the whole loop including the sensor queues and the data logger, the latency is the
+            # mean time per sample since the loop processes the samples in batches
+            altimeter = buildAltimeter(pressure_data_buffer_size, log_file)
+            altimeter.pressure_sensor.sensor_data_queue.extend(pressure_readings)
+            altimeter.gps_sensor.sensor_data_queue.extend((p[0], None) if g is None else g
+                                                          for p, g in zip(pressure_readings, gps_readings))
+            start = time.perf_counter()
+            altimeter.run()
+            total_time_s = time.perf_counter() - start
+            key = f"Altimeter.run[buffer={pressure_data_buffer_size},gps_rate={gps_fix_rate}]"
+            results[key] = summarize([total_time_s * 1e9 / n_samples], n_samples, total_time_s)
+    return results
+
+
+def benchmarkFilter(n_samples: int, pressure_data_buffer_sizes, window_sizes):
+    results = {}
+    data = np.random.normal(101000, 100, n_samples).tolist()
+    for pressure_data_buffer_size in pressure_data_buffer_sizes:
+        for window_size in window_sizes:
+            if window_size > pressure_data_buffer_size:
+                continue
+            sensor_filter = MovingAverage1D({'raw_data_window_size': window_size, 'filtered_data_window_size': 0,
+                                             'weights': [1.0] * window_size})
+            raw_data = RingBuffer(pressure_data_buffer_size)
+
+            def step(value):
+                raw_data.push(0.0, value)
+                sensor_filter.apply(raw_data, None)
+
+            key = f"MovingAverage1D.apply[buffer={pressure_data_buffer_size},window={window_size}]"
+            results[key] = summarize(timeCalls(step, data))
+        # the recursive filter only uses its last output whatever the smoothing
+        sensor_filter = ExponentialMovingAverage1D({'raw_data_window_size': 1, 'filtered_data_window_size': 1,
+                                                    'alpha': 0.1})
+        raw_data, filtered_data = RingBuffer(pressure_data_buffer_size), RingBuffer(pressure_data_buffer_size)
+
+        def step(value):
+            raw_data.push(0.0, value)
+            filtered_data.push(0.0, sensor_filter.apply(raw_data, filtered_data))
+
+        results[f"ExponentialMovingAverage1D.apply[buffer={pressure_data_buffer_size}]"] = summarize(
+            timeCalls(step, data))
+    return results
+
+
+def benchmarkModel(n_samples: int):
+    data = np.random.normal(101000, 100, n_samples)
+    results = {}
+    model_parameters = {'a': A, 'b': B, 'c': C, 'min_pressure': 30000.0, 'max_pressure': 110000.0,
+                        'max_error': 1e-3}
+    for sensor_model in ['standardAtmosModel', 'lookupTableAtmosModel']:
+        pressure_sensor_model = PressureSensorModels(sensor_model, model_parameters)
+        results[f'{sensor_model}[scalar]'] = summarize(timeCalls(pressure_sensor_model.model, data.tolist()))
+        start = time.perf_counter()
+        pressure_sensor_model.model(data)
+        total_time_s = time.perf_counter() - start
+        results[f'{sensor_model}[array]'] = summarize([total_time_s * 1e9 / n_samples], n_samples, total_time_s)
+    return results
+
+
+def benchmarkSensor(n_samples: int, batch_size: int):
+    sensor = PressureSensor(1, "PressureSensor", 'Pa')
+    readings = list(zip(np.arange(n_samples, dtype=np.float64).tolist(), [101000.0] * n_samples))
+    sensor.sensor_data_queue.extend(readings)
+    results = {'Sensor.publish': summarize(timeCalls(lambda _: sensor.publish(), range(n_samples)))}
+    sensor.sensor_data_queue.extend(readings)
+    latencies_ns = timeCalls(lambda _: sensor.publishMany(batch_size), range(n_samples // batch_size))
+    results[f'Sensor.publishMany[batch={batch_size}]'] = summarize(
+        [latency / batch_size for latency in latencies_ns], n_samples, sum(latencies_ns) / 1e9)
+    return results
+
+
+def benchmarkDataLogger(n_samples: int, log_file: str):
+    results = {}
+    for log_format in ['text', 'binary']:
+        data_logger = DataLogger(log_file, 'w', log_format=log_format)
+        data_logger.start()
+        start = time.perf_counter()
+        latencies_ns = timeCalls(lambda t: data_logger.log(t, 'pressure_sensor', 101000.0),
+                                 np.arange(n_samples, dtype=np.float64).tolist())
+        data_logger.stop()
+        results[f'DataLogger.log[{log_format}]'] = summarize(latencies_ns, n_samples, time.perf_counter() - start)
+    return results
+
+
+def combineRepeats(runs):
+    """
+    combines the results of repeated runs of the benchmarks
+    :param runs: list of results of the runs
+    :return: dictionary with the medians of the results of every benchmark over the runs and their noise, the
+    largest relative spread of the p50 latency and the throughput over the runs
+    """
+    results = {}
+    for name in runs[0]:
+        summaries = [run[name] for run in runs]
+        result = {key: float(np.median([summary[key] for summary in summaries])) for key in summaries[0]}
+        result['noise'] = max(float(np.ptp([summary[key] for summary in summaries])) / result[key]
+                              for key in ['p50_us', 'throughput_per_s'])
+        results[name] = result
+    return results
+
+
+def compareResults(results, baseline, tolerance: float):
+    """
+    compares benchmark results against a baseline. The allowed slowdown of a benchmark is the tolerance plus the
+    larger noise of the results and the baseline, so noisy benchmarks are not flagged on a slow repeat.
+    :param results: results of the benchmark combined with combineRepeats
+    :param baseline: results of a previous run of the benchmark
+    :param tolerance: allowed relative slowdown, eg 0.2 for 20 percent
+    :return: list of names of the benchmarks which are slower than the baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        threshold = 1 + tolerance + max(result.get('noise', 0.0), reference.get('noise', 0.0))
+        if (result['p50_us'] > reference['p50_us'] * threshold or
+                result['throughput_per_s'] < reference['throughput_per_s'] / threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--buffer-sizes', nargs='+', type=int, default=[16, 256, 4096])
+    parser.add_argument('--gps-rates', nargs='+', type=float, default=[0.1, 1.0],
+                        help='fractions of the pressure samples with a gps fix, in place of sample rates')
+    parser.add_argument('--window-sizes', nargs='+', type=int, default=[3, 10])
+    parser.add_argument('--repeats', type=int, default=5, help='number of runs of every benchmark')
+    parser.add_argument('--output', default=os.path.join(LOGS_DIR, 'benchmark_results.json'))
+    parser.add_argument('--baseline', default=None, help='json results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, 'benchmark_log.txt')
+        runs = []
+        for _ in range(args.repeats):
+            results = {}
+            results.update(benchmarkAltimeter(args.samples, args.buffer_sizes, args.gps_rates, log_file))
+            results.update(benchmarkFilter(args.samples, args.buffer_sizes, args.window_sizes))
+            results.update(benchmarkModel(args.samples))
+            results.update(benchmarkSensor(args.samples, batch_size=64))
+            results.update(benchmarkDataLogger(args.samples, log_file))
+            runs.append(results)
+        results = combineRepeats(runs)
+
+    metadata = {'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+                'samples': args.samples, 'repeats': args.repeats, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    with open(args.output, 'w') as f:
+        json.dump({'metadata': metadata, 'results': results}, f, indent=2)
+    for name, result in results.items():
+        print(f"{name:60} p50 {result['p50_us']:9.2f} us  p99 {result['p99_us']:9.2f} us  "
+              f"{result['throughput_per_s']:12.0f} samples/s  noise {result['noise']:6.1%}")
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+        regressions = compareResults(results, baseline, args.tolerance)
+        for name in regressions:
+            print(f"regression: {name}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""
+package with estimators used by the altimeter to compute the bias in the pressure sensor based elevation
+"""
+from collections import deque
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+
+class RunningMean:
+    """
+    Fixed window running mean. The class caches every sample in the window and keeps a running sum which is
+    updated when a sample is pushed and when the oldest sample is evicted, so the cost of an update does not
+    depend on the window size.
+    """
+    def __init__(self, window_size: int):
+        """
+        :param window_size: maximum number of samples used to compute the mean
+        """
+        assert window_size > 0, "window size must be positive"
+        self.window_size = window_size
+        self.values = deque(maxlen=window_size)
+        self.sum = 0.0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def push(self, value: float):
+        """
+        adds a sample to the window, evicting the oldest sample if the window is full.
+        :param value: new sample
+        """
+        if len(self.values) == self.window_size:
+            self.sum -= self.values[0]
+            self.evictions += 1
+        self.values.append(value)
+        self.sum += value
+        if self.evictions == self.window_size:
+            # recompute the sum once per window to stop round off errors from accumulating
+            self.sum = sum(self.values)
+            self.evictions = 0
+
+    @property
+    def mean(self):
+        """
+        :return: mean of the samples in the window, 0.0 if the window is empty
+        """
+        if not self.values:
+            return 0.0
+        return self.sum / len(self.values)
+
+    @property
+    def last(self):
+        """
+        :return: most recent sample in the window
+        """
+        return self.values[-1]
+
+
+def rollingMean(values, window_size: int):
+    """
+    Computes the running mean of every prefix of a series over a fixed window using cumulative sums. The
+    output is the same as pushing the series one sample at a time to a RunningMean.
+    :param values: numpy array of samples ordered from the oldest to the newest
+    :param window_size: maximum number of samples used to compute the mean
+    :return: numpy array of means
+    """
+    assert window_size > 0, "window size must be positive"
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values.copy()
+    # the sums are taken relative to the first sample to limit the round off error on long series
+    offset = values[0]
+    cumulative_sum = np.concatenate(([0.0], np.cumsum(values - offset)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window_size, 0)
+    return offset + (cumulative_sum[end] - cumulative_sum[start]) / (end - start)
+
+
+class MeanDifferenceBiasEstimator:
+    """
+    Estimates the bias in the pressure sensor based elevation as the difference between the mean of the
+    filtered GPS elevations and the mean of the filtered pressure elevations in their respective windows.
+    The bias is updated only when a GPS sample is received.
+    """
+    def __init__(self, pressure_window_size: int, gps_window_size: int):
+        """
+        :param pressure_window_size: number of pressure elevations used for the mean
+        :param gps_window_size: number of gps elevations used for the mean
+        """
+        self.pressure_elevations = RunningMean(pressure_window_size)
+        self.gps_elevations = RunningMean(gps_window_size)
+        self.bias = 0.0
+
+    def updatePressure(self, elevation: float, time_stamp: float = None):
+        """
+        :param elevation: filtered elevation computed from the pressure sensor data
+        :param time_stamp: time stamp of the sample, not used by the estimator
+        """
+        self.pressure_elevations.push(elevation)
+
+    def updateGps(self, elevation: float, time_stamp: float = None):
+        """
+        :param elevation: filtered elevation computed from the GPS sensor data
+        :param time_stamp: time stamp of the sample, not used by the estimator
+        """
+        self.gps_elevations.push(elevation)
+        self.bias = self.gps_elevations.mean - self.pressure_elevations.mean
+
+
+class KalmanBiasEstimator:
+    """
+    Estimates the bias in the pressure sensor based elevation with a two state (elevation, bias) Kalman filter.
+    The pressure elevation is modelled as the elevation minus the bias and the GPS elevation as the elevation,
+    both states follow a random walk which advances with every pressure sample. The bias is held at zero until
+    the first GPS sample, as it can not be observed without GPS data. Every update takes constant time and no
+    samples are kept, and unlike the mean difference the bias follows a drift as soon as GPS samples arrive.
+    """
+    def __init__(self, gps_variance: float, pressure_variance: float = 25.0, elevation_process_variance: float = 1.0,
+                 bias_process_variance: float = 0.1, initial_bias_variance: float = 1e4):
+        """
+        :param gps_variance: variance of the filtered GPS elevations in m^2
+        :param pressure_variance: variance of the filtered pressure elevations in m^2
+        :param elevation_process_variance: growth of the variance of the elevation per pressure sample in m^2
+        :param bias_process_variance: growth of the variance of the bias per pressure sample in m^2
+        :param initial_bias_variance: variance of the bias at the first GPS sample in m^2
+        """
+        assert gps_variance > 0 and pressure_variance > 0, "measurement variances must be positive"
+        assert elevation_process_variance >= 0 and bias_process_variance >= 0, \
+            "process variances must not be negative"
+        self.gps_variance = float(gps_variance)
+        self.pressure_variance = float(pressure_variance)
+        self.elevation_process_variance = float(elevation_process_variance)
+        self.bias_process_variance = float(bias_process_variance)
+        self.initial_bias_variance = float(initial_bias_variance)
+        self.elevation = 0.0
+        self.bias = 0.0
+        self.bias_observed = False
+        # covariance of the state as elevation variance, covariance and bias variance, None until the first sample
+        self.covariance = None
+
+    def initialize(self, elevation: float, elevation_variance: float):
+        """
+        starts the filter from the first sample with a zero bias
+        :param elevation: first elevation sample
+        :param elevation_variance: variance of the first elevation sample
+        """
+        self.elevation = elevation
+        self.bias = 0.0
+        self.covariance = [elevation_variance, 0.0, 0.0]
+
+    def updatePressure(self, elevation: float, time_stamp: float = None):
+        """
+        :param elevation: filtered elevation computed from the pressure sensor data
+        :param time_stamp: time stamp of the sample, not used by the estimator
+        """
+        if self.covariance is None:
+            self.initialize(elevation, self.pressure_variance)
+            return
+        p00, p01, p11 = self.covariance
+        # predict
+        p00 += self.elevation_process_variance
+        if self.bias_observed:
+            p11 += self.bias_process_variance
+        # correct with the measurement elevation - bias
+        innovation = elevation - (self.elevation - self.bias)
+        k0, k1 = p00 - p01, p01 - p11
+        innovation_variance = k0 - k1 + self.pressure_variance
+        k0 /= innovation_variance
+        k1 /= innovation_variance
+        self.elevation += k0 * innovation
+        self.bias += k1 * innovation
+        self.covariance = [p00 - k0 * k0 * innovation_variance, p01 - k0 * k1 * innovation_variance,
+                           p11 - k1 * k1 * innovation_variance]
+
+    def updateGps(self, elevation: float, time_stamp: float = None):
+        """
+        :param elevation: filtered elevation computed from the GPS sensor data
+        :param time_stamp: time stamp of the sample, not used by the estimator
+        """
+        if self.covariance is None:
+            self.initialize(elevation, self.gps_variance)
+            return
+        p00, p01, p11 = self.covariance
+        if not self.bias_observed:
+            p11 = self.initial_bias_variance
+            self.bias_observed = True
+        # correct with the measurement elevation
+        innovation = elevation - self.elevation
+        innovation_variance = p00 + self.gps_variance
+        k0, k1 = p00 / innovation_variance, p01 / innovation_variance
+        self.elevation += k0 * innovation
+        self.bias += k1 * innovation
+        self.covariance = [p00 - k0 * k0 * innovation_variance, p01 - k0 * k1 * innovation_variance,
+                           p11 - k1 * k1 * innovation_variance]
+
+
+class TimeAlignedBiasEstimator:
+    """
+    Estimates the bias in the pressure sensor based elevation as the mean difference between the filtered GPS
+    elevations and the pressure elevations at the same time stamps. The pressure elevations are held in a ring
+    buffer with their time stamps, and the pressure elevation at the time stamp of a GPS sample is interpolated
+    between the two samples around it, which are found with a binary search over the time stamps of the buffer.
+    Unlike the mean difference, the bias does not pick up the change of elevation between the time spans of the
+    pressure and GPS windows, so it is correct with small windows. The bias is updated only when a GPS sample is
+    received.
+    """
+    def __init__(self, pressure_window_size: int, gps_window_size: int):
+        """
+        :param pressure_window_size: number of pressure elevations held to interpolate from
+        :param gps_window_size: number of differences between the gps and pressure elevations used for the mean
+        """
+        self.pressure_elevations = RingBuffer(pressure_window_size)
+        self.differences = RunningMean(gps_window_size)
+        self.bias = 0.0
+
+    def pressureElevationAt(self, time_stamp: float):
+        """
+        :param time_stamp: time stamp, the nearest pressure elevation is used outside the time span of the buffer
+        :return: pressure elevation interpolated at the time stamp
+        """
+        times, elevations = self.pressure_elevations.times, self.pressure_elevations.values
+        i = int(np.searchsorted(times, time_stamp, side='left'))
+        if i == len(times):
+            return float(elevations[-1])
+        if i == 0 or times[i] == time_stamp:
+            return float(elevations[i])
+        weight = (time_stamp - times[i - 1]) / (times[i] - times[i - 1])
+        return float(elevations[i - 1] + weight * (elevations[i] - elevations[i - 1]))
+
+    def updatePressure(self, elevation: float, time_stamp: float):
+        """
+        :param elevation: filtered elevation computed from the pressure sensor data
+        :param time_stamp: time stamp of the sample, the samples are assumed to be in time order
+        """
+        self.pressure_elevations.push(time_stamp, elevation)
+
+    def updateGps(self, elevation: float, time_stamp: float):
+        """
+        :param elevation: filtered elevation computed from the GPS sensor data
+        :param time_stamp: time stamp of the sample
+        """
+        if len(self.pressure_elevations) == 0:
+            # no pressure elevation to compare with yet
+            return
+        self.differences.push(elevation - self.pressureElevationAt(time_stamp))
+        self.bias = self.differences.mean
+
+
+def createBiasEstimator(name: str, pressure_window_size: int, gps_window_size: int, parameters: dict = None):
+    """
+    :param name: name of the bias estimator, 'meanDifference', 'timeAligned' or 'kalman'
+    :param pressure_window_size: number of pressure elevations used by the mean difference and time aligned
+    estimators
+    :param gps_window_size: number of gps elevations used by the mean difference and time aligned estimators
+    :param parameters: keyword arguments of the kalman estimator
+    :return: the bias estimator
+    """
+    assert name in ('meanDifference', 'timeAligned', 'kalman'), f"invalid bias estimator: {name}"
+    if name == 'meanDifference':
+        return MeanDifferenceBiasEstimator(pressure_window_size, gps_window_size)
+    if name == 'timeAligned':
+        return TimeAlignedBiasEstimator(pressure_window_size, gps_window_size)
+    return KalmanBiasEstimator(**(parameters or {}))
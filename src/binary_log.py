@@ -0,0 +1,90 @@
+"""
+package with the fixed width binary format of the sensor data logs. Each sensor is logged to its own file as an
+array of fixed width records, so a log can be memory mapped and its columns used without parsing or copying.
+"""
+import os
+
+import numpy as np
+
+PRESSURE_RECORD_DTYPE = np.dtype([('time', '<f8'), ('pressure', '<f8')])
+GPS_RECORD_DTYPE = np.dtype([('time', '<f8'), ('latitude', '<f8'), ('longitude', '<f8'), ('elevation', '<f8')])
+RECORD_DTYPES = {'pressure_sensor': PRESSURE_RECORD_DTYPE, 'gps_sensor': GPS_RECORD_DTYPE}
+
+
+def binaryLogFileName(file_name: str, sensor_name: str):
+    """
+    :param file_name: name of the log
+    :param sensor_name: name of the sensor
+    :return: name of the file holding the records of the sensor, eg log_pressure_sensor.bin for log.bin
+    """
+    root, extension = os.path.splitext(file_name)
+    return f"{root}_{sensor_name}{extension or '.bin'}"
+
+
+def toRecords(sensor_name: str, data):
+    """
+    converts logged data of a sensor to its binary records
+    :param sensor_name: name of the sensor
+    :param data: list of tuples time stamp, sensor data where the sensor data is a float or a tuple of floats
+    :return: numpy structured array of records
+    """
+    assert sensor_name in RECORD_DTYPES, f"no binary record format for sensor: {sensor_name}"
+    if sensor_name == 'pressure_sensor':
+        return np.array(data, dtype=PRESSURE_RECORD_DTYPE)
+    return np.array([(time_stamp, *value) for time_stamp, value in data], dtype=RECORD_DTYPES[sensor_name])
+
+
+class BinaryLogReader:
+    """
+    Memory mapped reader of the binary log of a sensor. The columns returned by the reader are views into the
+    mapped file, so the data is read from disk on access and never parsed or copied. The records are assumed to
+    be logged in time order, which allows seeking by time stamp with a binary search.
+    """
+    def __init__(self, file_name: str, sensor_name: str):
+        """
+        :param file_name: name of the log as given to the DataLogger
+        :param sensor_name: name of the sensor to read
+        """
+        assert sensor_name in RECORD_DTYPES, f"no binary record format for sensor: {sensor_name}"
+        self.file_name = binaryLogFileName(file_name, sensor_name)
+        self.sensor_name = sensor_name
+        dtype = RECORD_DTYPES[sensor_name]
+        if not os.path.exists(self.file_name) or os.path.getsize(self.file_name) == 0:
+            # the file of a sensor is only created with its first record and an empty file can not be memory mapped
+            self.records = np.zeros(0, dtype=dtype)
+        else:
+            self.records = np.memmap(self.file_name, dtype=dtype, mode='r')
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def times(self):
+        """
+        time stamps of the records as a view into the file
+        """
+        return self.records['time']
+
+    def column(self, name: str):
+        """
+        :param name: name of the column, eg pressure or elevation
+        :return: the column as a view into the file
+        """
+        return self.records[name]
+
+    def seek(self, time_stamp: float):
+        """
+        :param time_stamp: time stamp to seek
+        :return: index of the first record with a time stamp not before the given one
+        """
+        return int(np.searchsorted(self.times, time_stamp, side='left'))
+
+    def between(self, start_time: float = None, end_time: float = None):
+        """
+        :param start_time: earliest time stamp to include, None for the start of the log
+        :param end_time: latest time stamp to include, None for the end of the log
+        :return: records in the time range as a view into the file
+        """
+        start = 0 if start_time is None else self.seek(start_time)
+        end = len(self.records) if end_time is None else int(np.searchsorted(self.times, end_time, side='right'))
+        return self.records[start:end]
@@ -1,50 +1,261 @@
 """
-The script to generate pressure and gps sensor data for testing
+The script to generate pressure and gps sensor data for testing. A scenario is generated in chunks with vectorized
+numpy operations and written as it is generated, so long scenarios (10^8 samples) are produced with bounded memory.
+The scenarios combine an elevation profile (linear or sinusoidal), a bias in the pressure data (linear or a drifting
+random walk) and gps fixes (uniformly random or in bursts), all drawn from a seeded numpy random generator.
 """
-
-import random
+import argparse
+import os
 
 import numpy as np
-import matplotlib.pyplot as plt
 
-def main():
-    pressure_file_name = "../data/pressure_sensor_data.txt"
-    gps_file_name = "../data/gps_sensor_data.txt"
-    ground_truth_file_name = "../data/ground_truth_data.txt"
-    height_samples_pressure = 1000
-    a, b, c = 44330.8, 4946.54, 0.1902632
-    height_samples_gps = 1000
-    x = np.linspace(1, 100, height_samples_pressure)
-    # x = 10 + 190*np.sin(np.linspace(0, np.pi, height_samples_pressure))
-    bias = np.linspace(0, 500, height_samples_pressure)
-    pressure_data = np.power((a - x)/b, 1/c) +  np.random.normal(0, 100, size=len(x)) + bias
-    estimate_height = a - b * np.power(pressure_data, c)
-    plt.figure()
-    plt.plot(x, x, label='true height')
-    plt.plot(x, estimate_height, label='estimated height')
-    plt.legend()
-    plt.show()
-    gps_data = x + np.random.normal(0, 1, size=len(x))
+# parameters of the standard atmospheric pressure model used to generate the pressure data
+A, B, C = 44330.8, 4946.54, 0.1902632
+
+PROFILES = ('linear', 'sinusoidal')
+BIAS_MODELS = ('linear', 'drift')
+GPS_MODELS = ('uniform', 'bursty')
+
+
+def generateSensorData(height, bias, gps_fix_probability=0.1, rng: np.random.Generator = None, gps_fix=None):
+    """
+    generates noisy pressure and gps sensor data for a given elevation profile
+    :param height: numpy array of true elevation in meters per time step
+    :param bias: numpy array of bias in Pa added to the pressure data per time step
+    :param gps_fix_probability: probability of a gps fix at a time step
+    :param rng: random generator, a new unseeded generator if None
+    :param gps_fix: boolean mask of the time steps with a gps fix, drawn with gps_fix_probability if None
+    :return: pressure data in Pa, gps elevation in meters and boolean mask of the time steps with a gps fix
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    pressure_data = np.power((A - height)/B, 1/C) + rng.normal(0, 100, size=len(height)) + bias
+    gps_data = height + rng.normal(0, 1, size=len(height))
+    if gps_fix is None:
+        gps_fix = rng.random(len(height)) < gps_fix_probability
+    return pressure_data, gps_data, gps_fix
+
+
+def heightProfile(profile: str, times, n_samples: int):
+    """
+    :param profile: 'linear' for a climb from 1 m to 100 m or 'sinusoidal' for a 200 m high arc
+    :param times: numpy array of time steps
+    :param n_samples: number of time steps of the scenario
+    :return: true elevation in meters per time step
+    """
+    assert profile in PROFILES, f"invalid profile: {profile}"
+    fraction = times / max(n_samples - 1, 1)
+    if profile == 'linear':
+        return 1 + 99 * fraction
+    return 10 + 190 * np.sin(np.pi * fraction)
+
+
+class BurstyGpsFix:
+    """
+    Two state Markov chain of gps fixes, the fixes come in bursts of burst_length time steps on average while the
+    overall fraction of time steps with a fix is gps_fix_probability. The chain is sampled run by run with
+    geometric run lengths and carried over from chunk to chunk.
+    """
+    def __init__(self, gps_fix_probability: float, burst_length: float, rng: np.random.Generator):
+        assert 0 < gps_fix_probability < 1, "gps fix probability must be in (0, 1)"
+        assert burst_length >= 1, "burst length must be at least 1"
+        self.rng = rng
+        self.mean_run_lengths = {True: burst_length,
+                                 False: burst_length * (1 - gps_fix_probability) / gps_fix_probability}
+        self.fix = bool(rng.random() < gps_fix_probability)
+        self.remaining = int(self.drawRunLengths(self.fix, 1)[0])
+
+    def drawRunLengths(self, fix: bool, n: int):
+        """
+        :param fix: state of the runs
+        :param n: number of runs
+        :return: numpy array of lengths of the runs
+        """
+        return self.rng.geometric(min(1.0, 1 / self.mean_run_lengths[fix]), size=n)
+
+    def sample(self, n: int):
+        """
+        :param n: number of time steps
+        :return: boolean mask of the time steps with a gps fix
+        """
+        states, lengths = [self.fix], [self.remaining]
+        covered = self.remaining
+        while covered < n:
+            # draw enough alternating runs to cover the rest of the chunk in one go on average
+            n_runs = int((n - covered) / sum(self.mean_run_lengths.values())) + 1
+            next_fix = not states[-1]
+            run_lengths = np.column_stack((self.drawRunLengths(next_fix, n_runs),
+                                           self.drawRunLengths(not next_fix, n_runs))).reshape(-1).tolist()
+            states.extend([next_fix, not next_fix] * n_runs)
+            lengths.extend(run_lengths)
+            covered += sum(run_lengths)
+        # keep the runs covering the chunk and carry the rest of the last one to the next chunk
+        ends = np.cumsum(lengths)
+        last = int(np.searchsorted(ends, n))
+        self.fix, self.remaining = states[last], int(ends[last] - n)
+        lengths = lengths[:last + 1]
+        lengths[-1] -= self.remaining
+        if self.remaining == 0:
+            self.fix = not self.fix
+            self.remaining = int(self.drawRunLengths(self.fix, 1)[0])
+        return np.repeat(np.array(states[:last + 1], dtype=bool), lengths)
+
+
+class Scenario:
+    """
+    Iterator over the chunks of a generated scenario, which also holds the number of time steps of the scenario.
+    """
+    def __init__(self, n_samples: int, chunks):
+        """
+        :param n_samples: number of time steps
+        :param chunks: generator of the chunks
+        """
+        self.n_samples = n_samples
+        self.chunks = chunks
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.chunks)
+
+
+def generateScenario(n_samples: int, profile: str = 'linear', bias_model: str = 'linear', gps_model: str = 'uniform',
+                     gps_fix_probability: float = 0.1, burst_length: float = 20.0, max_bias: float = 500.0,
+                     drift_std: float = 1.0, chunk_size: int = 1 << 20, rng: np.random.Generator = None):
+    """
+    generates a scenario chunk by chunk
+    :param n_samples: number of time steps
+    :param profile: elevation profile, 'linear' or 'sinusoidal'
+    :param bias_model: 'linear' for a bias growing from 0 to max_bias Pa or 'drift' for a random walk with steps
+    of standard deviation drift_std Pa
+    :param gps_model: 'uniform' for fixes at random time steps or 'bursty' for fixes in bursts of burst_length
+    time steps on average
+    :param gps_fix_probability: fraction of time steps with a gps fix
+    :param burst_length: mean number of time steps of a burst of gps fixes
+    :param max_bias: bias in Pa at the end of the linear bias
+    :param drift_std: standard deviation in Pa of the steps of the drifting bias
+    :param chunk_size: number of time steps per chunk
+    :param rng: random generator, a new unseeded generator if None
+    :return: Scenario iterating over tuples time steps, true elevation, pressure data, gps elevation and gps fix
+    mask
+    """
+    assert n_samples >= 0 and chunk_size > 0, "number of samples and chunk size must be positive"
+    assert profile in PROFILES, f"invalid profile: {profile}"
+    assert bias_model in BIAS_MODELS, f"invalid bias model: {bias_model}"
+    assert gps_model in GPS_MODELS, f"invalid gps model: {gps_model}"
+    assert gps_model != 'uniform' or 0 <= gps_fix_probability <= 1, "gps fix probability must be in [0, 1]"
+    rng = np.random.default_rng() if rng is None else rng
+    bursty_gps_fix = BurstyGpsFix(gps_fix_probability, burst_length, rng) if gps_model == 'bursty' else None
+    return Scenario(n_samples, scenarioChunks(n_samples, profile, bias_model, gps_fix_probability, bursty_gps_fix,
+                                              max_bias, drift_std, chunk_size, rng))
+
+
+def scenarioChunks(n_samples: int, profile: str, bias_model: str, gps_fix_probability: float, bursty_gps_fix,
+                   max_bias: float, drift_std: float, chunk_size: int, rng: np.random.Generator):
+    """
+    :param bursty_gps_fix: BurstyGpsFix drawing the gps fixes, None to draw them uniformly
+    The other parameters are the ones of generateScenario.
+    :return: generator of the chunks of a scenario
+    """
+    last_bias = 0.0
+    for start in range(0, n_samples, chunk_size):
+        times = np.arange(start, min(start + chunk_size, n_samples))
+        height = heightProfile(profile, times, n_samples)
+        if bias_model == 'linear':
+            bias = max_bias * times / max(n_samples - 1, 1)
+        else:
+            bias = last_bias + np.cumsum(rng.normal(0, drift_std, size=len(times)))
+            last_bias = bias[-1]
+        gps_fix = None if bursty_gps_fix is None else bursty_gps_fix.sample(len(times))
+        yield times, height, *generateSensorData(height, bias, gps_fix_probability, rng, gps_fix)
+
+
+def writeScenario(scenario: Scenario, output_dir: str, output_format: str = 'text'):
+    """
+    writes a scenario to the data files read by the simulation, the files are written chunk by chunk
+    :param scenario: scenario as generated by generateScenario
+    :param output_dir: directory of the data files
+    :param output_format: 'text' for the comma separated data files or 'npy' for numpy files of the same arrays
+    with nan for missing data, which can be memory mapped with np.load without parsing and replayed with the
+    sensors of replay_sensor
+    """
+    assert output_format in ('text', 'npy'), f"invalid output format: {output_format}"
+    file_names = [os.path.join(output_dir, f"{name}.{'txt' if output_format == 'text' else 'npy'}")
+                  for name in ('ground_truth_data', 'pressure_sensor_data', 'gps_sensor_data')]
+    if output_format == 'npy':
+        arrays = [np.lib.format.open_memmap(file_name, mode='w+', dtype=np.float64, shape=(scenario.n_samples, n_columns))
+                  for file_name, n_columns in zip(file_names, (2, 2, 4))]
+        for times, height, pressure_data, gps_data, gps_fix in scenario:
+            rows = slice(times[0], times[-1] + 1)
+            gps_elevation = np.where(gps_fix, gps_data, np.nan)
+            arrays[0][rows] = np.column_stack((times, height))
+            arrays[1][rows] = np.column_stack((times, pressure_data))
+            arrays[2][rows] = np.column_stack((times, gps_elevation, gps_elevation, gps_elevation))
+        for array in arrays:
+            array.flush()
+        return
+    files = [open(file_name, 'w', buffering=1 << 20) for file_name in file_names]
+    try:
+        for times, height, pressure_data, gps_data, gps_fix in scenario:
+            files[0].write("".join([f"{t},{h}\n" for t, h in zip(times.tolist(), height.tolist())]))
+            files[1].write("".join([f"{t},{p}\n" for t, p in zip(times.tolist(), pressure_data.tolist())]))
+            files[2].write("".join([f"{t},{g},{g},{g}\n" if fix else f"{t},None\n"
+                                    for t, g, fix in zip(times.tolist(), gps_data.tolist(), gps_fix.tolist())]))
+    finally:
+        for file in files:
+            file.close()
+
+
+def plotScenario(output_file: str, n_samples: int, **scenario_parameters):
+    """
+    saves a plot of the start of a scenario to a file, the plot is not shown so it can run headless
+    :param output_file: image file name
+    :param n_samples: number of time steps to plot
+    :param scenario_parameters: parameters of generateScenario
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    times, height, pressure_data, gps_data, gps_fix = next(generateScenario(n_samples, chunk_size=n_samples,
+                                                                            **scenario_parameters))
     plt.figure()
-    plt.plot(x, x, label='true height')
-    plt.plot(x, gps_data, label='estimated gps height')
+    plt.plot(times, height, label='true height')
+    plt.plot(times, A - B * np.power(pressure_data, C), label='estimated height')
+    plt.scatter(times[gps_fix], gps_data[gps_fix], s=4, color='g', label='estimated gps height')
+    plt.xlabel("time steps")
     plt.legend()
-    plt.show()
-    with open(ground_truth_file_name, "w") as f:
-        for i in range(len(x)):
-            f.write(str(i) + ',' + str(x[i]) + '\n')
+    plt.savefig(output_file)
+    plt.close()
+
 
-    with open(pressure_file_name, 'w') as f:
-        for i in range(len(x)):
-            f.write(str(i) + ',' + str(pressure_data[i]) + '\n')
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--profile', choices=PROFILES, default='linear')
+    parser.add_argument('--bias', choices=BIAS_MODELS, default='linear')
+    parser.add_argument('--gps', choices=GPS_MODELS, default='uniform')
+    parser.add_argument('--gps-fix-probability', type=float, default=0.1)
+    parser.add_argument('--burst-length', type=float, default=20.0)
+    parser.add_argument('--max-bias', type=float, default=500.0)
+    parser.add_argument('--drift-std', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1 << 20)
+    parser.add_argument('--format', choices=('text', 'npy'), default='text')
+    parser.add_argument('--output-dir', default='../data')
+    parser.add_argument('--plot', default=None, help='image file to save a plot of the first 1000 samples to')
+    args = parser.parse_args()
 
-    with open(gps_file_name, 'w') as f:
-        for i in range(len(x)):
-            if random.random() < 0.1:
-                f.write(str(i) + ',' + str(gps_data[i]) + ',' + str(gps_data[i]) + ',' + str(gps_data[i]) + '\n')
-            else:
-                f.write(str(i) + ',' + "None" + '\n')
+    scenario_parameters = {'profile': args.profile, 'bias_model': args.bias, 'gps_model': args.gps,
+                           'gps_fix_probability': args.gps_fix_probability, 'burst_length': args.burst_length,
+                           'max_bias': args.max_bias, 'drift_std': args.drift_std}
+    os.makedirs(args.output_dir, exist_ok=True)
+    scenario = generateScenario(args.samples, chunk_size=args.chunk_size, rng=np.random.default_rng(args.seed),
+                                **scenario_parameters)
+    writeScenario(scenario, args.output_dir, args.format)
+    if args.plot is not None:
+        plotScenario(args.plot, min(args.samples, 1000), rng=np.random.default_rng(args.seed), **scenario_parameters)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
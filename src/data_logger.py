@@ -1,43 +1,177 @@
+import os
+import queue
+import threading
+import time
+
+from binary_log import RECORD_DTYPES, binaryLogFileName, toRecords
+
+# marks the end of the data in the queue of the writer thread
+STOP_WRITER = object()
+
 
 class DataLogger:
     """
-    The class to handle the data logging for altimeter
+    The class to handle the data logging for altimeter. The data is passed through a bounded queue to a background
+    writer thread, which writes it to the log file in batches, so the memory used does not grow with the length of
+    the run and stopping the logger only writes the data still in the queue. The data is either written as text
+    lines or, for faster replay, as fixed width binary records with one file per sensor (see binary_log).
     """
-    def __init__(self, file_name, mode='a'):
+    def __init__(self, file_name, mode='a', max_queue_size=10000, flush_count=1000, flush_bytes=1 << 20,
+                 flush_interval=1.0, max_file_bytes=None, backup_count=0, log_format='text'):
         """
         :param file_name: The name of the log file.
         :param mode: The mode to open the file in ('a' for append, 'w' for write).
+        :param max_queue_size: maximum number of data waiting to be written, log blocks while the queue is full.
+        :param flush_count: the file is flushed after this many data are written.
+        :param flush_bytes: the file is flushed after this many bytes are written.
+        :param flush_interval: maximum time in seconds between flushes of the file.
+        :param max_file_bytes: the log file is rotated once it is larger than this many bytes, None to disable
+        rotation. As in logging.handlers.RotatingFileHandler, the file is not rotated if backup_count is 0.
+        :param backup_count: number of rotated log files to keep, named file_name.1 to file_name.backup_count
+        :param log_format: 'text' to write text lines or 'binary' to write binary records
         """
+        assert log_format in ('text', 'binary'), f"invalid log format: {log_format}"
         self.file_name = file_name
         self.mode = mode
-        self.file = None
-        self.data = []
+        self.max_queue_size = max_queue_size
+        self.flush_count = flush_count
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.backup_count = backup_count
+        self.log_format = log_format
+        self.files = {}
+        self.data_queue = queue.Queue(maxsize=max_queue_size)
+        self.writer = None
+        self.writer_error = None
+        # set by stop, log refuses new data from then on so no data is queued after the end of the data
+        self.stopping = False
+        self.stop_lock = threading.Lock()
 
     def start(self):
         """
-        Opens the file in the specified mode.
+        Opens the file in the specified mode and starts the writer thread. Does nothing if the logger is
+        already started. The binary files of the sensors are opened with their first record, so in 'w' mode the
+        files of all the sensors are removed first, a sensor logging nothing does not leave the data of a previous
+        run behind.
         """
-        self.file = open(self.file_name, self.mode)
+        if self.writer is not None:
+            return
+        if self.log_format == 'text':
+            self.files[self.file_name] = open(self.file_name, self.mode)
+        elif self.mode == 'w':
+            for sensor_name in RECORD_DTYPES:
+                file_name = binaryLogFileName(self.file_name, sensor_name)
+                if os.path.exists(file_name):
+                    os.remove(file_name)
+        self.writer_error = None
+        self.stopping = False
+        self.writer = threading.Thread(target=self.writeData, name=f"DataLogger({self.file_name})", daemon=True)
+        self.writer.start()
 
     def log(self, time_stamp, sensor_name, data):
         """
-        saves the data internally to be written to the file.
+        queues the data to be written to the file by the writer thread.
         """
-        self.data.append((time_stamp, sensor_name, data))
+        with self.stop_lock:
+            if self.writer is None:
+                raise ValueError("File is not open. Please call start() first.")
+            if self.stopping:
+                raise ValueError("Logger is stopping, no more data can be logged.")
+            self.data_queue.put((time_stamp, sensor_name, data))
+
+    def writeData(self):
+        """
+        Routine of the writer thread. Takes the queued data in batches, writes them to the file and flushes the
+        file according to the flush policy until the logger is stopped.
+        """
+        unflushed_count, unflushed_bytes, last_flush_time = 0, 0, time.monotonic()
+        stopped = False
+        try:
+            while not stopped:
+                batch = []
+                try:
+                    data = self.data_queue.get(timeout=self.flush_interval)
+                    while True:
+                        if data is STOP_WRITER:
+                            # only the data queued before the end of the data is written
+                            stopped = True
+                            break
+                        batch.append(data)
+                        if len(batch) >= self.flush_count:
+                            break
+                        data = self.data_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                if batch:
+                    unflushed_count += len(batch)
+                    unflushed_bytes += self.writeBatch(batch)
+                if (unflushed_count >= self.flush_count or unflushed_bytes >= self.flush_bytes or
+                        (unflushed_count and time.monotonic() - last_flush_time >= self.flush_interval)):
+                    for file in self.files.values():
+                        file.flush()
+                    unflushed_count, unflushed_bytes, last_flush_time = 0, 0, time.monotonic()
+                if self.max_file_bytes is not None and self.backup_count > 0:
+                    for file_name, file in list(self.files.items()):
+                        if file.tell() >= self.max_file_bytes:
+                            self.rotate(file_name)
+        except Exception as error:
+            self.writer_error = error
+            # keep draining the queue so the producer is not blocked forever
+            while not stopped:
+                stopped = self.data_queue.get() is STOP_WRITER
+
+    def writeBatch(self, batch):
+        """
+        Writes a batch of data to the log files in the log format.
+        :param batch: list of tuples time stamp, sensor name, data
+        :return: number of bytes written
+        """
+        if self.log_format == 'text':
+            lines = "".join([f"[{time_stamp}] {sensor_name} {data}\n" for time_stamp, sensor_name, data in batch])
+            self.files[self.file_name].write(lines)
+            return len(lines)
+        sensor_data = {}
+        for time_stamp, sensor_name, data in batch:
+            sensor_data.setdefault(sensor_name, []).append((time_stamp, data))
+        written_bytes = 0
+        for sensor_name, data in sensor_data.items():
+            file_name = binaryLogFileName(self.file_name, sensor_name)
+            if file_name not in self.files:
+                self.files[file_name] = open(file_name, self.mode + 'b')
+            records = toRecords(sensor_name, data).tobytes()
+            self.files[file_name].write(records)
+            written_bytes += len(records)
+        return written_bytes
+
+    def rotate(self, file_name):
+        """
+        Closes a log file, renames it and the older rotated files by increasing their suffix by one and opens
+        a new log file. The oldest file is deleted once there are backup_count rotated files, backup_count
+        must be positive.
+        :param file_name: name of the log file
+        """
+        assert self.backup_count > 0, "rotating without backup files would delete the logged data"
+        self.files[file_name].close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{file_name}.{i}"):
+                os.replace(f"{file_name}.{i}", f"{file_name}.{i + 1}")
+        os.replace(file_name, f"{file_name}.1")
+        self.files[file_name] = open(file_name, 'w' if self.log_format == 'text' else 'wb')
 
     def stop(self):
         """
-        Write data to a log file and close it
-        """
-        for time_stamp, sensor_name, data in self.data:
-            data = str(data)
-            if self.file is not None:
-                self.file.write(f"[{time_stamp}] {sensor_name} {data}\n")
-                self.file.flush()
-            else:
-                 raise ValueError("File is not open. Please call start() first.")
-        if self.file is not None:
-            self.file.close()
-            self.file = None
-        else:
+        Waits for the writer thread to write the queued data to the log file and closes it
+        """
+        if self.writer is None:
             raise ValueError("File is not open or already closed.")
+        with self.stop_lock:
+            self.stopping = True
+        self.data_queue.put(STOP_WRITER)
+        self.writer.join()
+        self.writer = None
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+        if self.writer_error is not None:
+            raise self.writer_error
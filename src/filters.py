@@ -1,6 +1,10 @@
 from abc import abstractmethod
 from typing import Any
 
+import numpy as np
+
+from ring_buffer import RingBuffer
+
 class Filters:
     """
     A generic filters class. Any new filters should inherit from this class.
@@ -9,17 +13,50 @@ class Filters:
         self.filter_parameters = filter_parameters
         assert "raw_data_window_size" in self.filter_parameters
         assert "filtered_data_window_size" in self.filter_parameters
+        self.reset()
 
     @abstractmethod
     def apply(self, raw_data, filtered_data):
         """
         The method applies the filters to the raw data.
-        :param raw_data: sequence of raw data, the recent data is assumed to be at its end
-        :param filtered_data: sequence of filtered data
+        :param raw_data: sequence of raw data such as a RingBuffer, the recent data is assumed to be at its end
+        :param filtered_data: sequence of filtered data such as a RingBuffer
         :return: filtered data point
         """
         pass
 
+    def applyBatch(self, raw_data):
+        """
+        The method applies the filter to a whole series of raw data at once. The output is the same as calling
+        applyIncremental on every data point of the series starting from a reset filter. Filters should override
+        this method with a vectorized implementation.
+        :param raw_data: numpy array of raw data ordered from the oldest to the newest
+        :return: numpy array of filtered data
+        """
+        self.reset()
+        output = np.array([self.applyIncremental(data) for data in np.asarray(raw_data, dtype=np.float64)])
+        self.reset()
+        return output
+
+    def applyIncremental(self, data: float):
+        """
+        The method adds a raw data point to the internal windows of the filter and filters it, so the caller
+        does not need to hold the history of the data.
+        :param data: newest raw data point
+        :return: filtered data point
+        """
+        self.raw_window.push(0.0, data)
+        output = float(self.apply(self.raw_window, self.filtered_window))
+        self.filtered_window.push(0.0, output)
+        return output
+
+    def reset(self):
+        """
+        clears the internal windows used by applyIncremental
+        """
+        self.raw_window = RingBuffer(max(1, self.filter_parameters["raw_data_window_size"]))
+        self.filtered_window = RingBuffer(max(1, self.filter_parameters["filtered_data_window_size"]))
+
 class MovingAverage1D(Filters):
     """
     The class implements the moving average filter. The additional parameters for the class is
@@ -34,10 +71,177 @@ class MovingAverage1D(Filters):
         for weight in self.filter_parameters["weights"]:
             assert type(weight) == float, "Weights parameter must be a float"
         self.weights = [w / sum(self.filter_parameters["weights"]) for w in self.filter_parameters["weights"]]
+        # the first weight is applied to the most recent data, so the reversed weights line up with the data
+        # ordered from the oldest to the newest
+        self.reversed_weights = np.array(self.weights[::-1])
 
     def apply(self, raw_data, filtered_data):
         if len(raw_data) < len(self.weights):
             return raw_data[-1]
-        reversed_raw_data = list(reversed(raw_data))
-        output = sum([w * d for w, d in zip(self.weights, reversed_raw_data)])
-        return output
\ No newline at end of file
+        # only the most recent samples within the filter window are needed
+        recent_raw_data = np.asarray(raw_data[-len(self.weights):], dtype=np.float64)
+        return float(np.dot(self.reversed_weights, recent_raw_data))
+
+    def applyBatch(self, raw_data):
+        raw_data = np.asarray(raw_data, dtype=np.float64)
+        if len(raw_data) == 0:
+            return raw_data.copy()
+        output = np.convolve(raw_data, self.weights)[:len(raw_data)]
+        # the filter passes the raw data through until its window is full
+        output[:len(self.weights) - 1] = raw_data[:len(self.weights) - 1]
+        return output
+
+def linearRecurrence(inputs, feedback_weights, initial_outputs, block_size=128):
+    """
+    Solves the recurrence y[n] = u[n] - a[0] * y[n - 1] - ... - a[m - 1] * y[n - m] for a whole series at once.
+    The series is split into blocks and the output of every block is the response to its inputs plus the
+    response to the last outputs of the previous block, both computed with matrix products, so only the m
+    outputs carried from block to block are computed in a python loop.
+    :param inputs: numpy array of inputs u
+    :param feedback_weights: list of the m feedback weights a
+    :param initial_outputs: list of the m outputs before the series ordered from the oldest to the newest
+    :param block_size: number of samples per block
+    :return: numpy array of outputs y
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    order, n = len(feedback_weights), len(inputs)
+    if n == 0:
+        return inputs.copy()
+    # state transition of the recurrence, the state holds the last m outputs from the newest to the oldest
+    transition = np.zeros((order, order))
+    transition[0] = -np.asarray(feedback_weights, dtype=np.float64)
+    transition[1:, :-1] = np.eye(order - 1)
+    powers = [np.eye(order)]
+    for _ in range(block_size):
+        powers.append(transition @ powers[-1])
+    # response of the outputs of a block to the state before the block and to the inputs of the block
+    state_response = np.array([(transition @ powers[i])[0] for i in range(block_size)])
+    impulse_response = np.array([powers[i][0, 0] for i in range(block_size)])
+    lags = np.subtract.outer(np.arange(block_size), np.arange(block_size))
+    input_response = np.where(lags >= 0, impulse_response[np.maximum(lags, 0)], 0.0)
+    # response of the state after a block to the inputs of the block
+    state_input_response = np.array([powers[block_size - 1 - k][:, 0] for k in range(block_size)]).T
+
+    n_blocks = -(-n // block_size)
+    blocks = np.zeros(n_blocks * block_size)
+    blocks[:n] = inputs
+    blocks = blocks.reshape(n_blocks, block_size)
+    block_state_inputs = blocks @ state_input_response.T
+    states = np.empty((n_blocks, order))
+    state = np.asarray(initial_outputs[::-1], dtype=np.float64)
+    block_transition = powers[block_size]
+    for i in range(n_blocks):
+        states[i] = state
+        state = block_transition @ state + block_state_inputs[i]
+    return (blocks @ input_response.T + states @ state_response.T).reshape(-1)[:n]
+
+
+class IIRFilter1D(Filters):
+    """
+    The class implements a recursive (infinite impulse response) filter
+    y[n] = b[0] * x[n] + ... + b[k] * x[n - k] - a[0] * y[n - 1] - ... - a[m - 1] * y[n - m]
+    on the raw data x and the filtered data y. Each output only needs the last few raw and filtered data, so the
+    cost of an update does not depend on how much the filter smooths. The raw data is passed through until
+    enough raw and filtered data are available. Subclasses set the feedforward weights b and the feedback
+    weights a, the raw and filtered data window sizes must match their lengths.
+    """
+    def __init__(self, filter_parameters: dict[str, Any], feedforward_weights, feedback_weights):
+        super().__init__(filter_parameters)
+        assert self.filter_parameters["raw_data_window_size"] == len(feedforward_weights), \
+            f"raw_data_window_size must be {len(feedforward_weights)}"
+        assert self.filter_parameters["filtered_data_window_size"] == len(feedback_weights), \
+            f"filtered_data_window_size must be {len(feedback_weights)}"
+        self.feedforward_weights = [float(w) for w in feedforward_weights]
+        self.feedback_weights = [float(w) for w in feedback_weights]
+        # number of samples passed through before the filter starts
+        self.warm_up_size = max(len(self.feedforward_weights) - 1, len(self.feedback_weights))
+
+    def apply(self, raw_data, filtered_data):
+        if len(raw_data) < len(self.feedforward_weights) or len(filtered_data) < len(self.feedback_weights):
+            return raw_data[-1]
+        output = 0.0
+        for i, weight in enumerate(self.feedforward_weights):
+            output += weight * raw_data[-1 - i]
+        for i, weight in enumerate(self.feedback_weights):
+            output -= weight * filtered_data[-1 - i]
+        return float(output)
+
+    def applyBatch(self, raw_data):
+        raw_data = np.asarray(raw_data, dtype=np.float64)
+        output = raw_data.copy()
+        if len(raw_data) <= self.warm_up_size:
+            return output
+        inputs = np.convolve(raw_data, self.feedforward_weights)[self.warm_up_size:len(raw_data)]
+        output[self.warm_up_size:] = linearRecurrence(inputs, self.feedback_weights,
+                                                      raw_data[self.warm_up_size - len(self.feedback_weights):
+                                                               self.warm_up_size])
+        return output
+
+
+class ExponentialMovingAverage1D(IIRFilter1D):
+    """
+    The class implements the exponential moving average y[n] = y[n - 1] + alpha * (x[n] - y[n - 1]). The
+    additional parameter for the class is the smoothing factor alpha in (0, 1], smaller values smooth more.
+    The raw and filtered data window sizes must be 1.
+    """
+    def __init__(self, filter_parameters: dict[str, Any]):
+        assert "alpha" in filter_parameters, "alpha parameter not found"
+        alpha = float(filter_parameters["alpha"])
+        assert 0.0 < alpha <= 1.0, "alpha must be in (0, 1]"
+        self.alpha = alpha
+        super().__init__(filter_parameters, [alpha], [alpha - 1.0])
+
+
+class BiquadLowPass1D(IIRFilter1D):
+    """
+    The class implements the second order low pass filter of the "Audio EQ Cookbook" by R. Bristow-Johnson. The
+    additional parameters for the class are the cutoff_frequency and the sample_frequency in Hz and the
+    quality_factor, 0.7071 for a Butterworth response. The raw and filtered data window sizes must be 3 and 2.
+    """
+    def __init__(self, filter_parameters: dict[str, Any]):
+        for name in ("cutoff_frequency", "sample_frequency", "quality_factor"):
+            assert name in filter_parameters, f"{name} parameter not found"
+        cutoff_frequency = float(filter_parameters["cutoff_frequency"])
+        sample_frequency = float(filter_parameters["sample_frequency"])
+        quality_factor = float(filter_parameters["quality_factor"])
+        assert 0.0 < cutoff_frequency < sample_frequency / 2, "cutoff frequency must be below the Nyquist frequency"
+        assert quality_factor > 0.0, "quality factor must be positive"
+        w0 = 2 * np.pi * cutoff_frequency / sample_frequency
+        alpha = np.sin(w0) / (2 * quality_factor)
+        a0 = 1 + alpha
+        b = (1 - np.cos(w0)) / 2
+        super().__init__(filter_parameters, [b / a0, 2 * b / a0, b / a0],
+                         [-2 * np.cos(w0) / a0, (1 - alpha) / a0])
+
+
+class AlphaBeta1D(IIRFilter1D):
+    """
+    The class implements the alpha-beta filter, which tracks the position and the velocity of the data:
+    x[n] = x[n - 1] + dt * v[n - 1] + alpha * r[n] and v[n] = v[n - 1] + beta / dt * r[n] with the residual
+    r[n] = z[n] - x[n - 1] - dt * v[n - 1]. The filtered position only depends on the past positions, so it is
+    computed as the equivalent second order recursive filter. The additional parameters for the class are alpha
+    and beta with 0 < alpha <= 1 and 0 < beta <= 4 - 2 * alpha. The raw and filtered data window sizes must be 2.
+    """
+    def __init__(self, filter_parameters: dict[str, Any]):
+        assert "alpha" in filter_parameters, "alpha parameter not found"
+        assert "beta" in filter_parameters, "beta parameter not found"
+        alpha, beta = float(filter_parameters["alpha"]), float(filter_parameters["beta"])
+        assert 0.0 < alpha <= 1.0 and 0.0 < beta <= 4.0 - 2.0 * alpha, "alpha and beta must give a stable filter"
+        self.alpha, self.beta = alpha, beta
+        super().__init__(filter_parameters, [alpha, beta - alpha], [alpha + beta - 2.0, 1.0 - alpha])
+
+
+# filters which can be created from their configuration, see createFilter
+FILTER_TYPES = {'MovingAverage1D': MovingAverage1D, 'ExponentialMovingAverage1D': ExponentialMovingAverage1D,
+                'BiquadLowPass1D': BiquadLowPass1D, 'AlphaBeta1D': AlphaBeta1D}
+
+
+def createFilter(filter_parameters: dict[str, Any]):
+    """
+    :param filter_parameters: parameters of the filter, eg loaded from a toml file. The filter is chosen by the
+    filter_type parameter, MovingAverage1D if it is missing
+    :return: the filter
+    """
+    filter_type = filter_parameters.get("filter_type", "MovingAverage1D")
+    assert filter_type in FILTER_TYPES, f"invalid filter type: {filter_type}"
+    return FILTER_TYPES[filter_type](filter_parameters)
@@ -1,6 +1,8 @@
 import time
 from random import random
 
+import numpy as np
+
 from sensor import Sensor, GPS_SENSOR_TYPE
 
 class GPSSensor(Sensor):
@@ -12,4 +14,20 @@ class GPSSensor(Sensor):
         callback function for pressure sensor reading and pushes to data queue
         in the given unit
         """
-        self.sensor_data_queue.put(data)
\ No newline at end of file
+        self.sensor_data_queue.append(data)
+        self.notify()
+
+    def readCallbackMany(self, times, values):
+        """
+        callback function for a batch of gps sensor readings and pushes them to data queue
+        in the given unit
+        :param times: sequence of time stamps
+        :param values: sequence of latitude, longitude & elevation coordinates, None for time stamps without a fix
+        """
+        if isinstance(times, np.ndarray):
+            times = times.tolist()
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        self.sensor_data_queue.extend((time_stamp, None) if value is None else (time_stamp, *value)
+                                      for time_stamp, value in zip(times, values))
+        self.notify()
@@ -0,0 +1,130 @@
+"""
+package with the instrumentation used to collect metrics of the altimeter hot path
+"""
+import json
+import logging
+import time
+
+logger = logging.getLogger('altimeter')
+
+
+class StageTimer:
+    """
+    Accumulates the latencies of the calls of one stage of the altimeter. The latencies are kept in a histogram
+    with power of two buckets, so recording a call takes constant time and memory.
+    """
+    __slots__ = ('count', 'total_ns', 'max_ns', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        # bucket i counts the latencies in [2**(i-1), 2**i) nanoseconds
+        self.histogram = [0] * 64
+
+    def record(self, latency_ns: int):
+        """
+        :param latency_ns: latency of a call in nanoseconds
+        """
+        self.count += 1
+        self.total_ns += latency_ns
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+        self.histogram[latency_ns.bit_length()] += 1
+
+    def percentile(self, q: float):
+        """
+        :param q: percentile between 0 and 100
+        :return: upper bound in nanoseconds of the bucket holding the percentile
+        """
+        rank = q / 100 * self.count
+        cumulative_count = 0
+        for bucket, bucket_count in enumerate(self.histogram):
+            cumulative_count += bucket_count
+            if cumulative_count >= rank and cumulative_count > 0:
+                return min(2 ** bucket, self.max_ns)
+        return 0
+
+    def snapshot(self):
+        """
+        :return: dictionary with the number of calls, the total time and the latency statistics of the stage
+        """
+        return {'count': self.count, 'total_ms': self.total_ns / 1e6,
+                'mean_us': self.total_ns / self.count / 1e3 if self.count else 0.0,
+                'p50_us': self.percentile(50) / 1e3, 'p99_us': self.percentile(99) / 1e3,
+                'max_us': self.max_ns / 1e3,
+                'histogram_ns': {2 ** bucket: n for bucket, n in enumerate(self.histogram) if n}}
+
+
+class AltimeterMetrics:
+    """
+    Counters and per stage timers of an altimeter. The altimeter only calls into this class when metrics are
+    enabled, so the instrumentation costs nothing when it is disabled.
+    """
+    def __init__(self, dump_interval: float = None):
+        """
+        :param dump_interval: interval in seconds between dumps of the metrics to the 'altimeter' logger of the
+        logging module, None to never dump
+        """
+        self.dump_interval = dump_interval
+        self.counters = {}
+        self.stages = {}
+        self.last_dump_time = time.monotonic()
+
+    def count(self, name: str, n: int = 1):
+        """
+        :param name: name of the counter
+        :param n: value to add to the counter
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def stageTimer(self, stage: str):
+        """
+        :param stage: name of the stage
+        :return: timer of the stage, created on first use
+        """
+        stage_timer = self.stages.get(stage)
+        if stage_timer is None:
+            stage_timer = self.stages[stage] = StageTimer()
+        return stage_timer
+
+    def record(self, stage: str, latency_ns: int):
+        """
+        :param stage: name of the stage
+        :param latency_ns: latency in nanoseconds to record under the stage
+        """
+        self.stageTimer(stage).record(latency_ns)
+
+    def timed(self, stage: str, function):
+        """
+        wraps a function so the latency of every call is recorded under the given stage
+        :param stage: name of the stage
+        :param function: function to time
+        :return: timed function
+        """
+        stage_timer = self.stageTimer(stage)
+        clock = time.perf_counter_ns
+
+        def timed_function(*args):
+            start = clock()
+            result = function(*args)
+            stage_timer.record(clock() - start)
+            return result
+        return timed_function
+
+    def snapshot(self):
+        """
+        :return: dictionary with the counters and the statistics of every stage
+        """
+        return {'counters': dict(self.counters),
+                'stages': {stage: stage_timer.snapshot() for stage, stage_timer in self.stages.items()}}
+
+    def dumpIfDue(self, snapshot_function):
+        """
+        dumps the metrics to the logger if the dump interval elapsed since the last dump
+        :param snapshot_function: function returning the snapshot to dump
+        """
+        if self.dump_interval is None or time.monotonic() - self.last_dump_time < self.dump_interval:
+            return
+        self.last_dump_time = time.monotonic()
+        logger.info("altimeter metrics %s", json.dumps(snapshot_function()))
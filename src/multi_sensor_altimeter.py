@@ -0,0 +1,262 @@
+"""
+package with an altimeter which fuses the data of several pressure sensors and gps sensors, eg redundant
+barometers. The readings of the sensors are merged by time stamp and the readings of the same time stamp are fused
+with inverse variance weights before they are processed like the readings of a single sensor.
+"""
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from altimeter import Altimeter
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import Filters
+from data_logger import DataLogger
+
+logger = logging.getLogger('altimeter')
+
+
+class SensorStream:
+    """
+    Readings of one sensor which were read but not processed yet, held as numpy arrays in time order.
+    """
+    __slots__ = ('sensor', 'variance', 'times', 'values', 'last_time', 'last_active_time', 'failed')
+
+    def __init__(self, sensor, variance: float, n_values: int):
+        """
+        :param sensor: sensor object
+        :param variance: variance of the readings of the sensor
+        :param n_values: number of values of a reading
+        """
+        assert variance > 0, "sensor variance must be positive"
+        self.sensor = sensor
+        self.variance = variance
+        self.times = np.empty(0)
+        self.values = np.empty((0, n_values))
+        # time stamp of the newest reading and wall clock time of the last read returning data
+        self.last_time = -np.inf
+        self.last_active_time = time.time()
+        self.failed = False
+
+    def push(self, batch):
+        """
+        :param batch: list of readings as returned by publishMany, None for readings without data
+        """
+        readings = [reading for reading in batch if reading]
+        if readings:
+            readings = np.array(readings, dtype=np.float64)
+            self.times = np.concatenate((self.times, readings[:, 0]))
+            self.values = np.concatenate((self.values, readings[:, 1:]))
+            self.last_time = self.times[-1]
+
+    def release(self, watermark: float):
+        """
+        :param watermark: time stamp up to which the readings are released
+        :return: time stamps and values of the readings not after the watermark
+        """
+        n = int(np.searchsorted(self.times, watermark, side='right'))
+        times, values = self.times[:n], self.values[:n]
+        self.times, self.values = self.times[n:], self.values[n:]
+        return times, values
+
+
+def fuseReadings(times, values, variances, time_resolution: float = None):
+    """
+    merges the readings of several sensors by time stamp and fuses the readings with the same time stamp with
+    inverse variance weights
+    :param times: list of numpy arrays of time stamps in increasing order, one per sensor
+    :param values: list of numpy arrays of shape (readings, values), one per sensor
+    :param variances: list of variances of the sensors
+    :param time_resolution: the time stamps are rounded to multiples of the resolution before the readings are
+    fused, None to only fuse readings with equal time stamps
+    :return: numpy arrays of the distinct time stamps, the fused values and the variances of the fused values
+    """
+    if not times:
+        return np.empty(0), np.empty((0, 0)), np.empty(0)
+    weights = np.repeat(1 / np.asarray(variances, dtype=np.float64), [len(t) for t in times])
+    times, values = np.concatenate(times), np.concatenate(values)
+    if len(times) == 0:
+        return times, values, weights
+    if time_resolution is not None:
+        times = np.round(times / time_resolution) * time_resolution
+    # the stable sort merges the time ordered runs of the sensors and keeps their order on equal time stamps
+    order = np.argsort(times, kind='stable')
+    times, values, weights = times[order], values[order], weights[order]
+    fused_times, starts = np.unique(times, return_index=True)
+    weight_sums = np.add.reduceat(weights, starts)
+    fused_values = np.add.reduceat(values * weights[:, None], starts) / weight_sums[:, None]
+    return fused_times, fused_values, 1 / weight_sums
+
+
+class MultiSensorAltimeter(Altimeter):
+    """
+    Altimeter with any number of pressure sensors and gps sensors. Every step the sensors are read in batches,
+    the readings up to the watermark, the newest time stamp read from every pressure sensor, are merged and fused,
+    and the fused pressure and gps readings of the same time stamp are processed together. The readings after the
+    watermark wait for the slower pressure sensors, so the output is in time order. The gps sensors do not hold
+    back the readings since their fixes are sporadic.
+    A sensor raising an error is dropped, and so is a pressure sensor which returned no data for sensor_timeout
+    seconds while other sensors did, so a failed sensor does not stall the altimeter. The altimeter runs with
+    run(), runIter() and runAsync(), its stages are not built into a pipeline.
+    """
+    def __init__(self, pressure_sensors: list, gps_sensors: list,
+                 pressure_sensor_model: PressureSensorModels, gps_sensor_model: GPSSensorModels,
+                 pressure_sensor_filter: Filters, gps_sensor_filter: Filters,
+                 pressure_data_buffer_size: int, data_logger: DataLogger,
+                 pressure_variances=None, gps_variances=None, sensor_timeout=1.0, time_resolution=None, **kwargs):
+        """
+        :param pressure_sensors: list of objects to query pressure sensor data.
+        :param gps_sensors: list of objects to query GPS sensor data.
+        :param pressure_variances: list of the variances of the pressure sensors in Pa^2, 1.0 for all if None
+        :param gps_variances: list of the variances of the gps sensors, 1.0 for all if None
+        :param sensor_timeout: time in seconds after which a pressure sensor without data is dropped
+        :param time_resolution: resolution of the time stamps used to fuse the readings, see fuseReadings
+        The other parameters are the ones of Altimeter.
+        """
+        super(MultiSensorAltimeter, self).__init__(None, None, pressure_sensor_model, gps_sensor_model,
+                                                   pressure_sensor_filter, gps_sensor_filter,
+                                                   pressure_data_buffer_size, data_logger, **kwargs)
+        assert len(pressure_sensors) > 0, "at least one pressure sensor is required"
+        pressure_variances = [1.0] * len(pressure_sensors) if pressure_variances is None else pressure_variances
+        gps_variances = [1.0] * len(gps_sensors) if gps_variances is None else gps_variances
+        assert len(pressure_variances) == len(pressure_sensors), "one variance per pressure sensor is required"
+        assert len(gps_variances) == len(gps_sensors), "one variance per gps sensor is required"
+        self.pressure_sensors = pressure_sensors
+        self.gps_sensors = gps_sensors
+        self.pressure_variances = pressure_variances
+        self.gps_variances = gps_variances
+        self.sensor_timeout = sensor_timeout
+        self.time_resolution = time_resolution
+
+    def resetState(self):
+        super(MultiSensorAltimeter, self).resetState()
+        self.pressure_streams = [SensorStream(sensor, variance, 1)
+                                 for sensor, variance in zip(self.pressure_sensors, self.pressure_variances)]
+        self.gps_streams = [SensorStream(sensor, variance, 3)
+                            for sensor, variance in zip(self.gps_sensors, self.gps_variances)]
+
+    def dropSensor(self, stream: SensorStream, reason: str):
+        """
+        stops reading a failed sensor, its readings already read are still processed
+        """
+        stream.failed = True
+        logger.warning("dropping sensor %s: %s", stream.sensor.sensor_name, reason)
+        if self.metrics_recorder is not None:
+            self.metrics_recorder.count('failed_sensors')
+
+    def readStreams(self, streams, now: float):
+        """
+        reads a batch from every sensor which did not fail
+        :param now: wall clock time of the read
+        :return: True if any of the sensors returned data
+        """
+        received_data = False
+        for stream in streams:
+            if stream.failed:
+                continue
+            try:
+                batch = stream.sensor.publishMany(self.batch_size)
+            except Exception as error:
+                self.dropSensor(stream, repr(error))
+                continue
+            if batch:
+                received_data = True
+                stream.last_active_time = now
+                stream.push(batch)
+        return received_data
+
+    def releaseReadings(self, streams, watermark: float, time_resolution: float):
+        """
+        :return: distinct time stamps and fused values of the readings of the streams not after the watermark
+        """
+        released = [stream.release(watermark) for stream in streams]
+        times, values, _ = fuseReadings([r[0] for r in released], [r[1] for r in released],
+                                        [stream.variance for stream in streams], time_resolution)
+        return times, values
+
+    def readData(self):
+        """
+        Reads a batch from every sensor and fuses the readings up to the watermark. If no data is received from
+        any of the sensors within the maximum idle time, the remaining readings are processed and then
+        break_status is set to True to end the data processing.
+        :return: pressure data batch, gps data batch, break_status
+        """
+        now = time.time()
+        received_data = self.readStreams(self.pressure_streams, now) | self.readStreams(self.gps_streams, now)
+        live_streams = [stream for stream in self.pressure_streams if not stream.failed]
+        if received_data:
+            self.last_activity_time = now
+            for stream in live_streams:
+                if now - stream.last_active_time > self.sensor_timeout:
+                    self.dropSensor(stream, f"no data for {self.sensor_timeout} seconds")
+            live_streams = [stream for stream in live_streams if not stream.failed]
+            watermark = min([stream.last_time for stream in live_streams], default=np.inf)
+        elif now - self.last_activity_time > self.max_idle_time:
+            # the sensors stopped, so all the readings are released
+            watermark = np.inf
+        else:
+            if self.metrics_recorder is not None:
+                self.metrics_recorder.count('idle_waits')
+            return [], [], False
+
+        pressure_times, pressures = self.releaseReadings(self.pressure_streams, watermark, self.time_resolution)
+        gps_times, gps_values = self.releaseReadings(self.gps_streams, watermark, self.time_resolution)
+        if not received_data and len(pressure_times) == 0 and len(gps_times) == 0:
+            # break the loop if the data is absent for a long time
+            return [], [], True
+        # one step per distinct time stamp, holding the fused readings of the step
+        step_times = np.union1d(pressure_times, gps_times)
+        pressure_batch, gps_batch = [None] * len(step_times), [None] * len(step_times)
+        for i, time_stamp, pressure in zip(np.searchsorted(step_times, pressure_times).tolist(),
+                                           pressure_times.tolist(), pressures[:, 0].tolist()):
+            pressure_batch[i] = (time_stamp, pressure)
+        for i, time_stamp, gps_data in zip(np.searchsorted(step_times, gps_times).tolist(),
+                                           gps_times.tolist(), gps_values.tolist()):
+            gps_batch[i] = (time_stamp, *gps_data)
+        self.logData(pressure_batch, gps_batch)
+        return pressure_batch, gps_batch, False
+
+    async def processSensorDataAsync(self):
+        """
+        Event driven version of processSensorData, see Altimeter.processSensorDataAsync. The routine sleeps until
+        any of the sensors receives new data.
+        """
+        loop = asyncio.get_running_loop()
+        data_event = asyncio.Event()
+
+        def listener():
+            if not data_event.is_set():
+                loop.call_soon_threadsafe(data_event.set)
+
+        sensors = self.pressure_sensors + self.gps_sensors
+        for sensor in sensors:
+            sensor.addListener(listener)
+        self.last_activity_time = time.time()
+        self.resetState()
+        try:
+            while True:
+                data_event.clear()
+                pressure_batch, gps_batch, break_status = self.readData()
+                if break_status:
+                    break
+                if not pressure_batch and not gps_batch:
+                    try:
+                        await asyncio.wait_for(data_event.wait(), self.max_idle_time)
+                    except asyncio.TimeoutError:
+                        # the next read releases the readings held back or ends the data processing
+                        pass
+                    continue
+                self.processBatch(pressure_batch, gps_batch)
+                await asyncio.sleep(0)
+        finally:
+            for sensor in sensors:
+                sensor.removeListener(listener)
+
+    def buildPipeline(self, modes=None, queue_size=8, callback=None):
+        """
+        The source stage of a pipeline reads one pressure sensor and one gps sensor, so the readings of several
+        sensors can not be fused in a pipeline.
+        """
+        raise NotImplementedError("MultiSensorAltimeter can not be built into a pipeline, use run(), runIter() "
+                                  "or runAsync() instead.")
@@ -0,0 +1,148 @@
+"""
+package with the sinks receiving the corrected elevations of the altimeter. The altimeter passes the outputs of
+every batch to its sink, together with the time stamps of the readings they were computed from, so the consumer
+sees the outputs while the altimeter runs and decides how many of them are held in memory.
+"""
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+
+class OutputSink(ABC):
+    """
+    The generic output sink abstract base class.
+    """
+    @abstractmethod
+    def write(self, time_stamps, elevations):
+        """
+        receives the outputs of a batch
+        :param time_stamps: list of time stamps of the outputs
+        :param elevations: list of corrected elevations
+        """
+        pass
+
+    def close(self):
+        """
+        called at the end of a run, the sink may receive more outputs if the altimeter is run again
+        """
+        pass
+
+    def result(self):
+        """
+        :return: outputs held by the sink, returned by Altimeter.run
+        """
+        return None
+
+
+class ListSink(OutputSink):
+    """
+    Appends every output to the list output_data, the memory used grows with the length of the run.
+    """
+    def __init__(self):
+        self.output_data = []
+
+    def write(self, time_stamps, elevations):
+        self.output_data.extend(elevations)
+
+    def result(self):
+        return self.output_data
+
+
+class CallbackSink(OutputSink):
+    """
+    Passes the outputs of every batch to a function and holds none of them.
+    """
+    def __init__(self, callback):
+        """
+        :param callback: function called with the lists of time stamps and corrected elevations of every batch
+        """
+        self.callback = callback
+
+    def write(self, time_stamps, elevations):
+        self.callback(time_stamps, elevations)
+
+
+class RingSink(OutputSink):
+    """
+    Keeps the last outputs in a fixed capacity ring buffer, the oldest output is evicted once the buffer is full.
+    """
+    def __init__(self, capacity: int):
+        """
+        :param capacity: maximum number of outputs held
+        """
+        self.buffer = RingBuffer(capacity)
+
+    def write(self, time_stamps, elevations):
+        buffer = self.buffer
+        for time_stamp, elevation in zip(time_stamps[-buffer.capacity:], elevations[-buffer.capacity:]):
+            buffer.push(time_stamp, elevation)
+
+    def result(self):
+        """
+        :return: numpy array of the last outputs ordered from the oldest to the newest
+        """
+        return self.buffer.values.copy()
+
+
+class ChunkedNumpySink(OutputSink):
+    """
+    Writes the outputs to numpy files of chunk_size rows of time stamp and corrected elevation. The outputs are
+    collected in a preallocated chunk, which is written once it is full and at the end of a run, so the memory
+    used does not depend on the length of the run. The files are read back with readOutputChunks.
+    """
+    def __init__(self, output_dir: str, chunk_size: int = 1 << 16, prefix: str = 'output'):
+        """
+        :param output_dir: directory of the files
+        :param chunk_size: number of outputs per file
+        :param prefix: prefix of the file names, the files are named prefix_000000.npy, prefix_000001.npy, ...
+        """
+        assert chunk_size > 0, "chunk size must be positive"
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.chunk = np.empty((chunk_size, 2))
+        self.size = 0
+        self.file_names = []
+
+    def write(self, time_stamps, elevations):
+        chunk, start = self.chunk, 0
+        while start < len(elevations):
+            n = min(len(elevations) - start, len(chunk) - self.size)
+            chunk[self.size:self.size + n, 0] = time_stamps[start:start + n]
+            chunk[self.size:self.size + n, 1] = elevations[start:start + n]
+            self.size += n
+            start += n
+            if self.size == len(chunk):
+                self.flush()
+
+    def flush(self):
+        """
+        writes the outputs collected in the chunk to a new file
+        """
+        if self.size == 0:
+            return
+        file_name = os.path.join(self.output_dir, f"{self.prefix}_{len(self.file_names):06d}.npy")
+        np.save(file_name, self.chunk[:self.size])
+        self.file_names.append(file_name)
+        self.size = 0
+
+    def close(self):
+        self.flush()
+
+    def result(self):
+        """
+        :return: list of the names of the files written
+        """
+        return self.file_names
+
+
+def readOutputChunks(file_names, mmap_mode=None):
+    """
+    :param file_names: names of the files written by a ChunkedNumpySink
+    :param mmap_mode: memory map mode of np.load, eg 'r' to not read the files into memory
+    :return: generator of numpy arrays of shape (outputs, 2) of time stamps and corrected elevations, one per file
+    """
+    for file_name in file_names:
+        yield np.load(file_name, mmap_mode=mmap_mode)
@@ -0,0 +1,226 @@
+"""
+The module to replay recorded sensor data in real time. A background thread pushes every reading to its sensor
+through the sensor callback at the time given by its time stamp, optionally sped up, so the altimeter sees the
+data at the rate of the real sensors. The replay reports the push jitter, the delay of the replay thread in
+pushing a reading after it was due, the deadline misses of the altimeter loop, which are the readings that were not
+consumed before the next reading was due, and, if the altimeter writes its outputs to the sink of the replay, the
+latency from the due time of a reading to the output of the altimeter.
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import toml
+
+from altimeter import Altimeter
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import createFilter
+from data_logger import DataLogger
+from metrics import StageTimer
+from output_sink import OutputSink, ListSink, CallbackSink
+from simulation_utils import readSensorDataArray
+
+
+def sensorReadings(data, sensor_index: int):
+    """
+    :param data: numpy array of shape (readings, 1 + values) with the time stamp in the first column, nan for
+    time stamps without data
+    :param sensor_index: index of the sensor in the replay, used to order readings with the same time stamp
+    :return: generator of tuples time stamp, sensor index, row index, reading as passed to the sensor callback
+    """
+    for start in range(0, len(data), 4096):
+        rows = data[start:start + 4096]
+        missing = np.isnan(rows[:, 1:]).any(axis=1).tolist()
+        for i, (row, is_missing) in enumerate(zip(rows.tolist(), missing), start):
+            yield row[0], sensor_index, i, (row[0], None) if is_missing else tuple(row)
+
+
+class LatencySink(OutputSink):
+    """
+    Output sink of the altimeter which records the latency from the due time of a reading to its output in the
+    replay, and passes the outputs on to another sink.
+    """
+    def __init__(self, replay, sink: OutputSink = None):
+        """
+        :param replay: PacedReplay pushing the readings
+        :param sink: sink receiving the outputs, a ListSink if None
+        """
+        self.replay = replay
+        self.sink = ListSink() if sink is None else sink
+
+    def write(self, time_stamps, elevations):
+        now, due_times, latency = time.perf_counter(), self.replay.due_times, self.replay.latency
+        for time_stamp in time_stamps:
+            due_time = due_times.pop(time_stamp, None)
+            if due_time is not None:
+                latency.record(max(0, int((now - due_time) * 1e9)))
+        self.sink.write(time_stamps, elevations)
+
+    def close(self):
+        self.sink.close()
+
+    def result(self):
+        return self.sink.result()
+
+
+class PacedReplay:
+    """
+    Pushes recorded sensor data to sensors at the time of their time stamps. The readings of all sensors are
+    merged by time stamp while they are read, so the memory used does not depend on the length of the recording.
+    """
+    def __init__(self, sensors, data, speed: float = 1.0):
+        """
+        :param sensors: list of sensors to push the data to
+        :param data: list of numpy arrays of sensor data, one per sensor, with the time stamp in the first column
+        :param speed: replay speed, eg 10 to replay 10 seconds of data per second
+        """
+        assert len(sensors) == len(data), "one data array per sensor is required"
+        assert speed > 0, "speed must be positive"
+        self.sensors = sensors
+        self.data = data
+        self.speed = speed
+        self.stopped = threading.Event()
+        self.thread = None
+        self.track_latency = False
+        self.reset()
+
+    def reset(self):
+        self.push_jitter = StageTimer()
+        self.latency = StageTimer()
+        # due times of the readings with data pushed and not output yet, by time stamp
+        self.due_times = {}
+        self.readings = 0
+        self.deadline_misses = 0
+        self.max_backlog = 0
+
+    def outputSink(self, sink: OutputSink = None):
+        """
+        :param sink: sink receiving the outputs of the altimeter, a ListSink if None
+        :return: output sink to pass to the altimeter to record the latency of its outputs
+        """
+        self.track_latency = True
+        return LatencySink(self, sink)
+
+    def start(self):
+        """
+        starts replaying the data from its first time stamp in a background thread
+        """
+        assert self.thread is None, "replay already started"
+        self.reset()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.replay, name="PacedReplay", daemon=True)
+        self.thread.start()
+
+    def replay(self):
+        """
+        Routine of the replay thread. The readings with the same time stamp are pushed together.
+        """
+        merged_readings = heapq.merge(*[sensorReadings(data, i) for i, data in enumerate(self.data)])
+        start_time, first_time_stamp, last_time_stamp = None, None, None
+        for time_stamp, sensor_index, _, reading in merged_readings:
+            if start_time is None:
+                start_time, first_time_stamp = time.perf_counter(), time_stamp
+            due_time = start_time + (time_stamp - first_time_stamp) / self.speed
+            delay = due_time - time.perf_counter()
+            if delay > 0 and self.stopped.wait(delay):
+                return
+            if self.stopped.is_set():
+                return
+            self.push_jitter.record(max(0, int((time.perf_counter() - due_time) * 1e9)))
+            if self.track_latency and reading[1] is not None and time_stamp != last_time_stamp:
+                # the due time is recorded once per time stamp, a later reading of a time stamp already output
+                # gives no latency, and only for readings with data, a time stamp without data gives no output
+                self.due_times[time_stamp] = due_time
+                last_time_stamp = time_stamp
+            sensor = self.sensors[sensor_index]
+            backlog = sensor.pending()
+            if backlog:
+                # the reading pushed before this one is still waiting for the altimeter
+                self.deadline_misses += 1
+                self.max_backlog = max(self.max_backlog, backlog)
+            sensor.readCallback(reading)
+            self.readings += 1
+
+    def join(self, timeout: float = None):
+        """
+        waits for the replay to push all the data
+        :param timeout: maximum time to wait in seconds, None to wait until the end of the data
+        """
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def stop(self):
+        """
+        stops the replay before the end of the data
+        """
+        self.stopped.set()
+        self.join()
+        self.thread = None
+
+    def report(self):
+        """
+        :return: dictionary with the number of readings pushed, the push jitter in microseconds, the number of
+        outputs whose latency was recorded and their latency in microseconds, the deadline misses of the consumer
+        and the longest backlog of a sensor
+        """
+        push_jitter, latency = self.push_jitter.snapshot(), self.latency.snapshot()
+        return {'speed': self.speed, 'readings': self.readings, 'push_jitter_mean_us': push_jitter['mean_us'],
+                'push_jitter_p99_us': push_jitter['p99_us'], 'push_jitter_max_us': push_jitter['max_us'],
+                'outputs': latency['count'], 'latency_mean_us': latency['mean_us'],
+                'latency_p50_us': latency['p50_us'], 'latency_p99_us': latency['p99_us'],
+                'latency_max_us': latency['max_us'], 'deadline_misses': self.deadline_misses,
+                'deadline_miss_rate': self.deadline_misses / self.readings if self.readings else 0.0,
+                'max_backlog': self.max_backlog}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data-dir', default='../data/sin_data')
+    parser.add_argument('--speeds', nargs='+', type=float, default=[1.0, 10.0, 100.0])
+    parser.add_argument('--filter-config', default='../cfg/pressure_moving_avg_param.toml')
+    parser.add_argument('--pressure-model-config', default='../cfg/StandardAtmosModelParam.toml')
+    parser.add_argument('--gps-model-config', default='../cfg/standardGpsModelParam.toml')
+    parser.add_argument('--buffer-size', type=int, default=16)
+    parser.add_argument('--max-samples', type=int, default=None, help='number of readings to replay per sensor')
+    parser.add_argument('--cache-dir', default=None, help='directory to cache the parsed data files in')
+    args = parser.parse_args()
+
+    # the data is memory mapped from the cache if there is one
+    mmap_mode = None if args.cache_dir is None else 'r'
+    pressure_data = readSensorDataArray(os.path.join(args.data_dir, 'pressure_sensor_data.txt'), 1, args.cache_dir,
+                                        mmap_mode)
+    gps_data = readSensorDataArray(os.path.join(args.data_dir, 'gps_sensor_data.txt'), 3, args.cache_dir, mmap_mode)
+    if args.max_samples is not None:
+        pressure_data, gps_data = pressure_data[:args.max_samples], gps_data[:args.max_samples]
+    pressure_sensor_model = PressureSensorModels('standardAtmosModel', toml.load(args.pressure_model_config))
+    gps_sensor_model = GPSSensorModels('standardGpsModel', toml.load(args.gps_model_config))
+    with tempfile.TemporaryDirectory() as directory:
+        for speed in args.speeds:
+            sensor_filter = createFilter(toml.load(args.filter_config))
+            pressure_sensor = PressureSensor(1, "PressureSensor", 'Pa')
+            gps_sensor = GPSSensor(2, "GpsSensor", 'm')
+            # the altimeter stops once no reading arrived for a few sample periods
+            sample_period = float(np.median(np.diff(pressure_data[:, 0]))) if len(pressure_data) > 1 else 1.0
+            replay = PacedReplay([pressure_sensor, gps_sensor], [pressure_data, gps_data], speed)
+            # only the latency of the outputs is reported, so the outputs are not kept
+            altimeter = Altimeter(pressure_sensor, gps_sensor, pressure_sensor_model, gps_sensor_model,
+                                  sensor_filter, sensor_filter, args.buffer_size,
+                                  DataLogger(os.path.join(directory, 'log.txt'), 'w'),
+                                  max_idle_time=max(0.1, 5 * sample_period / speed),
+                                  output_sink=replay.outputSink(CallbackSink(lambda time_stamps, elevations: None)))
+            replay.start()
+            asyncio.run(altimeter.runAsync())
+            replay.stop()
+            print(json.dumps(replay.report()))
+
+
+if __name__ == '__main__':
+    main()
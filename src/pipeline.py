@@ -0,0 +1,339 @@
+"""
+package with a composable streaming pipeline of the altimeter stages. A pipeline is a chain of stages, a source
+reading the sensors followed by filter, model, fuser and sink stages, and every stage runs inline with the stage
+before it, in its own thread or in its own process. The stages of different workers are connected by bounded
+queues of batches, so a slow stage blocks the stages before it instead of buffering without limit.
+
+A batch is a dictionary of lists of readings keyed by sensor name ('pressure_sensor' and 'gps_sensor'). The lists
+have the same length and hold one reading or None per step, the readings of a step are processed together in
+the same way Altimeter.processBatch processes them. The source emits the raw readings, eg (time, latitude,
+longitude, elevation) for the gps sensor, and the model and filter stages replace them by (time, value).
+"""
+import multiprocessing
+import queue
+import threading
+from abc import ABC, abstractmethod
+from itertools import zip_longest
+
+import numpy as np
+
+from filters import Filters
+from ring_buffer import RingBuffer
+
+INLINE, THREAD, PROCESS = 'inline', 'thread', 'process'
+EXECUTION_MODES = (INLINE, THREAD, PROCESS)
+
+
+class Stage(ABC):
+    """
+    The generic stage abstract base class. A stage transforms a batch and returns the batch passed to the next
+    stage. A stage running in a process works on a copy of the stage object, so its state is not seen by the
+    caller of the pipeline.
+    """
+    @abstractmethod
+    def process(self, batch):
+        """
+        :param batch: batch produced by the stage before
+        :return: batch passed to the next stage, None to pass nothing on
+        """
+        pass
+
+
+class SourceStage:
+    """
+    First stage of a pipeline, which reads batches of readings from a pressure sensor and a gps sensor. The i-th
+    readings of the two sensors in a read are paired into one step, in the same way Altimeter.readData pairs them.
+    The source waits for new data without polling and ends once no data arrived within the maximum idle time.
+    A source running in a process only reads the data of sensors living in that process, eg replay sensors.
+    """
+    def __init__(self, pressure_sensor, gps_sensor, batch_size: int = 64, max_idle_time: float = 5.0,
+                 data_logger=None):
+        """
+        :param pressure_sensor: Object to query pressure sensor data.
+        :param gps_sensor: Object to query GPS sensor data.
+        :param batch_size: maximum number of readings drained from each sensor in one step
+        :param max_idle_time: maximum idle time in seconds while waiting for sensor inputs
+        :param data_logger: DataLogger object to log the readings, None to not log them
+        """
+        self.pressure_sensor = pressure_sensor
+        self.gps_sensor = gps_sensor
+        self.batch_size = batch_size
+        self.max_idle_time = max_idle_time
+        self.data_logger = data_logger
+
+    def logData(self, pressure_batch, gps_batch):
+        for pressure_data, gps_data in zip_longest(pressure_batch, gps_batch):
+            if pressure_data:
+                self.data_logger.log(pressure_data[0], 'pressure_sensor', pressure_data[1])
+            if gps_data:
+                self.data_logger.log(gps_data[0], 'gps_sensor', (gps_data[1], gps_data[2], gps_data[3]))
+
+    def batches(self):
+        """
+        :return: generator of the batches read from the sensors
+        """
+        data_event = threading.Event()
+        self.pressure_sensor.addListener(data_event.set)
+        self.gps_sensor.addListener(data_event.set)
+        if self.data_logger is not None:
+            self.data_logger.start()
+        try:
+            while True:
+                data_event.clear()
+                pressure_batch = self.pressure_sensor.publishMany(self.batch_size)
+                gps_batch = self.gps_sensor.publishMany(self.batch_size)
+                if not pressure_batch and not gps_batch:
+                    if not data_event.wait(self.max_idle_time):
+                        # end if data is not available for a long time
+                        return
+                    continue
+                if self.data_logger is not None:
+                    self.logData(pressure_batch, gps_batch)
+                n_steps = max(len(pressure_batch), len(gps_batch))
+                yield {'pressure_sensor': pressure_batch + [None] * (n_steps - len(pressure_batch)),
+                       'gps_sensor': gps_batch + [None] * (n_steps - len(gps_batch))}
+        finally:
+            self.pressure_sensor.removeListener(data_event.set)
+            self.gps_sensor.removeListener(data_event.set)
+            if self.data_logger is not None:
+                self.data_logger.stop()
+
+
+class ModelStage(Stage):
+    """
+    Converts the readings of one sensor to elevation with a sensor model. The readings of a batch are converted
+    with one call of the vectorized sensor model.
+    """
+    def __init__(self, sensor_name: str, sensor_model):
+        """
+        :param sensor_name: name of the sensor whose readings are converted
+        :param sensor_model: PressureSensorModels or GPSSensorModels object of the sensor
+        """
+        self.sensor_name = sensor_name
+        self.sensor_model = sensor_model
+
+    def process(self, batch):
+        readings = batch[self.sensor_name]
+        steps = [i for i, reading in enumerate(readings) if reading]
+        if steps:
+            values = np.array([readings[i][1:] for i in steps], dtype=np.float64)
+            elevations = self.sensor_model.model(values[:, 0] if values.shape[1] == 1 else values)
+            readings = list(readings)
+            for i, elevation in zip(steps, np.asarray(elevations).tolist()):
+                readings[i] = (readings[i][0], elevation)
+            batch = dict(batch)
+            batch[self.sensor_name] = readings
+        return batch
+
+
+class FilterStage(Stage):
+    """
+    Filters the (time, value) readings of one sensor. The stage holds the raw and filtered data in ring buffers
+    of the given size, so the filtered values are the same as the ones of Altimeter.filterAndUpdateDataBuffer.
+    """
+    def __init__(self, sensor_name: str, sensor_filter: Filters, buffer_size: int):
+        """
+        :param sensor_name: name of the sensor whose readings are filtered
+        :param sensor_filter: filter of the sensor
+        :param buffer_size: size of the buffers of past raw and filtered data
+        """
+        self.sensor_name = sensor_name
+        self.sensor_filter = sensor_filter
+        self.raw_data = RingBuffer(buffer_size)
+        self.filtered_data = RingBuffer(buffer_size)
+
+    def process(self, batch):
+        raw_data, filtered_data, apply = self.raw_data, self.filtered_data, self.sensor_filter.apply
+        readings = list(batch[self.sensor_name])
+        for i, reading in enumerate(readings):
+            if reading:
+                raw_data.push(reading[0], reading[1])
+                filtered = float(apply(raw_data, filtered_data))
+                filtered_data.push(reading[0], filtered)
+                readings[i] = (reading[0], filtered)
+        batch = dict(batch)
+        batch[self.sensor_name] = readings
+        return batch
+
+
+class FuserStage(Stage):
+    """
+    Fuses the pressure and gps elevations with a bias estimator (see bias_estimator). Produces a list with the
+    corrected elevation of every step with data, the same output as Altimeter.processBatch.
+    """
+    def __init__(self, bias_estimator):
+        """
+        :param bias_estimator: bias estimator with updatePressure, updateGps and bias
+        """
+        self.bias_estimator = bias_estimator
+        self.estimated_elevation = 0.0
+
+    def process(self, batch):
+        bias_estimator = self.bias_estimator
+        estimated_elevation = self.estimated_elevation
+        output_data = []
+        for pressure_data, gps_data in zip(batch['pressure_sensor'], batch['gps_sensor']):
+            if pressure_data:
+                estimated_elevation = pressure_data[1]
+                bias_estimator.updatePressure(estimated_elevation, pressure_data[0])
+            if gps_data:
+                bias_estimator.updateGps(gps_data[1], gps_data[0])
+            if pressure_data or gps_data:
+                output_data.append(estimated_elevation + bias_estimator.bias)
+        self.estimated_elevation = estimated_elevation
+        return output_data
+
+
+class SinkStage(Stage):
+    """
+    Last stage of a pipeline, which passes every batch to a callback or collects the batches of a list in
+    output_data. A sink running in a process collects its output in the process, so a sink whose output is
+    read by the caller should run inline with a stage of the caller or in a thread.
+    """
+    def __init__(self, callback=None):
+        """
+        :param callback: function called with every batch, None to collect the items of the batches in output_data
+        """
+        self.callback = callback
+        self.output_data = []
+
+    def process(self, batch):
+        if self.callback is None:
+            self.output_data.extend(batch)
+        else:
+            self.callback(batch)
+        return None
+
+
+def putBatch(batch_queue, batch, stop_event):
+    """
+    puts a batch to a bounded queue, waiting while the queue is full
+    :return: False if the pipeline was stopped before the batch was put
+    """
+    while not stop_event.is_set():
+        try:
+            batch_queue.put(batch, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def receiveBatches(batch_queue, stop_event):
+    """
+    :return: generator of the batches of a queue until the end of the data or until the pipeline is stopped
+    """
+    while not stop_event.is_set():
+        try:
+            batch = batch_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if batch is None:
+            return
+        yield batch
+
+
+def runSegment(stages, input_queue, output_queue, stop_event, errors):
+    """
+    Routine of a worker of the pipeline, which runs a sequence of stages on the batches of the input queue, or on
+    the batches of the source if the input queue is None, and puts their output to the output queue.
+    """
+    try:
+        if input_queue is None:
+            batches, stages = stages[0].batches(), stages[1:]
+        else:
+            batches = receiveBatches(input_queue, stop_event)
+        for batch in batches:
+            if stop_event.is_set():
+                break
+            for stage in stages:
+                batch = stage.process(batch)
+                if batch is None:
+                    break
+            if batch is not None and output_queue is not None and not putBatch(output_queue, batch, stop_event):
+                break
+    except BaseException as error:
+        stop_event.set()
+        errors.put(error)
+    finally:
+        if output_queue is not None and not putBatch(output_queue, None, stop_event) and \
+                hasattr(output_queue, 'cancel_join_thread'):
+            # do not wait for a stopped consumer to receive the batches still buffered
+            output_queue.cancel_join_thread()
+
+
+class Pipeline:
+    """
+    Chain of a source and stages connected by bounded batch queues. A stage with the mode 'inline' runs in the
+    worker of the stage before it, a stage with the mode 'thread' or 'process' starts a new worker running in a
+    thread or in a process. An inline source runs in the thread calling run().
+    """
+    def __init__(self, stages, modes=None, queue_size: int = 8):
+        """
+        :param stages: list of a SourceStage followed by Stage objects
+        :param modes: list of the execution modes of the stages, all 'inline' if None
+        :param queue_size: maximum number of batches waiting in a queue between two workers
+        """
+        modes = [INLINE] * len(stages) if modes is None else list(modes)
+        assert len(stages) > 0 and isinstance(stages[0], SourceStage), "a pipeline starts with a source"
+        assert len(modes) == len(stages), "one execution mode per stage is required"
+        assert all(mode in EXECUTION_MODES for mode in modes), f"invalid execution mode in {modes}"
+        assert queue_size > 0, "queue size must be positive"
+        self.stages = stages
+        self.modes = modes
+        self.queue_size = queue_size
+        self.stop_event = threading.Event()
+
+    def segments(self):
+        """
+        :return: list of tuples execution mode, stages of the workers of the pipeline
+        """
+        segments = []
+        for stage, mode in zip(self.stages, self.modes):
+            if not segments or mode != INLINE:
+                segments.append((mode, []))
+            segments[-1][1].append(stage)
+        return segments
+
+    def run(self):
+        """
+        runs the pipeline until the source ends and every batch passed the stages. An error raised by a stage
+        stops the pipeline and is raised again.
+        """
+        segments = self.segments()
+        uses_processes = any(mode == PROCESS for mode, _ in segments)
+        self.stop_event = multiprocessing.Event() if uses_processes else threading.Event()
+        errors = multiprocessing.Queue() if uses_processes else queue.Queue()
+        queues = [None]
+        for (mode, _), (next_mode, _) in zip(segments, segments[1:]):
+            queues.append(multiprocessing.Queue(self.queue_size) if PROCESS in (mode, next_mode)
+                          else queue.Queue(self.queue_size))
+        queues.append(None)
+        workers, inline_segment = [], None
+        for i, (mode, stages) in enumerate(segments):
+            args = (stages, queues[i], queues[i + 1], self.stop_event, errors)
+            if mode == INLINE:
+                inline_segment = args
+            elif mode == THREAD:
+                workers.append(threading.Thread(target=runSegment, args=args, name=f"PipelineStage{i}", daemon=True))
+            else:
+                workers.append(multiprocessing.Process(target=runSegment, args=args, name=f"PipelineStage{i}",
+                                                       daemon=True))
+        for worker in workers:
+            worker.start()
+        if inline_segment is not None:
+            runSegment(*inline_segment)
+        for worker in workers:
+            worker.join()
+        if self.stop_event.is_set():
+            try:
+                error = errors.get(timeout=1.0)
+            except queue.Empty:
+                return
+            raise error
+
+    def stop(self):
+        """
+        stops a running pipeline, the batches which did not pass all stages are dropped
+        """
+        self.stop_event.set()
@@ -1,5 +1,7 @@
 import time
 
+import numpy as np
+
 from sensor import Sensor, PRESSURE_SENSOR_TYPE
 
 class PressureSensor(Sensor):
@@ -12,4 +14,19 @@ class PressureSensor(Sensor):
         callback function for pressure sensor reading and pushes to data queue
         in the given unit
         """
-        self.sensor_data_queue.put(data)
+        self.sensor_data_queue.append(data)
+        self.notify()
+
+    def readCallbackMany(self, times, values):
+        """
+        callback function for a batch of pressure sensor readings and pushes them to data queue
+        in the given unit
+        :param times: sequence of time stamps
+        :param values: sequence of pressure data, None for time stamps without data
+        """
+        if isinstance(times, np.ndarray):
+            times = times.tolist()
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        self.sensor_data_queue.extend(zip(times, values))
+        self.notify()
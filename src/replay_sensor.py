@@ -0,0 +1,120 @@
+"""
+package with sensors which replay recorded sensor data. Instead of pushing the whole recording to the data queue,
+a replay sensor reads its data lazily through a cursor over an array of the recording, which is usually a memory
+mapped .npy cache (see simulation_utils.readSensorDataArray). Any number of replay sensors can share the same
+array, each with its own cursor, so several runs replay one parsed data set without copying it.
+"""
+import numpy as np
+
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+
+
+class ReplayCursor:
+    """
+    Read position over the rows of an array of sensor data. Reading returns views into the array, so the memory
+    used does not depend on the length of the recording.
+    """
+    def __init__(self, data, position: int = 0):
+        """
+        :param data: numpy array of shape (readings, 1 + values) with the time stamp in the first column
+        :param position: index of the first row to read
+        """
+        self.data = data
+        self.position = 0
+        self.rewind(position)
+
+    def __len__(self):
+        return len(self.data) - self.position
+
+    def read(self, max_n: int):
+        """
+        :param max_n: maximum number of rows to read
+        :return: the next rows as a view into the array
+        """
+        rows = self.data[self.position:self.position + max_n]
+        self.position += len(rows)
+        return rows
+
+    def rewind(self, position: int = 0):
+        """
+        :param position: index of the next row to read
+        """
+        assert 0 <= position <= len(self.data), "position out of the data"
+        self.position = position
+
+    def seek(self, time_stamp: float):
+        """
+        moves the cursor to the first row with a time stamp not before the given one, the rows are assumed to be
+        in time order
+        :param time_stamp: time stamp to seek
+        """
+        self.rewind(int(np.searchsorted(self.data[:, 0], time_stamp, side='left')))
+
+
+class ReplaySensor:
+    """
+    Mixin which makes a sensor publish the rows of an array of recorded sensor data instead of the data in its
+    data queue. Rows with nan values are published as readings without data. A replay sensor does not accept data
+    through its callbacks, since the data pushed would never be published.
+    """
+    def initReplay(self, data):
+        """
+        :param data: numpy array of shape (readings, 1 + values) with the time stamp in the first column
+        """
+        self.replay_cursor = ReplayCursor(data)
+
+    def rewind(self, position: int = 0):
+        """
+        restarts the replay
+        :param position: index of the next reading to publish
+        """
+        self.replay_cursor.rewind(position)
+
+    def seek(self, time_stamp: float):
+        """
+        continues the replay from the first reading with a time stamp not before the given one
+        :param time_stamp: time stamp to seek
+        """
+        self.replay_cursor.seek(time_stamp)
+
+    def pending(self):
+        return len(self.replay_cursor)
+
+    def readCallback(self, data):
+        raise NotImplementedError(f"replay sensor {self.sensor_name} does not accept data through callbacks")
+
+    def readCallbackMany(self, times, values):
+        raise NotImplementedError(f"replay sensor {self.sensor_name} does not accept data through callbacks")
+
+    def publish(self):
+        batch = self.publishMany(1)
+        return batch[0] if batch else None
+
+    def publishMany(self, max_n: int):
+        rows = self.replay_cursor.read(max_n)
+        missing = np.isnan(rows[:, 1:]).any(axis=1).tolist()
+        return [None if is_missing else tuple(row) for row, is_missing in zip(rows.tolist(), missing)]
+
+
+class PressureReplaySensor(ReplaySensor, PressureSensor):
+    def __init__(self, sensor_id: int, sensor_name: str, data_unit: int, data):
+        """
+        :param data: numpy array of shape (readings, 2) of time stamps and pressure data, nan for time stamps
+        without data
+        """
+        super(PressureReplaySensor, self).__init__(sensor_id, sensor_name, data_unit)
+        assert data.ndim == 2 and data.shape[1] == 2, "pressure data must have a time stamp and a value per row"
+        self.initReplay(data)
+
+
+class GPSReplaySensor(ReplaySensor, GPSSensor):
+    def __init__(self, sensor_id: int, sensor_name: str, data_unit: int, data):
+        """
+        :param data: numpy array of shape (readings, 4) of time stamps, latitude, longitude & elevation, nan for
+        time stamps without a fix
+        """
+        super(GPSReplaySensor, self).__init__(sensor_id, sensor_name, data_unit)
+        assert data.ndim == 2 and data.shape[1] == 4, \
+            "gps data must have a time stamp, latitude, longitude & elevation per row"
+        self.initReplay(data)
@@ -0,0 +1,91 @@
+"""
+package with the preallocated circular buffer used to hold windows of time stamped sensor data
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed capacity circular buffer of time stamped scalar samples backed by preallocated numpy arrays. Every
+    sample is written twice, at its slot and at its slot plus the capacity, so the samples in the window are
+    always contiguous in memory and can be returned in time order as a view without copying. Pushing a
+    sample to a full buffer evicts the oldest one in constant time.
+    """
+    __slots__ = ('capacity', 'size', 'head', '_times', '_values')
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        """
+        :param capacity: maximum number of samples held by the buffer
+        :param dtype: numpy data type of the value column
+        """
+        assert capacity > 0, "buffer capacity must be positive"
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0  # slot of the oldest sample
+        self._times = np.zeros(2 * capacity, dtype=np.float64)
+        self._values = np.zeros(2 * capacity, dtype=dtype)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, item):
+        return self.values[item]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def isFull(self):
+        """
+        :return: True if the next push evicts the oldest sample
+        """
+        return self.size == self.capacity
+
+    def push(self, time_stamp: float, value: float):
+        """
+        adds a sample to the end of the buffer, evicting the oldest sample if the buffer is full.
+        :param time_stamp: time stamp of the sample
+        :param value: value of the sample
+        """
+        if self.size == self.capacity:
+            slot = self.head
+            self.head = (self.head + 1) % self.capacity
+        else:
+            slot = (self.head + self.size) % self.capacity
+            self.size += 1
+        self._times[slot] = self._times[slot + self.capacity] = time_stamp
+        self._values[slot] = self._values[slot + self.capacity] = value
+
+    def clear(self):
+        """
+        removes all the samples from the buffer
+        """
+        self.size = 0
+        self.head = 0
+
+    @property
+    def times(self):
+        """
+        time stamps of the samples ordered from the oldest to the newest. The returned array is a view into the
+        buffer and is overwritten by subsequent pushes.
+        """
+        return self._times[self.head:self.head + self.size]
+
+    @property
+    def values(self):
+        """
+        values of the samples ordered from the oldest to the newest. The returned array is a view into the
+        buffer and is overwritten by subsequent pushes.
+        """
+        return self._values[self.head:self.head + self.size]
+
+    @property
+    def last(self):
+        """
+        :return: time stamp and value of the newest sample
+        """
+        assert self.size > 0, "buffer is empty"
+        slot = self.head + self.size - 1
+        return self._times[slot], self._values[slot]
@@ -1,14 +1,16 @@
+import asyncio
 import time
 from abc import ABC, abstractmethod
+from collections import deque
 from time import time_ns
-from queue import Queue
 
 PRESSURE_SENSOR_TYPE = 0
 GPS_SENSOR_TYPE = 1
 
 class Sensor(ABC):
     """
-    The generic sensor abstract base class. The class defines the interface for sensor
+    The generic sensor abstract base class. The class defines the interface for sensor. The sensor data is
+    held in a deque, whose append and popleft are atomic, so the callbacks and the consumer do not need a lock.
     """
     def __init__(self, sensor_id: int, sensor_name: str, sensor_type:int,
                  data_unit: int):
@@ -16,7 +18,8 @@ class Sensor(ABC):
         self.sensor_name = sensor_name
         self.sensor_type = sensor_type
         self.sensor_data_unit = data_unit
-        self.sensor_data_queue = Queue()
+        self.sensor_data_queue = deque()
+        self.listeners = []
 
     @abstractmethod
     def readCallback(self, data):
@@ -26,14 +29,99 @@ class Sensor(ABC):
         """
         pass
 
+    def readCallbackMany(self, times, values):
+        """
+        callback function for a batch of sensor readings and pushes them to data queue. The default
+        implementation passes the readings one by one to readCallback, subclasses may override it to push the
+        whole batch at once.
+        :param times: sequence of time stamps
+        :param values: sequence of sensor values, None for time stamps without data. A value with several
+        coordinates is given as a sequence and flattened into the reading
+        """
+        for time_stamp, value in zip(times, values):
+            if value is None:
+                self.readCallback((time_stamp, None))
+            elif isinstance(value, (tuple, list)):
+                self.readCallback((time_stamp, *value))
+            else:
+                self.readCallback((time_stamp, value))
+
+    def addListener(self, listener):
+        """
+        registers a function which is called without arguments whenever new data is pushed to the data queue.
+        The function may be called from the thread running the callbacks.
+        :param listener: function to call
+        """
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        """
+        :param listener: function registered with addListener
+        """
+        self.listeners.remove(listener)
+
+    def notify(self):
+        """
+        calls the registered listeners, should be called by the callbacks after pushing to the data queue
+        """
+        for listener in self.listeners:
+            listener()
+
+    def pending(self):
+        """
+        :return: number of data waiting to be published
+        """
+        return len(self.sensor_data_queue)
+
     def publish(self):
         """
         reads the data from the data queue and publishes it
         :return: tuple time, sensor_data
         """
-        if self.sensor_data_queue.empty():
+        if not self.sensor_data_queue:
             return None
-        data = self.sensor_data_queue.get()
+        data = self.sensor_data_queue.popleft()
         if data[1] is None:
             return None
         return data
+
+    def publishMany(self, max_n: int):
+        """
+        reads up to max_n data from the data queue and publishes them in one call
+        :param max_n: maximum number of data to read
+        :return: list of tuples time, sensor_data in the order they were received, None in place of the
+        data without a sensor reading
+        """
+        popleft = self.sensor_data_queue.popleft
+        batch = [popleft() for _ in range(min(max_n, len(self.sensor_data_queue)))]
+        return [None if data[1] is None else data for data in batch]
+
+    async def stream(self, max_n: int, timeout: float = None):
+        """
+        asynchronous generator which publishes the data in batches as it arrives. The generator waits without
+        polling while the data queue is empty.
+        :param max_n: maximum number of data in a batch
+        :param timeout: maximum time in seconds to wait for new data, the generator ends when it is exceeded.
+        None to wait forever
+        :return: batches of data as returned by publishMany
+        """
+        loop = asyncio.get_running_loop()
+        data_event = asyncio.Event()
+
+        def listener():
+            if not data_event.is_set():
+                loop.call_soon_threadsafe(data_event.set)
+
+        self.addListener(listener)
+        try:
+            while True:
+                data_event.clear()
+                if self.pending():
+                    yield self.publishMany(max_n)
+                    continue
+                try:
+                    await asyncio.wait_for(data_event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return
+        finally:
+            self.removeListener(listener)
@@ -1,5 +1,7 @@
 from sensor import PRESSURE_SENSOR_TYPE, GPS_SENSOR_TYPE
-from typing import List
+from typing import Sequence
+
+import numpy as np
 
 class SensorModel:
     """
@@ -12,27 +14,103 @@ class SensorModel:
         self.model = model
 
 class PressureSensorModels(SensorModel):
+    # parameters required by each model, they are validated and bound to the object at construction
+    model_parameter_names = {'standardAtmosModel': ('a', 'b', 'c'),
+                             'lookupTableAtmosModel': ('a', 'b', 'c', 'min_pressure', 'max_pressure', 'max_error')}
+    # largest lookup table built by lookupTableAtmosModel
+    max_table_size = 1 << 22
+
     def __init__(self, sensor_model: str, sensor_model_parameters: dict[str, float]):
         assert hasattr(self, sensor_model), f"invalid sensor model: {sensor_model}"
         super().__init__(PRESSURE_SENSOR_TYPE,  getattr(self, sensor_model))
         self.sensor_model_parameters = sensor_model_parameters
+        for name in self.model_parameter_names.get(sensor_model, ()):
+            assert name in self.sensor_model_parameters, f"model parameter {name} missing"
+            setattr(self, name, float(self.sensor_model_parameters[name]))
+        if sensor_model == 'lookupTableAtmosModel':
+            self.buildLookupTable(self.sensor_model_parameters.get('interpolation', 'linear'))
+
+    def buildLookupTable(self, interpolation: str):
+        """
+        tabulates the standard atmospheric model over the pressure range [min_pressure, max_pressure] with a
+        uniform step small enough for the interpolation error to stay below max_error. The interpolation
+        polynomial of every step of the table is stored as the coefficients of c0 + c1 * t + c2 * t^2 + c3 * t^3
+        with t in [0, 1) the position within the step.
+        :param interpolation: 'linear' or 'cubic' (Hermite interpolation with the exact derivatives)
+        """
+        assert interpolation in ('linear', 'cubic'), f"invalid interpolation: {interpolation}"
+        assert 0 < self.min_pressure < self.max_pressure, "pressure range must be positive and not empty"
+        assert self.max_error > 0, "maximum error must be positive"
+        self.interpolation = interpolation
+        # bound of the interpolation error from the derivatives of a - b * p^c, which are largest at the
+        # lowest pressure for 0 < c < 1
+        c = self.c
+        if interpolation == 'linear':
+            derivative_bound = abs(self.b * c * (c - 1)) * self.min_pressure ** (c - 2)
+            step = np.sqrt(8 * self.max_error / derivative_bound) if derivative_bound else np.inf
+        else:
+            derivative_bound = abs(self.b * c * (c - 1) * (c - 2) * (c - 3)) * self.min_pressure ** (c - 4)
+            step = (384 * self.max_error / derivative_bound) ** 0.25 if derivative_bound else np.inf
+        n_steps = max(1, int(np.ceil((self.max_pressure - self.min_pressure) / step)))
+        assert n_steps < self.max_table_size, "lookup table too large, increase max_error or reduce the range"
+        pressures = np.linspace(self.min_pressure, self.max_pressure, n_steps + 1)
+        step = pressures[1] - pressures[0]
+        elevations = self.standardAtmosModel(pressures)
+        coefficients = np.zeros((n_steps, 4))
+        coefficients[:, 0] = elevations[:-1]
+        if interpolation == 'linear':
+            coefficients[:, 1] = np.diff(elevations)
+        else:
+            # derivatives with respect to the position within the step
+            slopes = -self.b * c * pressures ** (c - 1) * step
+            difference = np.diff(elevations)
+            coefficients[:, 1] = slopes[:-1]
+            coefficients[:, 2] = 3 * difference - 2 * slopes[:-1] - slopes[1:]
+            coefficients[:, 3] = slopes[:-1] + slopes[1:] - 2 * difference
+        self.table_coefficients = coefficients
+        # a list of tuples is faster than a numpy array to index with scalars
+        self.table_rows = list(map(tuple, coefficients.tolist()))
+        self.inverse_table_step = 1.0 / step
+        self.table_size = n_steps
 
     def standardAtmosModel(self, pressure_data):
         """
         standard atmospheric pressure sensor model to convert pressure sensor
         model to elevation measurements based on: "Portland State Aerospace Society, “A Quick Derivation
         relating altitude to air pressure,” Tech. Rep., Portland State Aerospace Society, 2004"
-        :param pressure_data: pressure data in Pa
-        :return: height in meters
-        """
-        assert "a" in self.sensor_model_parameters, "model parameter a missing"
-        assert "b" in self.sensor_model_parameters, "model parameter b missing"
-        assert "c" in self.sensor_model_parameters, "model parameter c missing"
-        assert type(pressure_data) == float, "pressure data must be a float"
-        a = self.sensor_model_parameters['a']
-        b = self.sensor_model_parameters['b']
-        c = self.sensor_model_parameters['c']
-        return a - b * (pressure_data ** c)
+        :param pressure_data: pressure data in Pa as a scalar or a numpy array
+        :return: height in meters, with the same shape as the pressure data
+        """
+        return self.a - self.b * pressure_data ** self.c
+
+    def lookupTableAtmosModel(self, pressure_data):
+        """
+        standard atmospheric pressure sensor model evaluated by interpolating a table computed at construction,
+        which avoids the power of the pressure inside the pressure range of the table. The interpolation error
+        is below the max_error parameter, pressures outside the range use the exact model.
+        :param pressure_data: pressure data in Pa as a scalar or a numpy array
+        :return: height in meters, with the same shape as the pressure data
+        """
+        if isinstance(pressure_data, np.ndarray):
+            position = (pressure_data - self.min_pressure) * self.inverse_table_step
+            in_range = (position >= 0) & (position < self.table_size)
+            all_in_range = in_range.all()
+            if not all_in_range:
+                position = np.where(in_range, position, 0.0)
+            index = position.astype(np.intp)
+            t = position - index
+            c0, c1, c2, c3 = self.table_coefficients[index].T
+            elevation = c0 + t * (c1 + t * (c2 + t * c3))
+            if not all_in_range:
+                elevation[~in_range] = self.standardAtmosModel(pressure_data[~in_range])
+            return elevation
+        position = (pressure_data - self.min_pressure) * self.inverse_table_step
+        if not 0 <= position < self.table_size:
+            return self.standardAtmosModel(pressure_data)
+        index = int(position)
+        t = position - index
+        c0, c1, c2, c3 = self.table_rows[index]
+        return c0 + t * (c1 + t * (c2 + t * c3))
 
 class GPSSensorModels(SensorModel):
     def __init__(self, sensor_model: str, sensor_model_parameters: dict[str, float]):
@@ -40,13 +118,17 @@ class GPSSensorModels(SensorModel):
         super().__init__(GPS_SENSOR_TYPE, getattr(self, sensor_model))
         self.sensor_model_parameters = sensor_model_parameters
 
-    def standardGpsModel(self, gps_data: List[float]):
+    def standardGpsModel(self, gps_data: Sequence[float]):
         """
-        :param gps_data: a list with three float elements with latitude, longitude & elevation
-        coordinates in order
+        :param gps_data: a list or tuple with three float elements with latitude, longitude & elevation
+        coordinates in order, or a numpy array with the coordinates along its last axis
         :return: the elevation in meters
         """
-        assert type(gps_data) == list, "gps_data must be a list"
+        if isinstance(gps_data, np.ndarray):
+            assert gps_data.shape[-1] == 3, "invalid gps data"
+            return gps_data[..., 2]
+        assert type(gps_data) == list or type(gps_data) == tuple, "gps_data must be a list or a tuple"
         assert len(gps_data) == 3, "invalid gps data"
-        assert type(gps_data[0]) == float and type(gps_data[1])== float and type(gps_data[2])== float, "invalid gps data"
-        return gps_data[2]
\ No newline at end of file
+        elevation = gps_data[2]
+        assert type(elevation) == float, "invalid gps data"
+        return elevation
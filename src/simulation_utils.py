@@ -1,67 +1,173 @@
 """
 package with utility functions to aid simulation
 """
+import glob
+import hashlib
+import io
+import os
+
+import numpy as np
+
 from pressure_sensor import PressureSensor
 from gps_sensor import GPSSensor
+from binary_log import BinaryLogReader
+
+# size in bytes of the chunks of lines a sensor data file is parsed in
+PARSE_CHUNK_BYTES = 1 << 24
+
+def readSensorDataArray(filename: str, n_values: int, cache_dir: str = None, mmap_mode: str = None):
+    """
+    The function parses a sensor data file with a time stamp and n_values comma separated values per line into a
+    numpy array. Values given as None are read as nan. The file is parsed in chunks of lines, so apart from the
+    parsed array only the text of one chunk is held in memory. If a cache directory is given, the parsed array is
+    cached in a .npy file of the directory, keyed by the path and the modification time of the data file, so
+    later calls skip the parsing.
+    :param filename: sensor data file path
+    :param n_values: number of values per line after the time stamp
+    :param cache_dir: directory to read and write the .npy cache in, None to not use a cache
+    :param mmap_mode: mode to memory map the cache with, eg 'r', so the data is read from disk on access and can
+    be shared without copying. None to load the data to memory. Requires a cache directory.
+    :return: numpy array of shape (lines, 1 + n_values)
+    """
+    assert mmap_mode is None or cache_dir is not None, "memory mapping the data requires a cache directory"
+    if cache_dir is not None:
+        # data files of the same name in different directories have different caches
+        path_digest = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()[:16]
+        cache_prefix = os.path.join(cache_dir, f"{os.path.basename(filename)}.{path_digest}")
+        cache_filename = f"{cache_prefix}.{os.stat(filename).st_mtime_ns}.npy"
+        if os.path.exists(cache_filename):
+            return np.load(cache_filename, mmap_mode=mmap_mode)
+    missing_values = ",".join(["nan"] * n_values)
+    chunks = []
+    with open(filename, 'r') as f:
+        while True:
+            lines = f.readlines(PARSE_CHUNK_BYTES)
+            if not lines:
+                break
+            chunk = np.loadtxt(io.StringIO("".join(lines).replace("None", missing_values)), delimiter=',',
+                               ndmin=2, dtype=np.float64)
+            if len(chunk):
+                chunks.append(chunk)
+    data = np.concatenate(chunks) if chunks else np.zeros((0, 1 + n_values))
+    if cache_dir is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # remove the caches of older versions of the data file
+            for stale_cache_filename in glob.glob(f"{glob.escape(cache_prefix)}.*.npy"):
+                if stale_cache_filename != cache_filename:
+                    os.remove(stale_cache_filename)
+            # write to a temporary file first so a concurrent run never reads a partial cache
+            temporary_filename = f"{cache_filename}.{os.getpid()}.tmp"
+            with open(temporary_filename, 'wb') as f:
+                np.save(f, data)
+            os.replace(temporary_filename, cache_filename)
+        except OSError:
+            return data
+        if mmap_mode is not None and len(data):
+            return np.load(cache_filename, mmap_mode=mmap_mode)
+    return data
+
+def readPressureDataArrays(filename: str, cache_dir: str = None):
+    """
+    The function reads the pressure data from the given file to numpy arrays
+    :return: time stamps, pressure data with nan for time stamps without data
+    """
+    data = readSensorDataArray(filename, 1, cache_dir)
+    return data[:, 0], data[:, 1]
 
-def loadPressureData(pressure_sensor: PressureSensor, filename: str):
+def readGPSDataArrays(filename: str, cache_dir: str = None):
+    """
+    The function reads the gps data from the given file to numpy arrays
+    :return: time stamps, array of shape (lines, 3) of latitude, longitude & elevation with nan for time stamps
+    without a fix
+    """
+    data = readSensorDataArray(filename, 3, cache_dir)
+    return data[:, 0], data[:, 1:]
+
+def loadPressureData(pressure_sensor: PressureSensor, filename: str, cache_dir: str = None):
     """
     The function loads the pressure data from the given file to internal queue of the sensor object
     """
-    f = open(filename, 'r')
-    for data in f.readlines():
-        d = data.split(',')
-        time = float(d[0])
-        pressure = float(d[1])
-        pressure_sensor.readCallback((time, pressure))
+    times, pressures = readPressureDataArrays(filename, cache_dir)
+    missing = np.isnan(pressures)
+    values = pressures.tolist()
+    if missing.any():
+        for i in np.flatnonzero(missing).tolist():
+            values[i] = None
+    pressure_sensor.readCallbackMany(times, values)
 
-def loadGPSData(gps_sensor: GPSSensor, filename: str):
+def loadGPSData(gps_sensor: GPSSensor, filename: str, cache_dir: str = None):
     """
     The function loads the gps data from the given file to internal queue of the sensor object
     """
-    f = open(filename, 'r')
-    for data in f.readlines():
-        d = data.split(',')
-        time = float(d[0])
-        if "None" in d[1]:
-            gps_sensor.readCallback((time, None))
-        else:
-            gps_sensor.readCallback((time, float(d[1]), float(d[2]), float(d[3])))
+    times, gps_data = readGPSDataArrays(filename, cache_dir)
+    values = gps_data.tolist()
+    for i in np.flatnonzero(np.isnan(gps_data).any(axis=1)).tolist():
+        values[i] = None
+    gps_sensor.readCallbackMany(times, values)
+
+def loadBinaryLogData(pressure_sensor: PressureSensor, gps_sensor: GPSSensor, log_filename: str,
+                      start_time: float = None, end_time: float = None):
+    """
+    The function loads the pressure and gps data of a binary log to the internal queues of the sensor objects. The gps
+    data is aligned to the time stamps of the pressure data, so the i-th readings of the two sensors have the same
+    time stamp as in the data files, with None for the time stamps without a gps fix. Gps fixes without a pressure
+    reading at the same time stamp are dropped.
+    :param pressure_sensor: pressure sensor object
+    :param gps_sensor: gps sensor object
+    :param log_filename: name of the log as given to the DataLogger
+    :param start_time: earliest time stamp to load, None for the start of the log
+    :param end_time: latest time stamp to load, None for the end of the log
+    """
+    pressure_records = BinaryLogReader(log_filename, 'pressure_sensor').between(start_time, end_time)
+    gps_records = BinaryLogReader(log_filename, 'gps_sensor').between(start_time, end_time)
+    pressure_times = pressure_records['time']
+    gps_index = np.searchsorted(pressure_times, gps_records['time'])
+    matched = gps_index < len(pressure_times)
+    matched[matched] = pressure_times[gps_index[matched]] == gps_records['time'][matched]
+    gps_values = [None] * len(pressure_times)
+    for index, latitude, longitude, elevation in zip(gps_index[matched].tolist(),
+                                                     gps_records['latitude'][matched].tolist(),
+                                                     gps_records['longitude'][matched].tolist(),
+                                                     gps_records['elevation'][matched].tolist()):
+        gps_values[index] = (latitude, longitude, elevation)
+    pressure_sensor.readCallbackMany(pressure_times, pressure_records['pressure'])
+    gps_sensor.readCallbackMany(pressure_times, gps_values)
 
-def pressureGpsLogDataSplitter(log_filename: str, pressure_data_filename: str, gps_data_filename: str):
+def pressureGpsLogDataSplitter(log_filename: str, pressure_data_filename: str, gps_data_filename: str,
+                               start_time: float = None, end_time: float = None, buffer_size: int = 1 << 20):
     """
     This function will split logged data in the log file to pressure and gps data files. This is done so that
-    the files can be read in parallel to simulate the sensor readings.
+    the files can be read in parallel to simulate the sensor readings. The log file is read line by line and the
+    data files are written through buffered writers as it is read, so the memory used does not depend on the size
+    of the log.
     :param log_filename: input log file path
     :param pressure_data_filename: output pressure data file path
     :param gps_data_filename: output gps data file path
+    :param start_time: earliest time stamp to extract, None for the start of the log
+    :param end_time: latest time stamp to extract, None for the end of the log
+    :param buffer_size: size in bytes of the buffers of the output files
     """
-    f = open(log_filename, 'r')
-    prev_sensor, prev_time = None, None
-    save_data = {'pressure_sensor': [], 'gps_sensor': []}
-    for data in f.readlines():
-        d = data.split()
-        time = (d[0].strip('[').strip(']'))
-        sensor = d[1]
-        value = ""
-        for i in range(2, len(d)):
-            value += d[i].strip('(').strip(')')
-
-        save_data[sensor].append((time + ',' + value))
-        if prev_sensor and prev_time and sensor == prev_sensor and float(time) == float(prev_time)+1:
-            if 'pressure' in sensor:
-                save_data['gps_sensor'].append((time + ',' +  "None"))
-            else:
-                save_data['pressure_sensor'].append((time + ',' +  "None"))
-        prev_sensor, prev_time = sensor, time
-
-    # write the data set to respective files
-    with open(pressure_data_filename, 'w') as f:
-        for data in save_data['pressure_sensor']:
-            f.write(str(data) + '\n')
-    with open(gps_data_filename, 'w') as f:
-        for data in save_data['gps_sensor']:
-            f.write(str(data) + '\n')
+    with open(log_filename, 'r') as log_file, \
+            open(pressure_data_filename, 'w', buffering=buffer_size) as pressure_file, \
+            open(gps_data_filename, 'w', buffering=buffer_size) as gps_file:
+        data_files = {'pressure_sensor': pressure_file, 'gps_sensor': gps_file}
+        prev_sensor, prev_time = None, None
+        for data in log_file:
+            d = data.split()
+            if not d:
+                continue
+            time = d[0].strip('[').strip(']')
+            sensor = d[1]
+            time_stamp = float(time)
+            if (start_time is None or time_stamp >= start_time) and (end_time is None or time_stamp <= end_time):
+                value = "".join([v.strip('(').strip(')') for v in d[2:]])
+                data_files[sensor].write(time + ',' + value + '\n')
+                if prev_sensor and sensor == prev_sensor and time_stamp == prev_time + 1:
+                    # the other sensor has no reading at this time stamp
+                    other_sensor = 'gps_sensor' if 'pressure' in sensor else 'pressure_sensor'
+                    data_files[other_sensor].write(time + ',' + "None" + '\n')
+            prev_sensor, prev_time = sensor, time_stamp
 
 
 if __name__ == '__main__':
@@ -5,13 +5,13 @@ the altimeter object is build by assembling the different components like sensor
 """
 
 from altimeter import Altimeter
-from pressure_sensor import PressureSensor
-from gps_sensor import GPSSensor
+from replay_sensor import PressureReplaySensor, GPSReplaySensor
 from sensor_model import PressureSensorModels, GPSSensorModels
-from filters import MovingAverage1D
+from filters import createFilter
 from data_logger import DataLogger
 from simulation_utils import *
 
+import numpy as np
 import toml
 import matplotlib.pyplot as plt
 
@@ -20,19 +20,17 @@ def main():
     pressure_data_file = "../data/pressure_sensor_data.txt"
     gps_data_file = "../data/gps_sensor_data.txt"
     ground_truth_data_file = "../data/ground_truth_data.txt"
-    time_stamps = []
-    ground_truth_data = []
-    with open(ground_truth_data_file, 'r') as f:
-        for line in f.readlines():
-            data = line.strip().split(',')
-            time_stamps.append(float(data[0]))
-            ground_truth_data.append(float(data[1]))
+    # the parsed data files are cached, so repeated simulations skip the parsing
+    cache_dir = "../cache"
+    ground_truth = readSensorDataArray(ground_truth_data_file, 1, cache_dir)
+    time_stamps, ground_truth_data = ground_truth[:, 0], ground_truth[:, 1]
 
-    # setting up the sensors with data
-    pressure_sensor = PressureSensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa')
-    gps_sensor = GPSSensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m')
-    loadPressureData(pressure_sensor, pressure_data_file)
-    loadGPSData(gps_sensor, gps_data_file)
+    # setting up the sensors replaying the memory mapped sensor data, the data is parsed once and shared by the runs
+    pressure_data = readSensorDataArray(pressure_data_file, 1, cache_dir, mmap_mode='r')
+    gps_data = readSensorDataArray(gps_data_file, 3, cache_dir, mmap_mode='r')
+    pressure_sensor = PressureReplaySensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa',
+                                           data=pressure_data)
+    gps_sensor = GPSReplaySensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m', data=gps_data)
 
 
     # setting up the sensor model
@@ -50,8 +48,8 @@ def main():
     gps_sensor_filter_config_file = '../cfg/gps_moving_avg_param.toml'
     pressure_filter_parameter = toml.load(pressure_sensor_filter_config_file)
     gps_sensor_filter_parameter = toml.load(gps_sensor_filter_config_file)
-    pressure_sensor_filter = MovingAverage1D(pressure_filter_parameter)
-    gps_sensor_filter = MovingAverage1D(gps_sensor_filter_parameter)
+    pressure_sensor_filter = createFilter(pressure_filter_parameter)
+    gps_sensor_filter = createFilter(gps_sensor_filter_parameter)
     pressure_data_buffer_size = 16
 
 
@@ -68,7 +66,8 @@ def main():
     output_data = altimeter.run()
 
     # setting up the altimeter without gps for comparison
-    loadPressureData(pressure_sensor, pressure_data_file)
+    pressure_sensor.rewind()
+    gps_sensor = GPSReplaySensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m', data=gps_data[:0])
     altimeter = Altimeter(pressure_sensor, gps_sensor,
                           pressure_sensor_model, gps_sensor_model,
                           pressure_sensor_filter,
@@ -76,24 +75,10 @@ def main():
                           data_logger)
     output_data_without_gps = altimeter.run()
 
-    # load the raw sensor measurements for plotting
-    pressure_raw_data = []
-    f = open(pressure_data_file, 'r')
-    for data in f.readlines():
-        d = data.split(',')
-        pressure = float(d[1])
-        pressure_raw_data.append(pressure)
-
-    gps_raw_data = []
-    gps_data_index = []
-    f = open(gps_data_file, 'r')
-    count = 0
-    for data in f.readlines():
-        d = data.split(',')
-        if "None" not in d[1]:
-            gps_data_index.append(count)
-            gps_raw_data.append(float(d[3]))
-        count += 1
+    # the raw sensor measurements for plotting
+    pressure_raw_data = pressure_data[:, 1]
+    gps_data_index = np.flatnonzero(~np.isnan(gps_data[:, 3]))
+    gps_raw_data = gps_data[gps_data_index, 3]
 
     # generate the relevant plots
     plt.figure()
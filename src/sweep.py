@@ -0,0 +1,195 @@
+"""
+The script to sweep the altimeter over a grid of data sets, pressure filter configurations, pressure data buffer
+sizes, pressure sensor models and bias estimators. The gps data is filtered with the gps filter of every point.
+Every point of the grid is run with and without the gps data on a pool of processes, and the root mean square
+error of the estimated elevation against the ground truth is written to a table. The data sets are parsed once
+and shared with the worker processes through shared memory.
+"""
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import toml
+
+from altimeter import Altimeter
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import createFilter
+from simulation_utils import readSensorDataArray
+
+# the default paths are relative to the repository, so the script runs from any working directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+CFG_DIR = os.path.join(ROOT_DIR, 'cfg')
+LOGS_DIR = os.path.join(ROOT_DIR, 'logs')
+# default configuration files of the pressure sensor models
+PRESSURE_MODEL_CONFIG_FILES = {'standardAtmosModel': os.path.join(CFG_DIR, 'StandardAtmosModelParam.toml'),
+                               'lookupTableAtmosModel': os.path.join(CFG_DIR, 'lookupTableAtmosModelParam.toml')}
+GPS_FILTER_CONFIG_FILE = os.path.join(CFG_DIR, 'gps_moving_avg_param.toml')
+
+
+def loadDataSet(data_dir: str, cache_dir: str = None):
+    """
+    loads the pressure, gps and ground truth data files of a data set into one array
+    :param data_dir: directory with the data files of the data set
+    :param cache_dir: directory to cache the parsed data files in, None to not cache them
+    :return: numpy array with the columns time, pressure, latitude, longitude, elevation and ground truth
+    """
+    pressure_data = readSensorDataArray(os.path.join(data_dir, 'pressure_sensor_data.txt'), 1, cache_dir)
+    gps_data = readSensorDataArray(os.path.join(data_dir, 'gps_sensor_data.txt'), 3, cache_dir)
+    ground_truth_data = readSensorDataArray(os.path.join(data_dir, 'ground_truth_data.txt'), 1, cache_dir)
+    assert len(pressure_data) == len(gps_data) == len(ground_truth_data), \
+        f"data files of {data_dir} have different lengths"
+    return np.column_stack((pressure_data, gps_data[:, 1:], ground_truth_data[:, 1]))
+
+
+def shareDataSet(data_set):
+    """
+    copies a data set to a new block of shared memory
+    :param data_set: numpy array of the data set
+    :return: the shared memory block
+    """
+    shared_data = shared_memory.SharedMemory(create=True, size=max(data_set.nbytes, 1))
+    np.ndarray(data_set.shape, dtype=np.float64, buffer=shared_data.buf)[:] = data_set
+    return shared_data
+
+
+def runScenario(scenario: dict):
+    """
+    runs the altimeter on one point of the grid with and without the gps data. Runs in a worker process.
+    :param scenario: dictionary with the name and shape of the shared memory holding the data set, the
+    pressure sensor model, the configuration files and the pressure data buffer size
+    :return: dictionary with the scenario and the root mean square errors
+    """
+    shared_data = shared_memory.SharedMemory(name=scenario['shared_memory_name'])
+    try:
+        data_set = np.ndarray(scenario['shape'], dtype=np.float64, buffer=shared_data.buf)
+        pressure_sensor_model = PressureSensorModels(scenario['pressure_sensor_model'],
+                                                     toml.load(scenario['pressure_sensor_model_config_file']))
+        gps_sensor_model = GPSSensorModels('standardGpsModel', toml.load(scenario['gps_sensor_model_config_file']))
+        pressure_sensor_filter = createFilter(toml.load(scenario['filter_config_file']))
+        gps_sensor_filter = createFilter(toml.load(scenario['gps_filter_config_file']))
+        bias_estimator_parameters = None
+        if scenario['bias_estimator_name'] == 'kalman':
+            bias_estimator_parameters = toml.load(scenario['kalman_config_file'])
+        altimeter = Altimeter(None, None, pressure_sensor_model, gps_sensor_model, pressure_sensor_filter,
+                              gps_sensor_filter, scenario['pressure_data_buffer_size'], None,
+                              bias_estimator_name=scenario['bias_estimator_name'],
+                              bias_estimator_parameters=bias_estimator_parameters)
+        times, pressures, gps_data, ground_truth_data = data_set[:, 0], data_set[:, 1], data_set[:, 2:5], data_set[:, 5]
+        # the altimeter outputs an elevation for every row with pressure or gps data
+        pressure_mask = ~np.isnan(pressures)
+        gps_mask = ~np.isnan(gps_data).any(axis=1)
+        output_data = altimeter.runBatch(times, pressures, gps_data)
+        output_data_without_gps = altimeter.runBatch(times, pressures)
+        result = {key: scenario[key] for key in ('data_dir', 'filter_config_file', 'pressure_data_buffer_size',
+                                                 'pressure_sensor_model', 'bias_estimator_name')}
+        result['rmse'] = float(np.sqrt(np.mean((output_data - ground_truth_data[pressure_mask | gps_mask]) ** 2)))
+        result['rmse_without_gps'] = float(np.sqrt(np.mean((output_data_without_gps -
+                                                            ground_truth_data[pressure_mask]) ** 2)))
+        return result
+    finally:
+        shared_data.close()
+
+
+def runSweep(data_dirs, filter_config_files, pressure_data_buffer_sizes,
+             pressure_sensor_models, gps_sensor_model_config_file, bias_estimator_names=('meanDifference',),
+             kalman_config_file=None, gps_filter_config_file=GPS_FILTER_CONFIG_FILE, max_workers=None, cache_dir=None):
+    """
+    runs the altimeter on every point of the grid on a pool of processes
+    :param data_dirs: list of data set directories
+    :param filter_config_files: list of pressure filter configuration files
+    :param pressure_data_buffer_sizes: list of pressure data buffer sizes
+    :param pressure_sensor_models: list of tuples pressure sensor model name, configuration file of the model
+    :param gps_sensor_model_config_file: configuration file of the gps sensor model
+    :param bias_estimator_names: list of bias estimators, 'meanDifference', 'timeAligned' or 'kalman'
+    :param kalman_config_file: configuration file of the kalman bias estimator
+    :param gps_filter_config_file: configuration file of the gps filter
+    :param max_workers: number of worker processes, None for the number of processors
+    :param cache_dir: directory to cache the parsed data files in, None to not cache them
+    :return: list of results in the order of the grid
+    """
+    shared_data_sets = {}
+    try:
+        scenarios = []
+        for data_dir in data_dirs:
+            data_set = loadDataSet(data_dir, cache_dir)
+            shared_data_sets[data_dir] = (shareDataSet(data_set), data_set.shape)
+        grid = itertools.product(data_dirs, filter_config_files, pressure_data_buffer_sizes, pressure_sensor_models,
+                                 bias_estimator_names)
+        for data_dir, filter_config_file, pressure_data_buffer_size, pressure_model, bias_estimator_name in grid:
+            pressure_sensor_model, pressure_model_config_file = pressure_model
+            shared_data, shape = shared_data_sets[data_dir]
+            scenarios.append({'data_dir': data_dir, 'filter_config_file': filter_config_file,
+                              'gps_filter_config_file': gps_filter_config_file,
+                              'pressure_data_buffer_size': pressure_data_buffer_size,
+                              'bias_estimator_name': bias_estimator_name, 'kalman_config_file': kalman_config_file,
+                              'shared_memory_name': shared_data.name, 'shape': shape,
+                              'pressure_sensor_model': pressure_sensor_model,
+                              'pressure_sensor_model_config_file': pressure_model_config_file,
+                              'gps_sensor_model_config_file': gps_sensor_model_config_file})
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(runScenario, scenarios))
+    finally:
+        for shared_data, _ in shared_data_sets.values():
+            shared_data.close()
+            shared_data.unlink()
+
+
+def writeResults(results, output_file: str):
+    """
+    writes the results of a sweep to a csv table
+    :param results: list of results returned by runSweep
+    :param output_file: path of the csv file
+    """
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['data_dir', 'filter_config_file', 'pressure_data_buffer_size',
+                                               'pressure_sensor_model', 'bias_estimator_name', 'rmse',
+                                               'rmse_without_gps'])
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data-dirs', nargs='+',
+                        default=[os.path.join(DATA_DIR, name)
+                                 for name in ['linear_data', 'sin_data', 'more_biased_linear', 'working_data']])
+    parser.add_argument('--filter-configs', nargs='+',
+                        default=[os.path.join(CFG_DIR, 'pressure_moving_avg_param.toml'),
+                                 os.path.join(CFG_DIR, 'gps_moving_avg_param.toml')],
+                        help='configuration files of the pressure filter')
+    parser.add_argument('--gps-filter-config', default=GPS_FILTER_CONFIG_FILE)
+    parser.add_argument('--buffer-sizes', nargs='+', type=int, default=[8, 16, 32, 64])
+    parser.add_argument('--pressure-models', nargs='+', choices=list(PRESSURE_MODEL_CONFIG_FILES),
+                        default=list(PRESSURE_MODEL_CONFIG_FILES))
+    parser.add_argument('--pressure-model-configs', nargs='+', default=None,
+                        help='configuration files of the pressure models in the order of --pressure-models, the '
+                             'default configuration of every model if not given')
+    parser.add_argument('--gps-model-config', default=os.path.join(CFG_DIR, 'standardGpsModelParam.toml'))
+    parser.add_argument('--bias-estimators', nargs='+', default=['meanDifference', 'timeAligned', 'kalman'])
+    parser.add_argument('--kalman-config', default=os.path.join(CFG_DIR, 'kalman_bias_param.toml'))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-dir', default=None, help='directory to cache the parsed data files in')
+    parser.add_argument('--output', default=os.path.join(LOGS_DIR, 'sweep_results.csv'))
+    args = parser.parse_args(argv)
+
+    pressure_model_configs = args.pressure_model_configs
+    if pressure_model_configs is None:
+        pressure_model_configs = [PRESSURE_MODEL_CONFIG_FILES[name] for name in args.pressure_models]
+    assert len(pressure_model_configs) == len(args.pressure_models), "one configuration file per pressure model"
+    results = runSweep(args.data_dirs, args.filter_configs, args.buffer_sizes,
+                       list(zip(args.pressure_models, pressure_model_configs)), args.gps_model_config,
+                       args.bias_estimators, args.kalman_config, args.gps_filter_config, args.workers, args.cache_dir)
+    writeResults(results, args.output)
+    for result in results:
+        print(f"{result['data_dir']:30} {result['filter_config_file']:40} {result['pressure_data_buffer_size']:6d} "
+              f"{result['pressure_sensor_model']:22} {result['bias_estimator_name']:15} {result['rmse']:12.4f} "
+              f"{result['rmse_without_gps']:12.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+
+from altimeter import Altimeter
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import MovingAverage1D
+from data_logger import DataLogger
+from metrics import AltimeterMetrics
+from output_sink import ListSink, CallbackSink, RingSink, ChunkedNumpySink, readOutputChunks
+from replay_sensor import PressureReplaySensor, GPSReplaySensor
+from simulation_utils import (loadPressureData, loadGPSData, pressureGpsLogDataSplitter,
+                              readPressureDataArrays, readGPSDataArrays, readSensorDataArray)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sin_data')
+
+
+class TestAltimeter(unittest.TestCase):
+
+    def setUp(self):
+        self.pressure_data_file = os.path.join(DATA_DIR, 'pressure_sensor_data.txt')
+        self.gps_data_file = os.path.join(DATA_DIR, 'gps_sensor_data.txt')
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, 'log.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def buildAltimeter(self, load_gps_data=True, pressure_data_buffer_size=16, bias_estimator_name='meanDifference'):
+        pressure_sensor = PressureSensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa')
+        gps_sensor = GPSSensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m')
+        loadPressureData(pressure_sensor, self.pressure_data_file)
+        if load_gps_data:
+            loadGPSData(gps_sensor, self.gps_data_file)
+        pressure_sensor_model = PressureSensorModels('standardAtmosModel',
+                                                     {'a': 44330.8, 'b': 4946.54, 'c': 0.1902632})
+        gps_sensor_model = GPSSensorModels('standardGpsModel', {'variance': 0.01})
+        pressure_sensor_filter = MovingAverage1D({'raw_data_window_size': 3, 'filtered_data_window_size': 0,
+                                                  'weights': [1.0, 1.0, 1.0]})
+        gps_sensor_filter = MovingAverage1D({'raw_data_window_size': 2, 'filtered_data_window_size': 0,
+                                             'weights': [1.0, 1.0]})
+        return Altimeter(pressure_sensor, gps_sensor, pressure_sensor_model, gps_sensor_model,
+                         pressure_sensor_filter, gps_sensor_filter, pressure_data_buffer_size,
+                         DataLogger(self.log_file, 'w'), max_idle_time=0.01, bias_estimator_name=bias_estimator_name)
+
+    def loadBatchData(self):
+        times, pressures = readPressureDataArrays(self.pressure_data_file)
+        _, gps_data = readGPSDataArrays(self.gps_data_file)
+        return times, pressures, gps_data
+
+    def testRunBatch(self):
+        times, pressures, gps_data = self.loadBatchData()
+        for pressure_data_buffer_size in [4, 16, 50]:
+            expected_output = self.buildAltimeter(True, pressure_data_buffer_size).run()
+            actual_output = self.buildAltimeter(True, pressure_data_buffer_size).runBatch(times, pressures, gps_data)
+            np.testing.assert_allclose(actual_output, expected_output, atol=1e-6)
+            expected_output = self.buildAltimeter(False, pressure_data_buffer_size).run()
+            actual_output = self.buildAltimeter(False, pressure_data_buffer_size).runBatch(times, pressures)
+            np.testing.assert_allclose(actual_output, expected_output, atol=1e-6)
+
+    def testRunBatchWithoutPressureData(self):
+        times, _, gps_data = self.loadBatchData()
+        pressures = np.full(len(times), np.nan)
+        altimeter = self.buildAltimeter()
+        expected_output = altimeter.runRows(times, pressures, gps_data)
+        self.assertEqual(len(expected_output), np.count_nonzero(~np.isnan(gps_data[:, 0])))
+        np.testing.assert_allclose(altimeter.runBatch(times, pressures, gps_data), expected_output, atol=1e-6)
+        self.assertEqual(len(altimeter.runBatch(np.empty(0), np.empty(0), np.empty((0, 3)))), 0)
+
+    def testGpsSensorFilter(self):
+        altimeter = self.buildAltimeter()
+        output = altimeter.run()
+        # the gps data is filtered with the gps sensor filter, not with the pressure sensor filter
+        altimeter = self.buildAltimeter()
+        altimeter.gps_sensor_filter = altimeter.pressure_sensor_filter
+        self.assertGreater(np.max(np.abs(np.array(altimeter.run()) - np.array(output))), 1e-6)
+        times, pressures, gps_data = self.loadBatchData()
+        altimeter = self.buildAltimeter()
+        altimeter.gps_sensor_filter = altimeter.pressure_sensor_filter
+        self.assertGreater(np.max(np.abs(altimeter.runBatch(times, pressures, gps_data) - np.array(output))), 1e-6)
+
+    def testKalmanBiasEstimator(self):
+        times, pressures, gps_data = self.loadBatchData()
+        expected_output = self.buildAltimeter(True, bias_estimator_name='kalman').run()
+        actual_output = self.buildAltimeter(True, bias_estimator_name='kalman').runBatch(times, pressures, gps_data)
+        np.testing.assert_allclose(actual_output, expected_output)
+        ground_truth_data = readSensorDataArray(os.path.join(DATA_DIR, 'ground_truth_data.txt'), 1)[:, 1]
+        mean_difference_output = self.buildAltimeter(True).run()
+        self.assertLess(np.sqrt(np.mean((np.array(expected_output) - ground_truth_data) ** 2)),
+                        np.sqrt(np.mean((np.array(mean_difference_output) - ground_truth_data) ** 2)))
+        # without gps data the bias is not observed and the pressure elevation is passed through
+        np.testing.assert_allclose(self.buildAltimeter(False, bias_estimator_name='kalman').run(),
+                                   self.buildAltimeter(False).run())
+
+    def testTimeAlignedBiasEstimator(self):
+        times, pressures, gps_data = self.loadBatchData()
+        expected_output = self.buildAltimeter(True, bias_estimator_name='timeAligned').run()
+        actual_output = self.buildAltimeter(True, bias_estimator_name='timeAligned').runBatch(times, pressures,
+                                                                                               gps_data)
+        np.testing.assert_allclose(actual_output, expected_output)
+        # time aligned pairs make the estimate less sensitive to the size of the buffers
+        ground_truth_data = readSensorDataArray(os.path.join(DATA_DIR, 'ground_truth_data.txt'), 1)[:, 1]
+        for pressure_data_buffer_size in [16, 50]:
+            time_aligned_output = self.buildAltimeter(True, pressure_data_buffer_size, 'timeAligned').run()
+            mean_difference_output = self.buildAltimeter(True, pressure_data_buffer_size).run()
+            self.assertLess(np.sqrt(np.mean((np.array(time_aligned_output) - ground_truth_data) ** 2)),
+                            np.sqrt(np.mean((np.array(mean_difference_output) - ground_truth_data) ** 2)))
+
+    def testReplaySensors(self):
+        expected_output = self.buildAltimeter().run()
+        pressure_data = readSensorDataArray(self.pressure_data_file, 1, self.directory.name, mmap_mode='r')
+        gps_data = readSensorDataArray(self.gps_data_file, 3, self.directory.name, mmap_mode='r')
+        for _ in range(2):
+            # every altimeter replays the same memory mapped data with its own cursor
+            altimeter = self.buildAltimeter(False)
+            altimeter.pressure_sensor = PressureReplaySensor(1, "PressureSensor", 'Pa', pressure_data)
+            altimeter.gps_sensor = GPSReplaySensor(2, "GpsSensor", 'm', gps_data)
+            np.testing.assert_allclose(altimeter.run(), expected_output)
+        self.assertIsInstance(pressure_data, np.memmap)
+        altimeter.pressure_sensor.rewind()
+        altimeter.gps_sensor.rewind()
+        altimeter.output_sink = ListSink()
+        np.testing.assert_allclose(asyncio.run(altimeter.runAsync()), expected_output)
+
+    def testRunAsync(self):
+        expected_output = self.buildAltimeter().run()
+        np.testing.assert_allclose(asyncio.run(self.buildAltimeter().runAsync()), expected_output)
+
+    def testRunAsyncWakesOnNewData(self):
+        altimeter = self.buildAltimeter()
+        altimeter.max_idle_time = 1.0
+        times, pressures, gps_data = self.loadBatchData()
+        expected_output = self.buildAltimeter().runBatch(times, pressures, gps_data)
+        # replace the preloaded data with data arriving after the altimeter starts waiting
+        altimeter.pressure_sensor.sensor_data_queue.clear()
+        altimeter.gps_sensor.sensor_data_queue.clear()
+        gps_values = [None if np.isnan(data[0]) else data for data in gps_data.tolist()]
+        add_listener = altimeter.gps_sensor.addListener
+
+        def feed():
+            altimeter.pressure_sensor.readCallbackMany(times, pressures)
+            altimeter.gps_sensor.readCallbackMany(times, gps_values)
+
+        def addListener(listener):
+            add_listener(listener)
+            # both listeners are registered, the data of the two sensors is pushed together once the altimeter waits
+            asyncio.get_running_loop().call_soon(feed)
+
+        altimeter.gps_sensor.addListener = addListener
+        actual_output = asyncio.run(altimeter.runAsync())
+        np.testing.assert_allclose(actual_output, expected_output, atol=1e-6)
+
+    def testMetrics(self):
+        expected_output = self.buildAltimeter().run()
+        altimeter = self.buildAltimeter()
+        self.assertIsNone(altimeter.metrics())
+        altimeter.metrics_recorder = AltimeterMetrics()
+        np.testing.assert_allclose(altimeter.run(), expected_output)
+        times, pressures, gps_data = self.loadBatchData()
+        metrics = altimeter.metrics()
+        self.assertEqual(metrics['counters']['pressure_samples'], len(times))
+        self.assertEqual(metrics['counters']['gps_fixes'], np.count_nonzero(~np.isnan(gps_data[:, 0])))
+        self.assertEqual(metrics['counters']['outputs'], len(expected_output))
+        for stage in ['pressure_filter', 'pressure_model', 'pressure_bias', 'gps_filter', 'gps_model', 'gps_bias']:
+            self.assertGreater(metrics['stages'][stage]['total_ms'], 0.0)
+            self.assertLessEqual(metrics['stages'][stage]['p50_us'], metrics['stages'][stage]['max_us'])
+        self.assertEqual(metrics['buffer_fill']['pressure_sensor'], 1.0)
+        # whether the run waited for data depends on the timing, so a read without data is forced
+        idle_waits = metrics['counters'].get('idle_waits', 0)
+        altimeter.max_idle_time = 60.0
+        altimeter.last_activity_time = time.time()
+        self.assertEqual(altimeter.readData(), ([], [], False))
+        self.assertEqual(altimeter.metrics()['counters']['idle_waits'], idle_waits + 1)
+
+    def testOutputSinks(self):
+        expected_output = self.buildAltimeter().run()
+        times = readSensorDataArray(self.pressure_data_file, 1)[:, 0]
+        altimeter = self.buildAltimeter()
+        outputs = altimeter.runIter()
+        # the outputs are seen before the end of the run
+        self.assertAlmostEqual(next(outputs), expected_output[0])
+        np.testing.assert_allclose([expected_output[0]] + list(outputs), expected_output)
+        altimeter = self.buildAltimeter()
+        altimeter.output_sink = RingSink(10)
+        np.testing.assert_allclose(altimeter.run(), expected_output[-10:])
+        np.testing.assert_array_equal(altimeter.output_sink.buffer.times, times[-10:])
+        batches = []
+        altimeter = self.buildAltimeter()
+        altimeter.output_sink = CallbackSink(lambda time_stamps, elevations: batches.append(elevations))
+        self.assertIsNone(altimeter.run())
+        self.assertGreater(len(batches), 1)
+        np.testing.assert_allclose(np.concatenate(batches), expected_output)
+        with tempfile.TemporaryDirectory() as directory:
+            altimeter = self.buildAltimeter()
+            altimeter.output_sink = ChunkedNumpySink(directory, chunk_size=100)
+            file_names = altimeter.run()
+            self.assertEqual(len(file_names), -(-len(expected_output) // 100))
+            output = np.concatenate(list(readOutputChunks(file_names, mmap_mode='r')))
+            np.testing.assert_array_equal(output[:, 0], times)
+            np.testing.assert_allclose(output[:, 1], expected_output)
+
+    def testLogSplit(self):
+        self.buildAltimeter().run()
+        times, pressures, gps_data = self.loadBatchData()
+        pressure_data_file = os.path.join(self.directory.name, 'pressure_sensor_data.txt')
+        gps_data_file = os.path.join(self.directory.name, 'gps_sensor_data.txt')
+        pressureGpsLogDataSplitter(self.log_file, pressure_data_file, gps_data_file)
+        split_pressure_data = np.loadtxt(pressure_data_file, delimiter=',')
+        np.testing.assert_array_equal(split_pressure_data[:, 0], times)
+        np.testing.assert_array_equal(split_pressure_data[:, 1], pressures)
+        with open(gps_data_file, 'r') as f:
+            split_gps_data = [line.strip().split(',') for line in f if "None" not in line]
+        gps_mask = ~np.isnan(gps_data[:, 0])
+        np.testing.assert_array_equal([float(d[0]) for d in split_gps_data], times[gps_mask])
+        np.testing.assert_array_equal([float(d[3]) for d in split_gps_data], gps_data[gps_mask, 2])
+        # extract a time range
+        pressureGpsLogDataSplitter(self.log_file, pressure_data_file, gps_data_file, start_time=100, end_time=199)
+        split_pressure_data = np.loadtxt(pressure_data_file, delimiter=',')
+        np.testing.assert_array_equal(split_pressure_data[:, 0], times[100:200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import unittest
+import numpy as np
+
+from altimeter import Altimeter
+from altimeter_pool import AltimeterPool, WindowArray
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import MovingAverage1D
+from simulation_utils import readPressureDataArrays, readGPSDataArrays
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+
+def loadBatchData(data_set):
+    times, pressures = readPressureDataArrays(os.path.join(DATA_DIR, data_set, 'pressure_sensor_data.txt'))
+    _, gps_data = readGPSDataArrays(os.path.join(DATA_DIR, data_set, 'gps_sensor_data.txt'))
+    return times, pressures, gps_data
+
+
+class TestWindowArray(unittest.TestCase):
+
+    def testPush(self):
+        windows = WindowArray(n_vehicles=2, window_size=3)
+        np.testing.assert_array_equal(windows.means(np.array([0, 1])), [0.0, 0.0])
+        test_data = [1.0, 3.0, 4.0, 2.0, 5.0, 6.0, 8.0]
+        for i, data in enumerate(test_data):
+            windows.push(np.array([0]), np.array([data]))
+            self.assertAlmostEqual(windows.means(np.array([0]))[0], np.mean(test_data[max(0, i - 2):i + 1]))
+            if i > 0:
+                np.testing.assert_array_equal(windows.recent(np.array([0]), 2)[0], test_data[i - 1:i + 1][::-1])
+        self.assertEqual(windows.counts[1], 0)
+
+
+class TestAltimeterPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pressure_sensor_model = PressureSensorModels('standardAtmosModel',
+                                                          {'a': 44330.8, 'b': 4946.54, 'c': 0.1902632})
+        self.gps_sensor_model = GPSSensorModels('standardGpsModel', {'variance': 0.01})
+        self.sensor_filter = MovingAverage1D({'raw_data_window_size': 3, 'filtered_data_window_size': 0,
+                                              'weights': [1.0, 1.0, 1.0]})
+
+    def testMatchesAltimeter(self):
+        data_sets = ['linear_data', 'sin_data', 'more_biased_linear']
+        for pressure_data_buffer_size in [4, 16]:
+            pool = AltimeterPool(len(data_sets), self.pressure_sensor_model, self.gps_sensor_model,
+                                 self.sensor_filter, self.sensor_filter, pressure_data_buffer_size)
+            altimeter = Altimeter(None, None, self.pressure_sensor_model, self.gps_sensor_model,
+                                  self.sensor_filter, self.sensor_filter, pressure_data_buffer_size, None)
+            data = [loadBatchData(data_set) for data_set in data_sets]
+            expected_output = [altimeter.runBatch(*d) for d in data]
+            # interleave the rows of the vehicles in a random order, keeping the order of the rows of a vehicle
+            vehicle_ids = np.concatenate([np.full(len(d[0]), i) for i, d in enumerate(data)])
+            np.random.default_rng(0).shuffle(vehicle_ids)
+            row_index = np.empty(len(vehicle_ids), dtype=int)
+            for i in range(len(data)):
+                row_index[vehicle_ids == i] = np.arange(len(data[i][0]))
+            times = np.array([data[v][0][r] for v, r in zip(vehicle_ids, row_index)])
+            pressures = np.array([data[v][1][r] for v, r in zip(vehicle_ids, row_index)])
+            gps = np.array([data[v][2][r] for v, r in zip(vehicle_ids, row_index)])
+            # feed the samples in two batches
+            half = len(vehicle_ids) // 2
+            output = np.concatenate([pool.processSamples(vehicle_ids[:half], times[:half], pressures[:half], gps[:half]),
+                                     pool.processSamples(vehicle_ids[half:], times[half:], pressures[half:], gps[half:])])
+            for i in range(len(data)):
+                np.testing.assert_allclose(output[vehicle_ids == i], expected_output[i], atol=1e-6)
+            np.testing.assert_allclose(pool.state, [o[-1] for o in expected_output], atol=1e-6)
+
+    def testTimeOrder(self):
+        pool = AltimeterPool(2, self.pressure_sensor_model, self.gps_sensor_model, self.sensor_filter,
+                             self.sensor_filter, 4)
+        pool.processSamples([0, 1, 0], [1.0, 5.0, 2.0], [101000.0, 101000.0, 101000.0])
+        # the rows of a vehicle go back in time within a batch and across batches
+        with self.assertRaises(AssertionError):
+            pool.processSamples([0, 0], [4.0, 3.0], [101000.0, 101000.0])
+        with self.assertRaises(AssertionError):
+            pool.processSamples([0, 1], [3.0, 4.0], [101000.0, 101000.0])
+        pool.processSamples([1, 0], [5.0, 2.0], [101000.0, 101000.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
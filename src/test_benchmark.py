@@ -0,0 +1,37 @@
+import unittest
+
+from benchmark import combineRepeats, compareResults
+
+
+def result(p50_us, throughput_per_s):
+    return {'p50_us': p50_us, 'p99_us': 2 * p50_us, 'mean_us': p50_us, 'throughput_per_s': throughput_per_s}
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def testCombineRepeats(self):
+        results = combineRepeats([{'a': result(1.0, 100.0)}, {'a': result(3.0, 80.0)}, {'a': result(2.0, 90.0)}])
+        self.assertEqual(results['a']['p50_us'], 2.0)
+        self.assertEqual(results['a']['p99_us'], 4.0)
+        self.assertEqual(results['a']['throughput_per_s'], 90.0)
+        # the spread of the p50 latency is the largest relative spread
+        self.assertEqual(results['a']['noise'], 1.0)
+
+    def testCompareResults(self):
+        baseline = {'a': dict(result(10.0, 100.0), noise=0.0), 'b': dict(result(10.0, 100.0), noise=0.0)}
+        results = {'a': dict(result(13.0, 100.0), noise=0.0), 'b': dict(result(10.0, 70.0), noise=0.0),
+                   'c': dict(result(100.0, 1.0), noise=0.0)}
+        self.assertEqual(compareResults(results, baseline, 0.2), ['a', 'b'])
+        # a slowdown within the noise of the repeats is not a regression
+        results['a']['noise'] = 0.2
+        baseline['b']['noise'] = 0.5
+        self.assertEqual(compareResults(results, baseline, 0.2), [])
+        # baselines written without the noise are compared with the tolerance only
+        del baseline['a']['noise']
+        self.assertEqual(compareResults(results, baseline, 0.2), [])
+        results['a']['noise'] = 0.0
+        self.assertEqual(compareResults(results, baseline, 0.2), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import numpy as np
+
+from bias_estimator import (RunningMean, MeanDifferenceBiasEstimator, KalmanBiasEstimator, TimeAlignedBiasEstimator,
+                            createBiasEstimator, rollingMean)
+
+class TestRunningMean(unittest.TestCase):
+
+    def setUp(self):
+        self.running_mean = RunningMean(3)
+
+    def testMethodAttribute(self):
+        with self.assertRaises(AssertionError):
+            RunningMean(0)
+
+    def testRunningMean(self):
+        self.assertEqual(self.running_mean.mean, 0.0)
+        test_data = [1.0, 3.0, 4.0, 2.0, 5.0, 6.0, 8.0, 9.0, 1.5]
+        for i, data in enumerate(test_data):
+            self.running_mean.push(data)
+            window = test_data[max(0, i - 2):i + 1]
+            self.assertEqual(len(self.running_mean), len(window))
+            self.assertAlmostEqual(self.running_mean.mean, float(np.mean(window)))
+            self.assertEqual(self.running_mean.last, data)
+
+    def testRollingMean(self):
+        test_data = np.array([1.0, 3.0, 4.0, 2.0, 5.0, 6.0, 8.0, 9.0, 1.5])
+        expected_means = []
+        for data in test_data:
+            self.running_mean.push(float(data))
+            expected_means.append(self.running_mean.mean)
+        np.testing.assert_allclose(rollingMean(test_data, 3), expected_means)
+        self.assertEqual(len(rollingMean(np.array([]), 3)), 0)
+
+
+class TestMeanDifferenceBiasEstimator(unittest.TestCase):
+
+    def testBias(self):
+        estimator = MeanDifferenceBiasEstimator(pressure_window_size=2, gps_window_size=1)
+        estimator.updatePressure(10.0)
+        estimator.updatePressure(20.0)
+        self.assertEqual(estimator.bias, 0.0)
+        estimator.updateGps(18.0)
+        self.assertAlmostEqual(estimator.bias, 3.0)
+        # bias is only updated on gps samples
+        estimator.updatePressure(30.0)
+        self.assertAlmostEqual(estimator.bias, 3.0)
+        estimator.updateGps(27.0)
+        self.assertAlmostEqual(estimator.bias, 2.0)
+
+
+class TestKalmanBiasEstimator(unittest.TestCase):
+
+    def testMethodAttribute(self):
+        with self.assertRaises(AssertionError):
+            KalmanBiasEstimator(gps_variance=0.0)
+        with self.assertRaises(AssertionError):
+            createBiasEstimator('random_estimator', 2, 1)
+        self.assertIsInstance(createBiasEstimator('meanDifference', 2, 1), MeanDifferenceBiasEstimator)
+        self.assertIsInstance(createBiasEstimator('kalman', 2, 1, {'gps_variance': 0.01}), KalmanBiasEstimator)
+
+    def testBiasWithoutGps(self):
+        estimator = KalmanBiasEstimator(gps_variance=0.01)
+        for elevation in np.linspace(0.0, 50.0, 100):
+            estimator.updatePressure(float(elevation))
+        self.assertEqual(estimator.bias, 0.0)
+
+    def testBiasConvergence(self):
+        rng = np.random.default_rng(0)
+        estimator = KalmanBiasEstimator(gps_variance=0.01, pressure_variance=1.0, bias_process_variance=1e-4)
+        elevations = np.linspace(0.0, 50.0, 500)
+        for i, elevation in enumerate(elevations):
+            # the pressure elevation reads 7 m low
+            estimator.updatePressure(float(elevation - 7.0 + rng.normal(0.0, 1.0)))
+            if i % 10 == 0:
+                estimator.updateGps(float(elevation + rng.normal(0.0, 0.1)))
+        self.assertAlmostEqual(estimator.bias, 7.0, delta=0.5)
+
+
+class TestTimeAlignedBiasEstimator(unittest.TestCase):
+
+    def testPressureElevationAt(self):
+        estimator = TimeAlignedBiasEstimator(pressure_window_size=3, gps_window_size=2)
+        self.assertIsInstance(createBiasEstimator('timeAligned', 3, 2), TimeAlignedBiasEstimator)
+        estimator.updateGps(5.0, 0.0)
+        self.assertEqual(estimator.bias, 0.0)
+        for time_stamp, elevation in [(0.0, 10.0), (1.0, 20.0), (2.0, 40.0), (3.0, 70.0)]:
+            estimator.updatePressure(elevation, time_stamp)
+        # the oldest sample is evicted from the window
+        self.assertEqual(estimator.pressureElevationAt(0.5), 20.0)
+        self.assertEqual(estimator.pressureElevationAt(2.0), 40.0)
+        self.assertAlmostEqual(estimator.pressureElevationAt(1.25), 25.0)
+        self.assertAlmostEqual(estimator.pressureElevationAt(2.5), 55.0)
+        self.assertEqual(estimator.pressureElevationAt(4.0), 70.0)
+
+    def testBias(self):
+        estimator = TimeAlignedBiasEstimator(pressure_window_size=4, gps_window_size=2)
+        mean_difference_estimator = MeanDifferenceBiasEstimator(pressure_window_size=4, gps_window_size=2)
+        elevations = np.linspace(0.0, 100.0, 101)
+        for time_stamp, elevation in enumerate(elevations.tolist()):
+            # the pressure elevation reads 7 m low while climbing, gps fixes arrive every 10 samples
+            estimator.updatePressure(elevation - 7.0, float(time_stamp))
+            mean_difference_estimator.updatePressure(elevation - 7.0)
+            if time_stamp % 10 == 5:
+                estimator.updateGps(elevation, time_stamp - 0.5)
+                mean_difference_estimator.updateGps(elevation)
+                self.assertAlmostEqual(estimator.bias, 7.5)
+        # the mean difference compares windows spanning different times
+        self.assertGreater(abs(mean_difference_estimator.bias - 7.0), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
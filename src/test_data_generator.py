@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from data_generator import BurstyGpsFix, generateScenario, generateSensorData, writeScenario
+from simulation_utils import readSensorDataArray
+
+
+class TestDataGenerator(unittest.TestCase):
+
+    def testMethodAttribute(self):
+        with self.assertRaises(AssertionError):
+            next(generateScenario(10, profile='random_profile'))
+        with self.assertRaises(AssertionError):
+            next(generateScenario(10, bias_model='random_bias'))
+        with self.assertRaises(AssertionError):
+            next(generateScenario(10, gps_model='random_gps'))
+        with self.assertRaises(AssertionError):
+            generateScenario(10, gps_fix_probability=1.5)
+        with self.assertRaises(AssertionError):
+            BurstyGpsFix(0.1, 0.5, np.random.default_rng(0))
+
+    def testSeededChunks(self):
+        for parameters in [{}, {'profile': 'sinusoidal', 'bias_model': 'drift', 'gps_model': 'bursty'}]:
+            chunks = list(generateScenario(1000, chunk_size=300, rng=np.random.default_rng(1), **parameters))
+            self.assertEqual([len(chunk[0]) for chunk in chunks], [300, 300, 300, 100])
+            np.testing.assert_array_equal(np.concatenate([chunk[0] for chunk in chunks]), np.arange(1000))
+            same_chunks = list(generateScenario(1000, chunk_size=300, rng=np.random.default_rng(1), **parameters))
+            for chunk, same_chunk in zip(chunks, same_chunks):
+                for array, same_array in zip(chunk, same_chunk):
+                    np.testing.assert_array_equal(array, same_array)
+
+    def testBurstyGpsFix(self):
+        bursty_gps_fix = BurstyGpsFix(0.2, 10.0, np.random.default_rng(0))
+        gps_fix = np.concatenate([bursty_gps_fix.sample(n) for n in [0, 1, 7, 1000, 200000]])
+        self.assertEqual(len(gps_fix), 201008)
+        self.assertAlmostEqual(gps_fix.mean(), 0.2, delta=0.02)
+        edges = np.diff(np.concatenate(([0], gps_fix.astype(int), [0])))
+        burst_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        self.assertAlmostEqual(burst_lengths.mean(), 10.0, delta=1.0)
+
+    def testBurstyScenario(self):
+        rng = np.random.default_rng(3)
+        times, height, pressure_data, gps_data, gps_fix = next(generateScenario(
+            100, gps_model='bursty', gps_fix_probability=0.2, chunk_size=100, rng=rng))
+        # the fixes are only drawn from the bursts, no uniform fixes are drawn
+        expected_rng = np.random.default_rng(3)
+        expected_gps_fix = BurstyGpsFix(0.2, 20.0, expected_rng).sample(100)
+        expected_data = generateSensorData(height, 500.0 * times / 99, 0.2, expected_rng, expected_gps_fix)
+        for array, expected_array in zip((pressure_data, gps_data, gps_fix), expected_data):
+            np.testing.assert_array_equal(array, expected_array)
+        self.assertEqual(rng.random(), expected_rng.random())
+
+    def testWriteScenario(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for output_format in ['text', 'npy']:
+                scenario = generateScenario(500, gps_model='bursty', chunk_size=128, rng=np.random.default_rng(2))
+                writeScenario(scenario, directory, output_format)
+            for name, n_values in [('ground_truth_data', 1), ('pressure_sensor_data', 1), ('gps_sensor_data', 3)]:
+                text_data = readSensorDataArray(os.path.join(directory, f'{name}.txt'), n_values)
+                np.testing.assert_array_equal(text_data, np.load(os.path.join(directory, f'{name}.npy')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from data_logger import DataLogger, STOP_WRITER
+from binary_log import BinaryLogReader, binaryLogFileName
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from simulation_utils import loadBinaryLogData
+
+class TestDataLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'log.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testMethodAttribute(self):
+        data_logger = DataLogger(self.file_name)
+        with self.assertRaises(ValueError):
+            data_logger.log(0.0, 'pressure_sensor', 1.0)
+        with self.assertRaises(ValueError):
+            data_logger.stop()
+
+    def testLog(self):
+        data_logger = DataLogger(self.file_name, 'w', max_queue_size=4, flush_count=3)
+        data_logger.start()
+        # starting twice keeps the same writer
+        data_logger.start()
+        for i in range(10):
+            data_logger.log(float(i), 'pressure_sensor', 100.0 + i)
+        data_logger.log(10.0, 'gps_sensor', (1.0, 2.0, 3.0))
+        self.assertLessEqual(data_logger.data_queue.qsize(), 4)
+        data_logger.stop()
+        with open(self.file_name, 'r') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[0], "[0.0] pressure_sensor 100.0")
+        self.assertEqual(lines[-1], "[10.0] gps_sensor (1.0, 2.0, 3.0)")
+        with self.assertRaises(ValueError):
+            data_logger.stop()
+
+    def testStop(self):
+        data_logger = DataLogger(self.file_name, 'w', flush_count=10)
+        # data queued after the end of the data, eg by a thread logging while the logger stops
+        data_logger.data_queue.put((0.0, 'pressure_sensor', 100.0))
+        data_logger.data_queue.put(STOP_WRITER)
+        data_logger.data_queue.put((1.0, 'pressure_sensor', 101.0))
+        data_logger.start()
+        data_logger.writer.join(timeout=5.0)
+        self.assertFalse(data_logger.writer.is_alive())
+        self.assertIsNone(data_logger.writer_error)
+        data_logger.stopping = True
+        with self.assertRaises(ValueError):
+            data_logger.log(2.0, 'pressure_sensor', 102.0)
+        data_logger.stop()
+        with open(self.file_name, 'r') as f:
+            self.assertEqual(f.read().splitlines(), ["[0.0] pressure_sensor 100.0"])
+
+    def testNoRotationWithoutBackups(self):
+        data_logger = DataLogger(self.file_name, 'w', flush_count=1, max_file_bytes=100)
+        data_logger.start()
+        for i in range(20):
+            data_logger.log(float(i), 'pressure_sensor', 100000.0 + i)
+        data_logger.stop()
+        # the data is kept in the log file instead of being deleted on rotation
+        with open(self.file_name, 'r') as f:
+            self.assertEqual(len(f.read().splitlines()), 20)
+        self.assertFalse(os.path.exists(self.file_name + '.1'))
+
+    def testRotation(self):
+        data_logger = DataLogger(self.file_name, 'w', flush_count=1, max_file_bytes=100, backup_count=2)
+        data_logger.start()
+        for i in range(20):
+            data_logger.log(float(i), 'pressure_sensor', 100000.0 + i)
+        data_logger.stop()
+        lines = []
+        for file_name in [self.file_name + '.2', self.file_name + '.1', self.file_name]:
+            self.assertTrue(os.path.exists(file_name))
+            self.assertLessEqual(os.path.getsize(file_name), 100 + 40)
+            with open(file_name, 'r') as f:
+                lines += f.read().splitlines()
+        self.assertFalse(os.path.exists(self.file_name + '.3'))
+        # only the most recent data is kept
+        self.assertEqual(lines[-1], "[19.0] pressure_sensor 100019.0")
+        self.assertEqual([float(line.split()[-1]) for line in lines], [100000.0 + i for i in range(20 - len(lines), 20)])
+
+    def testBinaryLog(self):
+        file_name = os.path.join(self.directory.name, 'log.bin')
+        data_logger = DataLogger(file_name, 'w', flush_count=3, log_format='binary')
+        data_logger.start()
+        for i in range(10):
+            data_logger.log(float(i), 'pressure_sensor', 100.0 + i)
+            if i % 3 == 0:
+                data_logger.log(float(i), 'gps_sensor', (1.0, 2.0, float(i)))
+        data_logger.stop()
+        self.assertEqual(os.path.getsize(binaryLogFileName(file_name, 'pressure_sensor')), 10 * 16)
+
+        pressure_log = BinaryLogReader(file_name, 'pressure_sensor')
+        self.assertEqual(len(pressure_log), 10)
+        np.testing.assert_array_equal(pressure_log.times, np.arange(10.0))
+        np.testing.assert_array_equal(pressure_log.column('pressure'), 100.0 + np.arange(10.0))
+        # columns are views into the mapped file
+        self.assertIsInstance(pressure_log.times.base, np.memmap)
+        self.assertEqual(pressure_log.seek(4.5), 5)
+        np.testing.assert_array_equal(pressure_log.between(2.0, 4.0)['time'], [2.0, 3.0, 4.0])
+        gps_log = BinaryLogReader(file_name, 'gps_sensor')
+        np.testing.assert_array_equal(gps_log.column('elevation'), [0.0, 3.0, 6.0, 9.0])
+
+        pressure_sensor = PressureSensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa')
+        gps_sensor = GPSSensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m')
+        loadBinaryLogData(pressure_sensor, gps_sensor, file_name, start_time=2.0, end_time=6.0)
+        self.assertEqual(pressure_sensor.publishMany(10), [(float(i), 100.0 + i) for i in range(2, 7)])
+        self.assertEqual(gps_sensor.publishMany(10), [None, (3.0, 1.0, 2.0, 3.0), None, None, (6.0, 1.0, 2.0, 6.0)])
+
+    def testPressureOnlyBinaryLog(self):
+        file_name = os.path.join(self.directory.name, 'log.bin')
+        data_logger = DataLogger(file_name, 'w', log_format='binary')
+        data_logger.start()
+        for i in range(5):
+            data_logger.log(float(i), 'pressure_sensor', 100.0 + i)
+        data_logger.stop()
+        # the gps file is never created without a gps fix
+        self.assertFalse(os.path.exists(binaryLogFileName(file_name, 'gps_sensor')))
+        self.assertEqual(len(BinaryLogReader(file_name, 'gps_sensor')), 0)
+        pressure_sensor = PressureSensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa')
+        gps_sensor = GPSSensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m')
+        loadBinaryLogData(pressure_sensor, gps_sensor, file_name)
+        self.assertEqual(pressure_sensor.publishMany(10), [(float(i), 100.0 + i) for i in range(5)])
+        self.assertEqual(gps_sensor.publishMany(10), [None] * 5)
+
+    def testReusedBinaryLog(self):
+        file_name = os.path.join(self.directory.name, 'log.bin')
+        data_logger = DataLogger(file_name, 'w', log_format='binary')
+        data_logger.start()
+        data_logger.log(0.0, 'pressure_sensor', 100.0)
+        data_logger.log(0.0, 'gps_sensor', (1.0, 2.0, 3.0))
+        data_logger.stop()
+        # the gps data of the first run is not read as data of the second run
+        data_logger.start()
+        data_logger.log(1.0, 'pressure_sensor', 101.0)
+        data_logger.stop()
+        self.assertEqual(BinaryLogReader(file_name, 'pressure_sensor').records['time'].tolist(), [1.0])
+        self.assertEqual(len(BinaryLogReader(file_name, 'gps_sensor')), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -49,5 +49,89 @@ class TestMovingAverage1D(unittest.TestCase):
         for actual, expected in zip(actual_filtered_data, expected_filtered_data):
             self.assertAlmostEqual(actual, expected)
 
+    def testMovingAvgBatch(self):
+        test_data = [1.0, 3.0, 4.0, 2.0, 5.0, 6.0, 8.0, 9.0, 1.5]
+        expected_filtered_data = [self.filter.apply(test_data[:i + 1], []) for i in range(len(test_data))]
+        np.testing.assert_allclose(self.filter.applyBatch(np.array(test_data)), expected_filtered_data)
+        # generic batch implementation of the base class
+        np.testing.assert_allclose(Filters.applyBatch(self.filter, np.array(test_data)), expected_filtered_data)
+        self.assertEqual(len(self.filter.applyBatch(np.empty(0))), 0)
+
+    def testMovingAvgIncremental(self):
+        test_data = [1.0, 3.0, 4.0, 2.0, 5.0, 6.0, 8.0, 9.0, 1.5]
+        expected_filtered_data = [self.filter.apply(test_data[:i + 1], []) for i in range(len(test_data))]
+        actual_filtered_data = [self.filter.applyIncremental(data) for data in test_data]
+        np.testing.assert_allclose(actual_filtered_data, expected_filtered_data)
+        self.filter.reset()
+        self.assertEqual(self.filter.applyIncremental(10.0), 10.0)
+
+
+class TestIIRFilters(unittest.TestCase):
+
+    def setUp(self):
+        self.filters = [
+            ExponentialMovingAverage1D({'raw_data_window_size': 1, 'filtered_data_window_size': 1, 'alpha': 0.25}),
+            BiquadLowPass1D({'raw_data_window_size': 3, 'filtered_data_window_size': 2, 'cutoff_frequency': 0.1,
+                             'sample_frequency': 1.0, 'quality_factor': 0.7071}),
+            AlphaBeta1D({'raw_data_window_size': 2, 'filtered_data_window_size': 2, 'alpha': 0.5, 'beta': 0.2})]
+        self.test_data = np.random.default_rng(0).normal(0.0, 1.0, 1000).cumsum()
+
+    def testMethodAttribute(self):
+        with self.assertRaises(AssertionError):
+            ExponentialMovingAverage1D({'raw_data_window_size': 1, 'filtered_data_window_size': 1})
+        with self.assertRaises(AssertionError):
+            ExponentialMovingAverage1D({'raw_data_window_size': 1, 'filtered_data_window_size': 1, 'alpha': 1.5})
+        with self.assertRaises(AssertionError):
+            ExponentialMovingAverage1D({'raw_data_window_size': 3, 'filtered_data_window_size': 1, 'alpha': 0.5})
+        with self.assertRaises(AssertionError):
+            BiquadLowPass1D({'raw_data_window_size': 3, 'filtered_data_window_size': 2, 'cutoff_frequency': 0.6,
+                             'sample_frequency': 1.0, 'quality_factor': 0.7071})
+        with self.assertRaises(AssertionError):
+            AlphaBeta1D({'raw_data_window_size': 2, 'filtered_data_window_size': 2, 'alpha': 0.5, 'beta': 3.5})
+        with self.assertRaises(AssertionError):
+            createFilter({'filter_type': 'random_filter'})
+        self.assertIsInstance(createFilter({'raw_data_window_size': 1, 'filtered_data_window_size': 0,
+                                            'weights': [1.0]}), MovingAverage1D)
+
+    def testExponentialMovingAverage(self):
+        sensor_filter = self.filters[0]
+        expected_filtered_data = [self.test_data[0]]
+        for data in self.test_data[1:]:
+            expected_filtered_data.append(expected_filtered_data[-1] + 0.25 * (data - expected_filtered_data[-1]))
+        actual_filtered_data = [sensor_filter.applyIncremental(data) for data in self.test_data]
+        np.testing.assert_allclose(actual_filtered_data, expected_filtered_data)
+
+    def testAlphaBeta(self):
+        position, velocity = self.test_data[1], self.test_data[1] - self.test_data[0]
+        expected_filtered_data = [self.test_data[0], self.test_data[1]]
+        for data in self.test_data[2:]:
+            residual = data - position - velocity
+            position, velocity = position + velocity + 0.5 * residual, velocity + 0.2 * residual
+            expected_filtered_data.append(position)
+        actual_filtered_data = [self.filters[2].applyIncremental(data) for data in self.test_data]
+        np.testing.assert_allclose(actual_filtered_data, expected_filtered_data)
+
+    def testBiquadLowPass(self):
+        sensor_filter = self.filters[1]
+        # unit gain at zero frequency and strong attenuation at the Nyquist frequency
+        self.assertAlmostEqual(sum(sensor_filter.feedforward_weights) / (1 + sum(sensor_filter.feedback_weights)), 1.0)
+        output = sensor_filter.applyBatch(np.tile([1.0, -1.0], 200))
+        self.assertLess(np.abs(output[-100:]).max(), 0.05)
+
+    def testIIRBatch(self):
+        for sensor_filter in self.filters:
+            expected_filtered_data = [sensor_filter.applyIncremental(data) for data in self.test_data]
+            sensor_filter.reset()
+            np.testing.assert_allclose(sensor_filter.applyBatch(self.test_data), expected_filtered_data)
+            np.testing.assert_allclose(sensor_filter.applyBatch(self.test_data[:2]), expected_filtered_data[:2])
+            # the filters only use the filtered history of a ring buffer
+            raw_data, filtered_data = RingBuffer(16), RingBuffer(16)
+            for data, expected in zip(self.test_data, expected_filtered_data):
+                raw_data.push(0.0, data)
+                filtered = sensor_filter.apply(raw_data, filtered_data)
+                filtered_data.push(0.0, filtered)
+                self.assertAlmostEqual(filtered, expected)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from altimeter import Altimeter
+from multi_sensor_altimeter import MultiSensorAltimeter, fuseReadings
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import MovingAverage1D
+from data_logger import DataLogger
+from metrics import AltimeterMetrics
+from output_sink import CallbackSink
+from simulation_utils import readPressureDataArrays, readGPSDataArrays
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sin_data')
+
+
+class FailingPressureSensor(PressureSensor):
+
+    def __init__(self, sensor_id: int, sensor_name: str, data_unit: int, n_batches: int):
+        super(FailingPressureSensor, self).__init__(sensor_id, sensor_name, data_unit)
+        self.n_batches = n_batches
+
+    def publishMany(self, max_n: int):
+        self.n_batches -= 1
+        if self.n_batches < 0:
+            raise IOError("sensor disconnected")
+        return super(FailingPressureSensor, self).publishMany(max_n)
+
+
+class TestFuseReadings(unittest.TestCase):
+
+    def testInverseVarianceWeights(self):
+        times, values, variances = fuseReadings([np.array([0.0, 1.0, 2.0]), np.array([1.0, 1.5])],
+                                                [np.array([[10.0], [20.0], [30.0]]), np.array([[23.0], [40.0]])],
+                                                [1.0, 2.0])
+        np.testing.assert_array_equal(times, [0.0, 1.0, 1.5, 2.0])
+        np.testing.assert_allclose(values[:, 0], [10.0, (20.0 + 23.0 / 2) / 1.5, 40.0, 30.0])
+        np.testing.assert_allclose(variances, [1.0, 1 / 1.5, 2.0, 1.0])
+        times, values, _ = fuseReadings([np.array([0.0, 1.0]), np.array([0.1, 0.9])],
+                                        [np.array([[1.0, 2.0], [3.0, 4.0]]), np.array([[3.0, 4.0], [5.0, 6.0]])],
+                                        [1.0, 1.0], time_resolution=1.0)
+        np.testing.assert_array_equal(times, [0.0, 1.0])
+        np.testing.assert_allclose(values, [[2.0, 3.0], [4.0, 5.0]])
+
+
+class TestMultiSensorAltimeter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, 'log.txt')
+        self.times, self.pressures = readPressureDataArrays(os.path.join(DATA_DIR, 'pressure_sensor_data.txt'))
+        _, self.gps_data = readGPSDataArrays(os.path.join(DATA_DIR, 'gps_sensor_data.txt'))
+        self.pressure_sensor_model = PressureSensorModels('standardAtmosModel',
+                                                          {'a': 44330.8, 'b': 4946.54, 'c': 0.1902632})
+        self.gps_sensor_model = GPSSensorModels('standardGpsModel', {'variance': 0.01})
+        self.pressure_sensor_filter = MovingAverage1D({'raw_data_window_size': 3, 'filtered_data_window_size': 0,
+                                                       'weights': [1.0, 1.0, 1.0]})
+        self.gps_sensor_filter = MovingAverage1D({'raw_data_window_size': 2, 'filtered_data_window_size': 0,
+                                                  'weights': [1.0, 1.0]})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def pressureSensor(self, sensor_id, times, pressures, sensor_class=PressureSensor, **kwargs):
+        pressure_sensor = sensor_class(sensor_id, f"PressureSensor{sensor_id}", 'Pa', **kwargs)
+        pressure_sensor.readCallbackMany(times, pressures)
+        return pressure_sensor
+
+    def gpsSensor(self, sensor_id, times, gps_data):
+        gps_sensor = GPSSensor(sensor_id, f"GpsSensor{sensor_id}", 'm')
+        gps_sensor.readCallbackMany(times, [None if np.isnan(data).any() else data for data in gps_data.tolist()])
+        return gps_sensor
+
+    def buildAltimeter(self, pressure_sensors, gps_sensors, **kwargs):
+        return MultiSensorAltimeter(pressure_sensors, gps_sensors, self.pressure_sensor_model, self.gps_sensor_model,
+                                    self.pressure_sensor_filter, self.gps_sensor_filter, 16,
+                                    DataLogger(self.log_file, 'w'), max_idle_time=0.01, **kwargs)
+
+    def testMatchesAltimeter(self):
+        altimeter = Altimeter(self.pressureSensor(1, self.times, self.pressures),
+                              self.gpsSensor(2, self.times, self.gps_data), self.pressure_sensor_model,
+                              self.gps_sensor_model, self.pressure_sensor_filter, self.gps_sensor_filter, 16,
+                              DataLogger(self.log_file, 'w'), max_idle_time=0.01)
+        expected_output = altimeter.run()
+        output = self.buildAltimeter([self.pressureSensor(1, self.times, self.pressures)],
+                                     [self.gpsSensor(2, self.times, self.gps_data)]).run()
+        np.testing.assert_allclose(output, expected_output)
+        # redundant sensors with the same data fuse to the data of one sensor
+        output = self.buildAltimeter([self.pressureSensor(i, self.times, self.pressures) for i in range(3)],
+                                     [self.gpsSensor(i, self.times, self.gps_data) for i in range(3, 5)],
+                                     pressure_variances=[1.0, 2.0, 4.0]).run()
+        np.testing.assert_allclose(output, expected_output)
+
+    def testRunAsync(self):
+        expected_output = self.buildAltimeter([self.pressureSensor(i, self.times, self.pressures) for i in range(2)],
+                                              [self.gpsSensor(2, self.times, self.gps_data)]).run()
+        pressure_sensors = [self.pressureSensor(i, [], []) for i in range(2)]
+        gps_sensor = self.gpsSensor(2, [], np.empty((0, 3)))
+        altimeter = self.buildAltimeter(pressure_sensors, [gps_sensor])
+        # a generous idle time, the altimeter only ends after it
+        altimeter.max_idle_time = 0.5
+        add_listener = gps_sensor.addListener
+
+        def feed():
+            for pressure_sensor in pressure_sensors:
+                pressure_sensor.readCallbackMany(self.times, self.pressures)
+            gps_sensor.readCallbackMany(self.times, [None if np.isnan(data).any() else data
+                                                     for data in self.gps_data.tolist()])
+
+        def addListener(listener):
+            add_listener(listener)
+            # every listener is registered, the data arrives once the altimeter waits for it
+            asyncio.get_running_loop().call_soon(feed)
+
+        gps_sensor.addListener = addListener
+        np.testing.assert_allclose(asyncio.run(altimeter.runAsync()), expected_output)
+        self.assertEqual([sensor.listeners for sensor in pressure_sensors + [gps_sensor]], [[], [], []])
+        with self.assertRaises(NotImplementedError):
+            altimeter.buildPipeline()
+
+    def testMergesByTimeStamp(self):
+        # two barometers sampling at interleaved time stamps at different batch sizes
+        output_times = []
+        altimeter = self.buildAltimeter([self.pressureSensor(1, self.times[::2], self.pressures[::2]),
+                                         self.pressureSensor(2, self.times[1::2], self.pressures[1::2])],
+                                        [self.gpsSensor(3, self.times, self.gps_data)],
+                                        batch_size=16,
+                                        output_sink=CallbackSink(lambda times, _: output_times.extend(times)))
+        altimeter.pressure_sensors[1].publishMany = lambda max_n, publish=altimeter.pressure_sensors[1].publishMany: \
+            publish(max_n // 4)
+        altimeter.run()
+        np.testing.assert_array_equal(output_times, self.times)
+
+    def testDropsFailedSensors(self):
+        altimeter = self.buildAltimeter([self.pressureSensor(1, self.times, self.pressures),
+                                         self.pressureSensor(2, self.times, self.pressures, FailingPressureSensor,
+                                                             n_batches=3),
+                                         self.pressureSensor(3, [], [])],
+                                        [self.gpsSensor(4, self.times, self.gps_data)],
+                                        sensor_timeout=0.0, batch_size=16)
+        altimeter.metrics_recorder = AltimeterMetrics()
+        with self.assertLogs('altimeter', level='WARNING'):
+            output = altimeter.run()
+        self.assertEqual(len(output), len(self.times))
+        self.assertEqual(altimeter.metrics()['counters']['failed_sensors'], 2)
+        self.assertEqual([stream.failed for stream in altimeter.pressure_streams], [False, True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
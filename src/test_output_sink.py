@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from output_sink import ListSink, CallbackSink, RingSink, ChunkedNumpySink, readOutputChunks
+
+
+class TestOutputSinks(unittest.TestCase):
+
+    def setUp(self):
+        self.time_stamps = np.arange(25.0)
+        self.elevations = self.time_stamps * 2 + 1
+
+    def writeBatches(self, sink, batch_size=7):
+        for start in range(0, len(self.time_stamps), batch_size):
+            sink.write(self.time_stamps[start:start + batch_size].tolist(),
+                       self.elevations[start:start + batch_size].tolist())
+        sink.close()
+
+    def testListSink(self):
+        sink = ListSink()
+        self.writeBatches(sink)
+        self.assertEqual(sink.result(), self.elevations.tolist())
+
+    def testCallbackSink(self):
+        batches = []
+        self.writeBatches(CallbackSink(lambda time_stamps, elevations: batches.append((time_stamps, elevations))))
+        self.assertEqual([len(elevations) for _, elevations in batches], [7, 7, 7, 4])
+        self.assertEqual(sum([time_stamps for time_stamps, _ in batches], []), self.time_stamps.tolist())
+
+    def testRingSink(self):
+        for batch_size in [1, 7, 25]:
+            sink = RingSink(5)
+            self.writeBatches(sink, batch_size)
+            np.testing.assert_array_equal(sink.result(), self.elevations[-5:])
+            np.testing.assert_array_equal(sink.buffer.times, self.time_stamps[-5:])
+
+    def testChunkedNumpySink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sink = ChunkedNumpySink(directory, chunk_size=10, prefix='run')
+            self.writeBatches(sink)
+            self.assertEqual([os.path.basename(file_name) for file_name in sink.result()],
+                             ['run_000000.npy', 'run_000001.npy', 'run_000002.npy'])
+            chunks = list(readOutputChunks(sink.result()))
+            self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+            np.testing.assert_array_equal(np.concatenate(chunks), np.column_stack((self.time_stamps, self.elevations)))
+            # closing again does not write an empty file
+            sink.close()
+            self.assertEqual(len(sink.result()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+
+from altimeter import Altimeter
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import MovingAverage1D
+from data_logger import DataLogger
+from paced_replay import PacedReplay
+
+
+class TestPacedReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.pressure_sensor = PressureSensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa')
+        self.gps_sensor = GPSSensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m')
+        times = np.arange(50, dtype=np.float64)
+        self.pressure_data = np.column_stack((times, np.full(50, 101000.0)))
+        self.gps_data = np.column_stack((times, np.full((50, 3), np.nan)))
+        self.gps_data[::10, 1:] = 5.0
+
+    def testMethodAttribute(self):
+        with self.assertRaises(AssertionError):
+            PacedReplay([self.pressure_sensor], [self.pressure_data, self.gps_data])
+        with self.assertRaises(AssertionError):
+            PacedReplay([self.pressure_sensor], [self.pressure_data], speed=0.0)
+
+    def testPacing(self):
+        replay = PacedReplay([self.pressure_sensor, self.gps_sensor], [self.pressure_data, self.gps_data], speed=500)
+        start = time.perf_counter()
+        replay.start()
+        replay.join()
+        # 49 seconds of data at 500 times the recorded rate
+        self.assertGreaterEqual(time.perf_counter() - start, 49 / 500)
+        report = replay.report()
+        self.assertEqual(report['readings'], 100)
+        # nobody consumes the data, so every reading after the first of each sensor misses its deadline
+        self.assertEqual(report['deadline_misses'], 98)
+        self.assertEqual(report['max_backlog'], 49)
+        self.assertGreater(report['push_jitter_max_us'], 0.0)
+        # without the output sink of the replay no latency is recorded
+        self.assertEqual(report['outputs'], 0)
+        self.assertEqual(replay.due_times, {})
+        self.assertEqual(len(self.pressure_sensor.sensor_data_queue), 50)
+        self.assertEqual(self.pressure_sensor.publish(), (0.0, 101000.0))
+        self.assertEqual(self.gps_sensor.publishMany(11)[::10], [(0.0, 5.0, 5.0, 5.0), (10.0, 5.0, 5.0, 5.0)])
+        self.assertIsNone(self.gps_sensor.publish())
+
+    def testStop(self):
+        replay = PacedReplay([self.pressure_sensor, self.gps_sensor], [self.pressure_data, self.gps_data], speed=1)
+        replay.start()
+        time.sleep(0.05)
+        replay.stop()
+        self.assertLess(replay.report()['readings'], 100)
+
+    def testAltimeterKeepsUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        replay = PacedReplay([self.pressure_sensor, self.gps_sensor], [self.pressure_data, self.gps_data], speed=500)
+        sensor_filter = MovingAverage1D({'raw_data_window_size': 3, 'filtered_data_window_size': 0,
+                                         'weights': [1.0, 1.0, 1.0]})
+        altimeter = Altimeter(self.pressure_sensor, self.gps_sensor,
+                              PressureSensorModels('standardAtmosModel', {'a': 44330.8, 'b': 4946.54, 'c': 0.1902632}),
+                              GPSSensorModels('standardGpsModel', {'variance': 0.01}), sensor_filter, sensor_filter,
+                              16, DataLogger(os.path.join(directory.name, 'log.txt'), 'w'), max_idle_time=0.1,
+                              output_sink=replay.outputSink())
+        replay.start()
+        output_data = asyncio.run(altimeter.runAsync())
+        replay.stop()
+        # a gps fix read in a later batch than the pressure reading of its time stamp gives its own output
+        self.assertGreaterEqual(len(output_data), 50)
+        self.assertLessEqual(len(output_data), 55)
+        report = replay.report()
+        self.assertEqual(report['readings'], 100)
+        # the latency is recorded for the first output of every time stamp
+        self.assertEqual(report['outputs'], 50)
+        self.assertGreater(report['latency_max_us'], 0.0)
+        self.assertLessEqual(report['latency_p50_us'], report['latency_max_us'])
+        self.assertEqual(replay.due_times, {})
+
+    def testDueTimesWithoutData(self):
+        self.pressure_data[1::2, 1] = np.nan
+        replay = PacedReplay([self.pressure_sensor, self.gps_sensor], [self.pressure_data, self.gps_data], speed=500)
+        replay.outputSink()
+        replay.start()
+        replay.join()
+        # nobody outputs the readings, so the due times of the time stamps with data are left, the time stamps
+        # where every reading is missing never give an output and are not recorded
+        self.assertEqual(sorted(replay.due_times), list(np.arange(0.0, 50.0, 2.0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from altimeter import Altimeter
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from sensor_model import PressureSensorModels, GPSSensorModels
+from filters import MovingAverage1D
+from data_logger import DataLogger
+from pipeline import Pipeline, SourceStage, Stage, SinkStage, INLINE, THREAD, PROCESS
+from simulation_utils import loadPressureData, loadGPSData
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sin_data')
+
+
+class FailingStage(Stage):
+
+    def process(self, batch):
+        raise ValueError("stage failed")
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, 'log.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def buildAltimeter(self):
+        pressure_sensor = PressureSensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa')
+        gps_sensor = GPSSensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m')
+        loadPressureData(pressure_sensor, os.path.join(DATA_DIR, 'pressure_sensor_data.txt'))
+        loadGPSData(gps_sensor, os.path.join(DATA_DIR, 'gps_sensor_data.txt'))
+        pressure_sensor_model = PressureSensorModels('standardAtmosModel',
+                                                     {'a': 44330.8, 'b': 4946.54, 'c': 0.1902632})
+        gps_sensor_model = GPSSensorModels('standardGpsModel', {'variance': 0.01})
+        pressure_sensor_filter = MovingAverage1D({'raw_data_window_size': 3, 'filtered_data_window_size': 0,
+                                                  'weights': [1.0, 1.0, 1.0]})
+        gps_sensor_filter = MovingAverage1D({'raw_data_window_size': 2, 'filtered_data_window_size': 0,
+                                             'weights': [1.0, 1.0]})
+        return Altimeter(pressure_sensor, gps_sensor, pressure_sensor_model, gps_sensor_model,
+                         pressure_sensor_filter, gps_sensor_filter, 16, DataLogger(self.log_file, 'w'),
+                         max_idle_time=0.01, batch_size=16)
+
+    def testSegments(self):
+        pipeline = self.buildAltimeter().buildPipeline([INLINE, THREAD, INLINE, INLINE, PROCESS, INLINE, THREAD])
+        self.assertEqual([(mode, len(stages)) for mode, stages in pipeline.segments()],
+                         [(INLINE, 1), (THREAD, 3), (PROCESS, 2), (THREAD, 1)])
+        with self.assertRaises(AssertionError):
+            Pipeline([SinkStage()])
+        with self.assertRaises(AssertionError):
+            self.buildAltimeter().buildPipeline([INLINE, 'remote', INLINE, INLINE, INLINE, INLINE, INLINE])
+
+    def testMatchesAltimeter(self):
+        expected_output = self.buildAltimeter().run()
+        for modes in [None, [INLINE, THREAD, THREAD, THREAD, THREAD, THREAD, THREAD],
+                      [THREAD, INLINE, PROCESS, INLINE, PROCESS, INLINE, THREAD]]:
+            pipeline = self.buildAltimeter().buildPipeline(modes, queue_size=2)
+            pipeline.run()
+            np.testing.assert_allclose(pipeline.stages[-1].output_data, expected_output)
+
+    def testCallback(self):
+        expected_output = self.buildAltimeter().run()
+        batches = []
+        self.buildAltimeter().buildPipeline(callback=batches.append).run()
+        self.assertGreater(len(batches), 1)
+        np.testing.assert_allclose(np.concatenate(batches), expected_output)
+
+    def testError(self):
+        altimeter = self.buildAltimeter()
+        for mode in [INLINE, THREAD, PROCESS]:
+            stages = [SourceStage(altimeter.pressure_sensor, altimeter.gps_sensor, 16, 0.01), FailingStage(),
+                      SinkStage()]
+            with self.assertRaises(ValueError):
+                Pipeline(stages, [INLINE, mode, THREAD]).run()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+class TestRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = RingBuffer(3)
+
+    def testMethodAttribute(self):
+        with self.assertRaises(AssertionError):
+            RingBuffer(0)
+        with self.assertRaises(AttributeError):
+            # slots class should not accept new attributes
+            self.buffer.data = []
+        with self.assertRaises(AssertionError):
+            _ = self.buffer.last
+
+    def testPushAndEvict(self):
+        test_data = [(1.0, 10.0), (2.0, 20.0), (3.0, 30.0), (4.0, 40.0), (5.0, 50.0), (6.0, 60.0), (7.0, 70.0)]
+        for i, (time_stamp, value) in enumerate(test_data):
+            self.buffer.push(time_stamp, value)
+            window = test_data[max(0, i - 2):i + 1]
+            self.assertEqual(len(self.buffer), len(window))
+            np.testing.assert_array_equal(self.buffer.times, [d[0] for d in window])
+            np.testing.assert_array_equal(self.buffer.values, [d[1] for d in window])
+            self.assertEqual(self.buffer[-1], value)
+            self.assertEqual(self.buffer.last, (time_stamp, value))
+        self.assertTrue(self.buffer.isFull())
+        # ordered views share memory with the buffer
+        self.assertIsNotNone(self.buffer.values.base)
+        self.buffer.clear()
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(len(self.buffer.values), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
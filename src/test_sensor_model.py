@@ -1,4 +1,6 @@
 import unittest
+import numpy as np
+
 from sensor_model import PressureSensorModels, GPSSensorModels
 
 class TestPressureSensorModel(unittest.TestCase):
@@ -10,19 +12,40 @@ class TestPressureSensorModel(unittest.TestCase):
     def testMethodAttribute(self):
         with self.assertRaises(AssertionError):
             PressureSensorModels("random_model", {})
+        with self.assertRaises(AssertionError):
+            # parameters are validated at construction
+            PressureSensorModels("standardAtmosModel", {'a': 10.0, 'b': 2.0})
 
     def testStandardAtmosModel(self):
-        with self.assertRaises(AssertionError):
-            # ensure it handles only float data
-            self.sensor.model(1)
         self.assertAlmostEqual(self.sensor.model(1.0), 1.0)
-        self.sensor.sensor_model_parameters = {'a': 10.0, 'b': 2.0}
-        with self.assertRaises(AssertionError):
-            self.sensor.model(1.0)
-        self.sensor.sensor_model_parameters['c'] = 0.5
-        self.assertAlmostEqual(self.sensor.model(16.0), 2.0)
+        self.assertAlmostEqual(self.sensor.model(1), 1.0)
+        sensor = PressureSensorModels("standardAtmosModel", {'a': 10.0, 'b': 2.0, 'c': 0.5})
+        self.assertAlmostEqual(sensor.model(16.0), 2.0)
+        # ensure it handles numpy arrays in one pass
+        np.testing.assert_allclose(sensor.model(np.array([16.0, 4.0, 1.0])), [2.0, 6.0, 8.0])
 
 
+    def testLookupTableAtmosModel(self):
+        model_parameter = {'a': 44330.8, 'b': 4946.54, 'c': 0.1902632, 'min_pressure': 30000.0,
+                           'max_pressure': 110000.0, 'max_error': 1e-3}
+        exact_sensor = PressureSensorModels("standardAtmosModel", model_parameter)
+        pressure_data = np.concatenate((np.linspace(20000.0, 120000.0, 10001), [30000.0, 110000.0]))
+        for interpolation in ['linear', 'cubic']:
+            sensor = PressureSensorModels("lookupTableAtmosModel", dict(model_parameter, interpolation=interpolation))
+            expected = exact_sensor.model(pressure_data)
+            actual = sensor.model(pressure_data)
+            self.assertLessEqual(np.abs(actual - expected).max(), 1e-3)
+            # the exact model is used outside the pressure range
+            outside = (pressure_data < 30000.0) | (pressure_data > 110000.0)
+            np.testing.assert_array_equal(actual[outside], expected[outside])
+            np.testing.assert_allclose([sensor.model(p) for p in pressure_data.tolist()], actual, rtol=0, atol=1e-9)
+        with self.assertRaises(AssertionError):
+            PressureSensorModels("lookupTableAtmosModel", dict(model_parameter, interpolation='nearest'))
+        with self.assertRaises(AssertionError):
+            PressureSensorModels("lookupTableAtmosModel", dict(model_parameter, max_error=1e-12))
+        with self.assertRaises(AssertionError):
+            PressureSensorModels("lookupTableAtmosModel", {'a': 10.0, 'b': 2.0, 'c': 0.5})
+
 
 class TestGPSSensorModel(unittest.TestCase):
 
@@ -45,6 +68,10 @@ class TestGPSSensorModel(unittest.TestCase):
             # ensure it handles only list of floats with len 3
             self.sensor.model([1, 1.0, '1'])
         self.assertAlmostEqual(self.sensor.model([1.2, 2.3, 4.5]), 4.5)
+        self.assertAlmostEqual(self.sensor.model((1.2, 2.3, 4.5)), 4.5)
+        with self.assertRaises(AssertionError):
+            self.sensor.model(np.array([1.0, 2.0]))
+        np.testing.assert_allclose(self.sensor.model(np.array([[1.2, 2.3, 4.5], [1.0, 2.0, 3.0]])), [4.5, 3.0])
 
 
 if __name__ == '__main__':
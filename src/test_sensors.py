@@ -1,6 +1,29 @@
+import asyncio
 import unittest
+import numpy as np
+
 from pressure_sensor import PressureSensor
 from gps_sensor import GPSSensor
+from replay_sensor import PressureReplaySensor, GPSReplaySensor
+from sensor import Sensor, PRESSURE_SENSOR_TYPE
+
+
+class CallbackOnlySensor(Sensor):
+    """
+    sensor implementing only the single reading callback, as the sensors written before the batch callback
+    """
+    def readCallback(self, data):
+        self.sensor_data_queue.append(data)
+        self.notify()
+
+
+class TestSensor(unittest.TestCase):
+
+    def testDefaultReadCallbackMany(self):
+        sensor = CallbackOnlySensor(1, "Sensor", PRESSURE_SENSOR_TYPE, 'Pa')
+        sensor.readCallbackMany([1.0, 2.0, 3.0], [10.0, None, (1.0, 2.0, 3.0)])
+        self.assertEqual(sensor.publishMany(10), [(1.0, 10.0), None, (3.0, 1.0, 2.0, 3.0)])
+
 
 class TestPressureSensor(unittest.TestCase):
 
@@ -14,7 +37,7 @@ class TestPressureSensor(unittest.TestCase):
         self.sensor.readCallback(test_data[0])
         self.sensor.readCallback(test_data[1])
         self.sensor.readCallback(test_data[2])
-        self.assertEqual(self.sensor.sensor_data_queue.qsize(), len(test_data))
+        self.assertEqual(len(self.sensor.sensor_data_queue), len(test_data))
         data = self.sensor.publish()
         self.assertEqual(data[0], test_data[0][0])
         self.assertEqual(data[1], test_data[0][1])
@@ -23,15 +46,40 @@ class TestPressureSensor(unittest.TestCase):
         data = self.sensor.publish()
         self.assertEqual(data[0], test_data[2][0])
         self.assertEqual(data[1], test_data[2][1])
-        self.assertEqual(self.sensor.sensor_data_queue.qsize(), 0)
+        self.assertEqual(len(self.sensor.sensor_data_queue), 0)
         data = self.sensor.publish()
         self.assertEqual(data, None)
 
+    def testAddManyData(self):
+        self.assertEqual(self.sensor.publishMany(10), [])
+        self.sensor.readCallbackMany(np.array([1.0, 2.0, 3.0]), np.array([10.0, 20.0, 30.0]))
+        self.sensor.readCallbackMany([4.0], [None])
+        self.assertEqual(len(self.sensor.sensor_data_queue), 4)
+        self.assertEqual(self.sensor.publishMany(2), [(1.0, 10.0), (2.0, 20.0)])
+        self.assertEqual(self.sensor.publishMany(10), [(3.0, 30.0), None])
+        self.assertEqual(len(self.sensor.sensor_data_queue), 0)
+
+    def testStream(self):
+        async def consume():
+            batches = []
+            async for batch in self.sensor.stream(max_n=2, timeout=0.5):
+                batches.append(batch)
+                if len(batches) == 2:
+                    # the queue is empty, the data is pushed once the consumer waits for it and wakes it up
+                    asyncio.get_running_loop().call_soon(self.sensor.readCallback, (4.0, 40.0))
+            return batches
+
+        self.sensor.readCallbackMany([1.0, 2.0, 3.0], [10.0, 20.0, 30.0])
+        batches = asyncio.run(consume())
+        self.assertEqual(batches, [[(1.0, 10.0), (2.0, 20.0)], [(3.0, 30.0)], [(4.0, 40.0)]])
+        self.assertEqual(self.sensor.listeners, [])
+
 
 class TestGPSSensor(unittest.TestCase):
 
     def setUp(self):
         self.sensor = PressureSensor(sensor_id=3, sensor_name="GPS sensor", data_unit='m')
+        self.gps_sensor = GPSSensor(sensor_id=3, sensor_name="GPS sensor", data_unit='m')
 
     def testAddData(self):
         data = self.sensor.publish()
@@ -40,7 +88,7 @@ class TestGPSSensor(unittest.TestCase):
         self.sensor.readCallback(test_data[0])
         self.sensor.readCallback(test_data[1])
         self.sensor.readCallback(test_data[2])
-        self.assertEqual(self.sensor.sensor_data_queue.qsize(), len(test_data))
+        self.assertEqual(len(self.sensor.sensor_data_queue), len(test_data))
         data = self.sensor.publish()
         self.assertEqual(data[0], test_data[0][0])
         self.assertEqual(data[2], test_data[0][2])
@@ -49,9 +97,67 @@ class TestGPSSensor(unittest.TestCase):
         self.assertEqual(data[2], test_data[1][2])
         data = self.sensor.publish()
         self.assertEqual(data, None)
-        self.assertEqual(self.sensor.sensor_data_queue.qsize(), 0)
+        self.assertEqual(len(self.sensor.sensor_data_queue), 0)
         data = self.sensor.publish()
         self.assertEqual(data, None)
 
+    def testAddManyData(self):
+        self.gps_sensor.readCallbackMany([1.0, 2.0, 3.0], [(1.0, 2.0, 3.0), None, np.array([4.0, 5.0, 6.0])])
+        self.assertEqual(len(self.gps_sensor.sensor_data_queue), 3)
+        data = self.gps_sensor.publishMany(3)
+        self.assertEqual(data[0], (1.0, 1.0, 2.0, 3.0))
+        self.assertEqual(data[1], None)
+        self.assertEqual(data[2][3], 6.0)
+        self.gps_sensor.readCallbackMany(np.array([4.0]), np.array([[7.0, 8.0, 9.0]]))
+        self.assertEqual(self.gps_sensor.publish(), (4.0, 7.0, 8.0, 9.0))
+
+
+class TestReplaySensors(unittest.TestCase):
+
+    def setUp(self):
+        self.pressure_data = np.array([[1.0, 10.0], [2.0, np.nan], [3.0, 30.0], [4.0, 40.0]])
+        self.gps_data = np.array([[1.0, 1.0, 2.0, 3.0], [2.0, np.nan, np.nan, np.nan]])
+
+    def testMethodAttribute(self):
+        with self.assertRaises(AssertionError):
+            PressureReplaySensor(1, "PressureSensor", 'Pa', self.gps_data)
+        with self.assertRaises(AssertionError):
+            GPSReplaySensor(2, "GpsSensor", 'm', self.pressure_data)
+
+    def testReplay(self):
+        sensor = PressureReplaySensor(1, "PressureSensor", 'Pa', self.pressure_data)
+        self.assertEqual(sensor.pending(), 4)
+        self.assertEqual(sensor.publish(), (1.0, 10.0))
+        self.assertEqual(sensor.publishMany(2), [None, (3.0, 30.0)])
+        self.assertEqual(sensor.publishMany(10), [(4.0, 40.0)])
+        self.assertEqual(sensor.publishMany(10), [])
+        self.assertEqual(sensor.publish(), None)
+        sensor.rewind()
+        self.assertEqual(sensor.publish(), (1.0, 10.0))
+        sensor.seek(2.5)
+        self.assertEqual(sensor.publish(), (3.0, 30.0))
+        gps_sensor = GPSReplaySensor(2, "GpsSensor", 'm', self.gps_data)
+        self.assertEqual(gps_sensor.publishMany(10), [(1.0, 1.0, 2.0, 3.0), None])
+        # data pushed to a replay sensor would never be published
+        with self.assertRaises(NotImplementedError):
+            sensor.readCallback((5.0, 50.0))
+        with self.assertRaises(NotImplementedError):
+            gps_sensor.readCallbackMany([5.0], [(1.0, 2.0, 3.0)])
+
+    def testIndependentCursors(self):
+        sensors = [PressureReplaySensor(1, "PressureSensor", 'Pa', self.pressure_data) for _ in range(2)]
+        self.assertEqual(sensors[0].publishMany(3), [(1.0, 10.0), None, (3.0, 30.0)])
+        self.assertEqual(sensors[1].publishMany(1), [(1.0, 10.0)])
+        self.assertEqual(sensors[0].pending(), 1)
+        self.assertEqual(sensors[1].pending(), 3)
+
+    def testStream(self):
+        async def consume(sensor):
+            return [batch async for batch in sensor.stream(max_n=3, timeout=0.01)]
+
+        sensor = PressureReplaySensor(1, "PressureSensor", 'Pa', self.pressure_data)
+        self.assertEqual(asyncio.run(consume(sensor)), [[(1.0, 10.0), None, (3.0, 30.0)], [(4.0, 40.0)]])
+
+
 if __name__ == '__main__':
     unittest.main()
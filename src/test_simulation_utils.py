@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+import simulation_utils
+from pressure_sensor import PressureSensor
+from gps_sensor import GPSSensor
+from simulation_utils import readSensorDataArray, loadPressureData, loadGPSData
+
+class TestSensorDataLoaders(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pressure_data_file = os.path.join(self.directory.name, 'pressure_sensor_data.txt')
+        self.gps_data_file = os.path.join(self.directory.name, 'gps_sensor_data.txt')
+        with open(self.pressure_data_file, 'w') as f:
+            f.write("0,101311.5\n1,None\n2,101415.25\n")
+        with open(self.gps_data_file, 'w') as f:
+            f.write("0,None\n1,1.5,2.5,3.5\n2,None\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testReadSensorDataArray(self):
+        data = readSensorDataArray(self.gps_data_file, 3)
+        self.assertEqual(data.shape, (3, 4))
+        np.testing.assert_array_equal(data[1], [1.0, 1.5, 2.5, 3.5])
+        self.assertTrue(np.isnan(data[[0, 2], 1:]).all())
+        # without a cache directory no cache is written and the data can not be memory mapped
+        self.assertEqual([f for f in os.listdir(self.directory.name) if f.endswith('.npy')], [])
+        with self.assertRaises(AssertionError):
+            readSensorDataArray(self.gps_data_file, 3, mmap_mode='r')
+        # the file is parsed in chunks of lines
+        parse_chunk_bytes = simulation_utils.PARSE_CHUNK_BYTES
+        simulation_utils.PARSE_CHUNK_BYTES = 8
+        try:
+            np.testing.assert_array_equal(readSensorDataArray(self.gps_data_file, 3), data)
+        finally:
+            simulation_utils.PARSE_CHUNK_BYTES = parse_chunk_bytes
+
+    def testReadSensorDataArrayCache(self):
+        cache_dir = os.path.join(self.directory.name, 'cache')
+        data = readSensorDataArray(self.gps_data_file, 3, cache_dir)
+        np.testing.assert_array_equal(data[1], [1.0, 1.5, 2.5, 3.5])
+        cache_files = os.listdir(cache_dir)
+        self.assertEqual(len(cache_files), 1)
+        # the cache is used while the data file is unchanged
+        np.save(os.path.join(cache_dir, cache_files[0]), np.zeros((1, 4)))
+        np.testing.assert_array_equal(readSensorDataArray(self.gps_data_file, 3, cache_dir), np.zeros((1, 4)))
+        # a modified data file is parsed again and the stale cache is removed
+        with open(self.gps_data_file, 'w') as f:
+            f.write("0,1.0,2.0,3.0\n")
+        os.utime(self.gps_data_file, ns=(0, 10 ** 9))
+        np.testing.assert_array_equal(readSensorDataArray(self.gps_data_file, 3, cache_dir), [[0.0, 1.0, 2.0, 3.0]])
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        # a data file of the same name in another directory has its own cache
+        other_gps_data_file = os.path.join(self.directory.name, 'other', 'gps_sensor_data.txt')
+        os.mkdir(os.path.dirname(other_gps_data_file))
+        with open(other_gps_data_file, 'w') as f:
+            f.write("5,6.0,7.0,8.0\n")
+        np.testing.assert_array_equal(readSensorDataArray(other_gps_data_file, 3, cache_dir), [[5.0, 6.0, 7.0, 8.0]])
+        np.testing.assert_array_equal(readSensorDataArray(self.gps_data_file, 3, cache_dir), [[0.0, 1.0, 2.0, 3.0]])
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def testLoadSensorData(self):
+        pressure_sensor = PressureSensor(sensor_id=1, sensor_name="PressureSensor", data_unit='Pa')
+        gps_sensor = GPSSensor(sensor_id=2, sensor_name="GpsSensor", data_unit='m')
+        loadPressureData(pressure_sensor, self.pressure_data_file)
+        loadGPSData(gps_sensor, self.gps_data_file)
+        self.assertEqual(pressure_sensor.publishMany(3), [(0.0, 101311.5), None, (2.0, 101415.25)])
+        self.assertEqual(gps_sensor.publishMany(3), [None, (1.0, 1.5, 2.5, 3.5), None])
+
+
+if __name__ == '__main__':
+    unittest.main()
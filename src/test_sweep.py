@@ -0,0 +1,40 @@
+import contextlib
+import csv
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+
+import sweep
+
+
+class TestSweep(unittest.TestCase):
+
+    def testMain(self):
+        working_dir = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, 'sweep_results.csv')
+            # the default configuration files are found from any working directory
+            os.chdir(directory)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sweep.main(['--data-dirs', os.path.join(sweep.DATA_DIR, 'sin_data'),
+                                '--filter-configs', os.path.join(sweep.CFG_DIR, 'pressure_moving_avg_param.toml'),
+                                '--buffer-sizes', '8', '16', '--pressure-models', 'lookupTableAtmosModel',
+                                '--bias-estimators', 'meanDifference',
+                                '--workers', '2', '--output', output_file])
+            finally:
+                os.chdir(working_dir)
+            with open(output_file, newline='') as f:
+                results = list(csv.DictReader(f))
+        self.assertEqual([int(result['pressure_data_buffer_size']) for result in results], [8, 16])
+        for result in results:
+            self.assertEqual(result['pressure_sensor_model'], 'lookupTableAtmosModel')
+            self.assertEqual(result['bias_estimator_name'], 'meanDifference')
+            self.assertTrue(np.isfinite(float(result['rmse'])))
+            self.assertTrue(np.isfinite(float(result['rmse_without_gps'])))
+
+
+if __name__ == '__main__':
+    unittest.main()